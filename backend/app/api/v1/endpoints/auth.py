@@ -2,13 +2,12 @@ from fastapi import APIRouter, Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordRequestForm, OAuth2PasswordBearer
 from sqlalchemy.ext.asyncio import AsyncSession
 from datetime import timedelta
-from jose import JWTError, jwt
 
 from ....crud import crud_user
 from .... import schemas
 from ....db import AsyncSessionLocal
 from ....core import security
-from ....models.user import User as UserModel 
+from ....core.user_cache import CurrentUser, user_cache
 
 router = APIRouter()
 
@@ -27,7 +26,14 @@ async def register_user(user: schemas.UserCreate, db: AsyncSession = Depends(get
             detail="Email already registered"
         )
 
-    return await crud_user.create_user(db=db, user=user)
+    try:
+        return await crud_user.create_user(db=db, user=user)
+    except security.PasswordHashingBusy:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Server is busy, please retry shortly",
+            headers={"Retry-After": "1"},
+        )
 
 
 @router.post("/login")
@@ -35,9 +41,16 @@ async def login_for_access_token(
     form_data: OAuth2PasswordRequestForm = Depends(),
     db: AsyncSession = Depends(get_db)
 ):
-    user = await crud_user.authenticate_user(
-        db, email=form_data.username, password=form_data.password
-    )
+    try:
+        user = await crud_user.authenticate_user(
+            db, email=form_data.username, password=form_data.password
+        )
+    except security.PasswordHashingBusy:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Server is busy, please retry shortly",
+            headers={"Retry-After": "1"},
+        )
 
     if not user:
         raise HTTPException(
@@ -65,25 +78,23 @@ oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/api/v1/auth/login")
 async def get_current_user(
     token: str = Depends(oauth2_scheme),
     db: AsyncSession = Depends(get_db)
-):
+) -> CurrentUser:
+    cached_user = user_cache.get(token)
+    if cached_user is not None:
+        return cached_user
+
     credentials_exception = HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="Could not validate credentials",
         headers={"WWW-Authenticate": "Bearer"},
     )
 
-    try:
-        payload = jwt.decode(
-            token,
-            security.settings.SECRET_KEY,
-            algorithms=[security.settings.ALGORITHM]
-        )
-        email: str = payload.get("sub")
-
-        if email is None:
-            raise credentials_exception
+    payload = security.decode_access_token(token)
+    if payload is None:
+        raise credentials_exception
 
-    except JWTError:
+    email: str = payload.get("sub")
+    if email is None:
         raise credentials_exception
 
     user = await crud_user.get_user_by_email(db, email=email)
@@ -91,4 +102,6 @@ async def get_current_user(
     if user is None:
         raise credentials_exception
 
-    return user
+    current_user = CurrentUser(id=user.id, email=user.email)
+    user_cache.set(token, current_user, token_expires_at=payload.get("exp"))
+    return current_user
@@ -0,0 +1,28 @@
+
+from fastapi import APIRouter, Depends, HTTPException
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from .... import crud
+from ....db import AsyncSessionLocal
+from .auth import get_current_user
+from ....core.user_cache import CurrentUser
+from ....schemas.job import JobOut
+
+router = APIRouter()
+
+async def get_db():
+    async with AsyncSessionLocal() as session:
+        yield session
+
+@router.get("/{job_id}", response_model=JobOut)
+async def read_job_status(
+    job_id: int,
+    db: AsyncSession = Depends(get_db),
+    current_user: CurrentUser = Depends(get_current_user)
+):
+    job = await crud.get_generation_job(db, job_id=job_id)
+
+    if not job or job.owner_id != current_user.id:
+        raise HTTPException(status_code=404, detail="Job not found")
+
+    return JobOut.from_job(job)
@@ -1,22 +1,37 @@
 import asyncio
-from fastapi import APIRouter, Depends, HTTPException, status
-from fastapi.responses import StreamingResponse 
+import json
+import orjson
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, status
+from fastapi.responses import FileResponse, JSONResponse, Response, StreamingResponse
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.future import select
 from sqlalchemy import delete
-from typing import List
+from sqlalchemy.orm import joinedload
+from typing import List, Optional
 
 from .... import crud, schemas
 from ....db import AsyncSessionLocal
 from .auth import get_current_user
-from ....models.user import User as UserModel
+from .usage import llm_unavailable_error, quota_exceeded_error, require_token_quota
+from ....core.user_cache import CurrentUser
 from ....models.project import Project 
 from ....models.document_section import DocumentSection
-from ....services import llm_service, document_service
+from ....services import llm_service, search_index
+from ....services.render_service import RenderPoolBusy, render_pool
+from ....services.export_cache import content_hash, export_cache
+from ....services.project_cache import bump_project_version, project_cache
+from ....services.job_queue import job_queue
 from ....services.document_service import SectionData
+from ....services.regeneration import (
+    RegenerationPlan, apply_plan, delete_sections, plan_regeneration, regenerate_incrementally
+)
+from ....services.section_keys import generation_key
+from ....services.llm_provider import LLMError
+from ....services.usage_tracker import QuotaExceeded
 from ....schemas.generation import GenerateRequest, DocumentSection as SectionSchema
 from ....schemas.generation import TopicRequest
 from ....schemas.project import ProjectSection 
+from ....schemas.job import JobOut
 
 router = APIRouter()
 
@@ -28,49 +43,81 @@ async def get_db():
 async def create_new_project(
     project: schemas.ProjectCreate,
     db: AsyncSession = Depends(get_db),
-    current_user: UserModel = Depends(get_current_user)
+    current_user: CurrentUser = Depends(get_current_user)
 ):
     return await crud.create_project(db=db, project=project, owner_id=current_user.id)
 
-@router.get("/", response_model=List[schemas.Project])
+@router.get("/", response_model=List[schemas.ProjectSummary])
 async def read_user_projects(
+    response: Response,
+    limit: Optional[int] = Query(default=None, ge=1, le=500),
+    cursor: Optional[int] = None,
     db: AsyncSession = Depends(get_db),
-    current_user: UserModel = Depends(get_current_user)
+    current_user: CurrentUser = Depends(get_current_user)
 ):
-    projects_from_db = await crud.get_projects_by_owner(db=db, owner_id=current_user.id)
-    
-    response_projects = []
-    for project in projects_from_db:
-        project_schema = schemas.Project.from_orm(project)
-        
-        raw_sections = project.get_sections()
-        if raw_sections and isinstance(raw_sections[0], str):
-             project_schema.sections = raw_sections
-        else:
-             project_schema.sections = raw_sections
+    # Paged only when asked to: the dashboard lists every project in one call.
+    if limit is None and cursor is not None:
+        limit = 100
+    projects_from_db = await crud.get_projects_by_owner(
+        db=db, owner_id=current_user.id, limit=limit + 1 if limit else None, before_id=cursor
+    )
+
+    if limit and len(projects_from_db) > limit:
+        projects_from_db = projects_from_db[:limit]
+        response.headers["X-Next-Cursor"] = str(projects_from_db[-1].id)
+
+    return projects_from_db
+
+def _project_headers(project_id: int, version: int) -> dict:
+    # Clients must revalidate, which costs a 304 while the project is unchanged.
+    return {"ETag": f'"{project_id}-{version}"', "Cache-Control": "private, no-cache"}
 
-        response_projects.append(project_schema)
-        
-    return response_projects
 
 @router.get("/{project_id}", response_model=schemas.Project)
 async def read_project_details(
     project_id: int,
+    if_none_match: Optional[str] = Header(default=None),
     db: AsyncSession = Depends(get_db),
-    current_user: UserModel = Depends(get_current_user)
+    current_user: CurrentUser = Depends(get_current_user)
 ):
-    result = await db.execute(select(Project).where(Project.id == project_id))
-    project = result.scalars().first()
+    """
+    Polled by the editor. While the project's version is unchanged, answers
+    with 304 or the cached serialized response, without a query.
+    """
+    generation = project_cache.generation
+    cached = project_cache.get(project_id)
+    if cached is None and if_none_match:
+        # Revalidating only needs the version.
+        result = await db.execute(
+            select(Project.version, Project.owner_id).where(Project.id == project_id)
+        )
+        row = result.first()
+        if row is not None:
+            cached = project_cache.store(project_id, row.version, row.owner_id, None, generation)
 
-    if not project or project.owner_id != current_user.id:
-        raise HTTPException(status_code=404, detail="Project not found")
+    if cached is not None:
+        if cached.owner_id != current_user.id:
+            raise HTTPException(status_code=404, detail="Project not found")
+        headers = _project_headers(project_id, cached.version)
+        if _etag_matches(if_none_match, headers["ETag"]):
+            return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+        body = project_cache.body(cached)
+        if body is not None:
+            return Response(content=body, media_type="application/json", headers=headers)
 
-    sections_result = await db.execute(
-        select(DocumentSection)
-        .where(DocumentSection.project_id == project_id)
-        .order_by(DocumentSection.section_order)
+    # One round trip: the project and its ordered sections via a LEFT JOIN,
+    # with ownership checked in the same WHERE clause.
+    result = await db.execute(
+        select(Project)
+        .options(joinedload(Project.document_sections))
+        .where(Project.id == project_id, Project.owner_id == current_user.id)
     )
-    generated_sections = sections_result.scalars().all()
+    project = result.unique().scalars().first()
+
+    if not project:
+        raise HTTPException(status_code=404, detail="Project not found")
+
+    generated_sections = project.document_sections
 
     project_schema = schemas.Project.from_orm(project)
 
@@ -80,15 +127,27 @@ async def read_project_details(
         ]
     else:
         project_schema.sections = project.get_sections()
-    
-    return project_schema
 
-@router.post("/{project_id}/generate", response_model=List[SectionSchema])
+    # The version was read in the same query as the content it labels.
+    body = orjson.dumps(project_schema.model_dump(mode="json", by_alias=True))
+    project_cache.store(project_id, project.version, project.owner_id, body, generation)
+    headers = _project_headers(project_id, project.version)
+    if _etag_matches(if_none_match, headers["ETag"]):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+    return Response(content=body, media_type="application/json", headers=headers)
+
+@router.post(
+    "/{project_id}/generate",
+    response_model=List[SectionSchema],
+    responses={202: {"model": JobOut, "description": "Job queued (background=true)"}}
+)
 async def generate_document_content(
     project_id: int,
     request: GenerateRequest,
+    background: bool = False,
+    incremental: bool = False,
     db: AsyncSession = Depends(get_db),
-    current_user: UserModel = Depends(get_current_user)
+    current_user: CurrentUser = Depends(require_token_quota)
 ):
     result = await db.execute(select(Project).where(Project.id == project_id))
     project = result.scalars().first()
@@ -96,44 +155,257 @@ async def generate_document_content(
     if not project:
         raise HTTPException(status_code=404, detail="Project not found")
 
+    if background and incremental:
+        raise HTTPException(status_code=400, detail="Incremental regeneration can't run as a background job")
+
+    if incremental:
+        # Only new or renamed sections (or all, if the topic changed) are generated;
+        # the rest keep their content, refinements and comments.
+        try:
+            sections = await regenerate_incrementally(db, project, request.main_topic, request.section_titles)
+        except QuotaExceeded as e:
+            raise quota_exceeded_error(e)
+        except LLMError as e:
+            raise llm_unavailable_error(e)
+        await export_cache.invalidate_project(project_id)
+        return sections
+
+    if background:
+        job = await crud.create_generation_job(
+            db,
+            project_id=project_id,
+            owner_id=current_user.id,
+            main_topic=request.main_topic,
+            section_titles=request.section_titles
+        )
+        job_queue.notify()
+        return JSONResponse(
+            status_code=status.HTTP_202_ACCEPTED,
+            content=JobOut.from_job(job).model_dump(mode="json"),
+            headers={"Location": f"/api/v1/jobs/{job.id}"}
+        )
+
+    # Generate first: if a section fails, the current sections stay.
+    # Regenerating a project asks for new text rather than the cached one.
+    fresh = await crud.project_has_sections(db, project_id)
+    try:
+        contents = await llm_service.generate_contents_for_sections(
+            main_topic=request.main_topic,
+            section_titles=request.section_titles,
+            fresh=fresh
+        )
+    except QuotaExceeded as e:
+        raise quota_exceeded_error(e)
+    except LLMError as e:
+        raise llm_unavailable_error(e)
+
     project.main_topic = request.main_topic
     db.add(project)
+    await search_index.index_project(db, project)
+    await search_index.remove_project_sections(db, project_id)
     
     await db.execute(
         delete(DocumentSection).where(DocumentSection.project_id == project_id)
     )
-    
-    await db.commit()
-    
+
     generated_sections = []
-    for i, section_title in enumerate(request.section_titles):
-        content = await llm_service.generate_content_for_section(
-            main_topic=request.main_topic,
-            section_title=section_title
-        )
-        
+    for i, (section_title, content) in enumerate(zip(request.section_titles, contents)):
         db_section = DocumentSection(
             title=section_title,
             content=content,
             section_order=i,
-            project_id=project_id
+            project_id=project_id,
+            generation_key=generation_key(request.main_topic, section_title, content)
         )
         db.add(db_section)
         generated_sections.append(db_section)
 
-        await asyncio.sleep(1.5)
+    await db.flush()
+    await search_index.index_sections(db, generated_sections)
+    await bump_project_version(db, project_id)
     await db.commit()
+    await export_cache.invalidate_project(project_id)
 
     for section in generated_sections:
         await db.refresh(section)
         
     return generated_sections
 
+def _sse(event: str, data) -> str:
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+
+async def _generation_events(
+    project_id: int, request: GenerateRequest, emit_tokens: bool,
+    plan: Optional[RegenerationPlan] = None, fresh: bool = False
+):
+    """
+    Generates the sections concurrently (only `plan.generate` when a plan is
+    given) and yields Server-Sent Events: `section` for each kept section
+    first, then `delta` for streamed text chunks (only when `emit_tokens` is
+    set), `section` as soon as a section is finished and persisted, and `done`.
+    If a section fails, the sections finished so far are kept and the stream
+    ends with an `error` event instead: status 429 when the user's token quota
+    ran out, 503 when the model is unavailable.
+    `fresh` bypasses the LLM response cache.
+
+    With a plan, a replaced section is deleted in the transaction that stores
+    its replacement; the other deletions, the reordering and the new topic
+    are applied once every section has been generated.
+    """
+    queue: asyncio.Queue = asyncio.Queue()
+    indexes = range(len(request.section_titles)) if plan is None else plan.generate
+    kept_orders = {} if plan is None else {section.id: order for section, order in plan.keep}
+
+    async def generate(index: int, section_title: str):
+        on_delta = None
+        if emit_tokens:
+            on_delta = lambda text: queue.put_nowait(("delta", index, text))
+        try:
+            content = await llm_service.stream_content_for_section(
+                main_topic=request.main_topic,
+                section_title=section_title,
+                on_delta=on_delta,
+                fresh=fresh
+            )
+        except QuotaExceeded as e:
+            queue.put_nowait(("error", index, quota_exceeded_error(e)))
+            return
+        except LLMError as e:
+            queue.put_nowait(("error", index, llm_unavailable_error(e)))
+            return
+        queue.put_nowait(("section", index, content))
+
+    tasks = [
+        asyncio.create_task(generate(i, request.section_titles[i]))
+        for i in indexes
+    ]
+    try:
+        async with AsyncSessionLocal() as db:
+            if kept_orders:
+                kept = await db.execute(
+                    select(DocumentSection).where(DocumentSection.id.in_(list(kept_orders)))
+                )
+                for db_section in sorted(kept.scalars().all(), key=lambda section: kept_orders[section.id]):
+                    data = SectionSchema.model_validate(db_section, from_attributes=True).model_dump()
+                    data["section_order"] = kept_orders[db_section.id]
+                    yield _sse("section", data)
+
+            remaining = len(tasks)
+            while remaining:
+                kind, index, value = await queue.get()
+                if kind == "delta":
+                    yield _sse("delta", {"section_order": index, "text": value})
+                    continue
+                if kind == "error":
+                    error = value
+                    yield _sse("error", {
+                        "status": error.status_code,
+                        "detail": error.detail,
+                        "retry_after": int(error.headers["Retry-After"]),
+                    })
+                    return
+
+                db_section = DocumentSection(
+                    title=request.section_titles[index],
+                    content=value,
+                    section_order=index,
+                    project_id=project_id,
+                    generation_key=generation_key(request.main_topic, request.section_titles[index], value)
+                )
+                db.add(db_section)
+                await db.flush()
+                await search_index.index_sections(db, [db_section])
+                if plan is not None and index in plan.replaces:
+                    await delete_sections(db, [plan.replaces[index]])
+                await bump_project_version(db, project_id)
+                await db.commit()
+                await db.refresh(db_section)
+                await export_cache.invalidate_project(project_id)
+                remaining -= 1
+                yield _sse("section", SectionSchema.model_validate(db_section, from_attributes=True).model_dump())
+
+            if plan is not None:
+                project = await db.get(Project, project_id)
+                project.main_topic = request.main_topic
+                await search_index.index_project(db, project)
+                await apply_plan(db, project_id, plan, already_deleted=plan.replaces.values())
+                await bump_project_version(db, project_id)
+                await db.commit()
+                await export_cache.invalidate_project(project_id)
+
+        yield _sse("done", {"sections": len(tasks) + len(kept_orders)})
+    finally:
+        # The client may disconnect mid-stream; don't leave orphaned LLM calls behind.
+        for task in tasks:
+            task.cancel()
+
+
+@router.post("/{project_id}/generate/stream")
+async def stream_document_content(
+    project_id: int,
+    request: GenerateRequest,
+    tokens: bool = False,
+    incremental: bool = False,
+    db: AsyncSession = Depends(get_db),
+    current_user: CurrentUser = Depends(require_token_quota)
+):
+    result = await db.execute(select(Project).where(Project.id == project_id))
+    project = result.scalars().first()
+
+    if not project:
+        raise HTTPException(status_code=404, detail="Project not found")
+
+    plan, fresh = None, False
+    if incremental:
+        # Nothing is changed until the replacements exist; see `_generation_events`.
+        plan = await plan_regeneration(db, project_id, request.main_topic, request.section_titles)
+    else:
+        fresh = await crud.project_has_sections(db, project_id)
+        await search_index.remove_project_sections(db, project_id)
+        await db.execute(
+            delete(DocumentSection).where(DocumentSection.project_id == project_id)
+        )
+        project.main_topic = request.main_topic
+        db.add(project)
+        await search_index.index_project(db, project)
+        await bump_project_version(db, project_id)
+        await db.commit()
+
+    return StreamingResponse(
+        _generation_events(project_id, request, emit_tokens=tokens, plan=plan, fresh=fresh),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+async def _cache_on_completion(chunks, tmp_path: str, cached_path: str):
+    """Passes render chunks through and publishes the file once it is complete."""
+    completed = False
+    try:
+        async for chunk in chunks:
+            yield chunk
+        completed = True
+    finally:
+        await chunks.aclose()
+        if completed:
+            await export_cache.commit(tmp_path, cached_path)
+        else:
+            await export_cache.discard(tmp_path)
+
+
+def _etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    if not if_none_match:
+        return False
+    candidates = [tag.strip() for tag in if_none_match.split(",")]
+    return "*" in candidates or etag in candidates
+
+
 @router.get("/{project_id}/export")
 async def export_project_document(
     project_id: int,
+    if_none_match: Optional[str] = Header(default=None),
     db: AsyncSession = Depends(get_db),
-    current_user: UserModel = Depends(get_current_user)
+    current_user: CurrentUser = Depends(get_current_user)
 ):
 
     result = await db.execute(select(Project).where(Project.id == project_id))
@@ -149,38 +421,67 @@ async def export_project_document(
     )
     sections = sections_result.scalars().all()
 
-    valid_sections = [
-        s for s in sections if s.content and "Error: Could not generate content" not in s.content
-    ]
+    valid_sections = [s for s in sections if s.content]
     
     if not valid_sections:
         raise HTTPException(status_code=400, detail="No valid content to export.")
     
     section_data = [SectionData(title=s.title, content=s.content) for s in valid_sections]
     
-    file_stream = None
-    media_type = ""
     safe_title = "".join(c for c in project.title if c.isalnum() or c in (' ', '_')).rstrip()
-    filename = f"{safe_title.replace(' ', '_')}.unknown"
-
 
     if project.document_type == 'docx':
-        file_stream = document_service.create_word_document(section_data)
         media_type = "application/vnd.openxmlformats-officedocument.wordprocessingml.document"
         filename = f"{safe_title}.docx"
     elif project.document_type == 'pptx':
-        file_stream = document_service.create_powerpoint_presentation(section_data)
         media_type = "application/vnd.openxmlformats-officedocument.presentationml.presentation"
         filename = f"{safe_title}.pptx"
     else:
        
         raise HTTPException(status_code=400, detail="Unsupported document type")
-    
-    return StreamingResponse(
-    file_stream,
-    media_type=media_type,
-    headers={"Content-Disposition": f'attachment; filename="{filename}"'}
-    )
+
+    digest = content_hash(project.document_type, section_data)
+    headers = {
+        "Content-Disposition": f'attachment; filename="{filename}"',
+        "ETag": f'"{digest}"',
+    }
+
+    if _etag_matches(if_none_match, headers["ETag"]):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers={"ETag": headers["ETag"]})
+
+    cached_path = await export_cache.get(project_id, digest, project.document_type)
+    if cached_path:
+        return FileResponse(cached_path, media_type=media_type, headers=headers)
+
+    tmp_path, cached_path = export_cache.reserve(project_id, digest, project.document_type)
+    try:
+        if render_pool.can_stream:
+            chunks = render_pool.stream(project.document_type, section_data, tee_path=tmp_path)
+            return StreamingResponse(
+                _cache_on_completion(chunks, tmp_path, cached_path),
+                media_type=media_type,
+                headers=headers
+            )
+        await render_pool.render_to_file(project.document_type, section_data, tmp_path)
+    except RenderPoolBusy:
+        await export_cache.discard(tmp_path)
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Export service is busy, please retry shortly",
+            headers={"Retry-After": "2"},
+        )
+    except Exception:
+        await export_cache.discard(tmp_path)
+        raise
+    if not await export_cache.commit(tmp_path, cached_path):
+        # The rendered file was removed before it could be published.
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Export could not be completed, please retry",
+            headers={"Retry-After": "1"},
+        )
+
+    return FileResponse(cached_path, media_type=media_type, headers=headers)
 
         
 @router.post("/{project_id}/suggest-outline", response_model=List[str])
@@ -188,7 +489,7 @@ async def suggest_document_outline(
     project_id: int,
     request: TopicRequest,
     db: AsyncSession = Depends(get_db),
-    current_user: UserModel = Depends(get_current_user)
+    current_user: CurrentUser = Depends(require_token_quota)
 ):
     result = await db.execute(select(Project).where(Project.id == project_id))
     project = result.scalars().first()
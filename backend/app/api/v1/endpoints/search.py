@@ -0,0 +1,39 @@
+from fastapi import APIRouter, Depends, HTTPException, Query, Response, status
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import List
+
+from ....db import AsyncSessionLocal
+from .auth import get_current_user
+from ....core.user_cache import CurrentUser
+from ....schemas.search import SearchHit
+from ....services import search_index
+
+router = APIRouter()
+
+async def get_db():
+    async with AsyncSessionLocal() as session:
+        yield session
+
+@router.get("/", response_model=List[SearchHit])
+async def search_projects_and_sections(
+    response: Response,
+    q: str = Query(min_length=1, max_length=200),
+    limit: int = Query(default=20, ge=1, le=50),
+    offset: int = Query(default=0, ge=0, le=1000),
+    db: AsyncSession = Depends(get_db),
+    current_user: CurrentUser = Depends(get_current_user)
+):
+    """
+    Ranked full-text search over the caller's project titles, main topics,
+    section titles and section content. Every word must match.
+    """
+    if not search_index.is_available(db):
+        raise HTTPException(status_code=status.HTTP_501_NOT_IMPLEMENTED, detail="Search is not supported on this database")
+
+    hits = await search_index.search(db, owner_id=current_user.id, query=q, limit=limit + 1, offset=offset)
+
+    if len(hits) > limit:
+        hits = hits[:limit]
+        response.headers["X-Next-Offset"] = str(offset + limit)
+
+    return hits
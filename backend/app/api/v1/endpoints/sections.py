@@ -1,16 +1,24 @@
 
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Query, Response, status
+from sqlalchemy import and_, or_
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.future import select
-from typing import List
+from sqlalchemy.orm import load_only
+from typing import List, Optional
+import difflib
 
-from .... import schemas
+from .... import crud, schemas
 from ....db import AsyncSessionLocal
 from .auth import get_current_user
-from ....models.user import User as UserModel
+from .usage import llm_unavailable_error, quota_exceeded_error, require_token_quota
+from ....core.user_cache import CurrentUser
 from ....models.document_section import DocumentSection
 from ....models.refinement_history import RefinementHistory 
-from ....services import llm_service
+from ....services import llm_service, search_index
+from ....services.llm_provider import LLMError
+from ....services.usage_tracker import QuotaExceeded
+from ....services.export_cache import export_cache
+from ....services.project_cache import bump_project_version
 
 router = APIRouter()
 
@@ -23,7 +31,7 @@ async def refine_section_content(
     section_id: int,
     request: schemas.generation.RefineRequest,
     db: AsyncSession = Depends(get_db),
-    current_user: UserModel = Depends(get_current_user)
+    current_user: CurrentUser = Depends(require_token_quota)
 ):
     result = await db.execute(select(DocumentSection).where(DocumentSection.id == section_id))
     db_section = result.scalars().first()
@@ -32,30 +40,64 @@ async def refine_section_content(
         raise HTTPException(status_code=404, detail="Section not found")
     
 
-    history_entry = RefinementHistory(
+    try:
+        refined_content = await llm_service.refine_content_for_section(
+            original_content=db_section.content,
+            refinement_prompt=request.prompt,
+            mode=request.mode
+        )
+    except QuotaExceeded as e:
+        raise quota_exceeded_error(e)
+    except LLMError as e:
+        # The section keeps its current content and no history entry is written.
+        raise llm_unavailable_error(e)
+
+    await crud.add_history_entry(
+        db,
+        section_id=section_id,
         prompt=request.prompt,
-        previous_content=db_section.content,
-        section_id=section_id
+        previous_content=db_section.content
     )
-    db.add(history_entry)
 
-    refined_content = await llm_service.refine_content_for_section(
-        original_content=db_section.content,
-        refinement_prompt=request.prompt
-    )
-    
     db_section.content = refined_content
+    await search_index.index_sections(db, [db_section])
+    await bump_project_version(db, db_section.project_id)
     await db.commit() 
     await db.refresh(db_section)
+    await export_cache.invalidate_project(db_section.project_id)
     
     return db_section
 
+@router.patch("/batch", response_model=schemas.generation.SectionBatchResult)
+async def update_sections_batch(
+    batch: schemas.generation.SectionBatchUpdate,
+    db: AsyncSession = Depends(get_db),
+    current_user: CurrentUser = Depends(get_current_user)
+):
+    """
+    Applies comment/feedback/order/content changes to several sections in one
+    transaction. Sections that are missing or not owned by the caller are
+    reported per item instead of failing the whole batch.
+    """
+    updated, errors = await crud.update_sections_batch(
+        db, owner_id=current_user.id, items=batch.updates
+    )
+    updated = [
+        schemas.generation.DocumentSection.model_validate(section, from_attributes=True)
+        for section in updated
+    ]
+    for project_id in {section.project_id for section in updated}:
+        await export_cache.invalidate_project(project_id)
+
+    return schemas.generation.SectionBatchResult(updated=updated, errors=errors)
+
+# Declared after /batch so "batch" is not parsed as a section id.
 @router.patch("/{section_id}", response_model=schemas.generation.DocumentSection)
 async def update_section_details(
     section_id: int,
     section_update: schemas.generation.SectionUpdate,
     db: AsyncSession = Depends(get_db),
-    current_user: UserModel = Depends(get_current_user)
+    current_user: CurrentUser = Depends(get_current_user)
 ):
     result = await db.execute(select(DocumentSection).where(DocumentSection.id == section_id))
     db_section = result.scalars().first()
@@ -72,21 +114,128 @@ async def update_section_details(
     if section_update.feedback is not None:
         db_section.feedback = section_update.feedback
         
+    await bump_project_version(db, db_section.project_id)
     await db.commit()
     await db.refresh(db_section)
+    await export_cache.invalidate_project(db_section.project_id)
     return db_section
 
 
 @router.get("/{section_id}/history", response_model=List[schemas.generation.RefinementHistoryOut])
 async def get_section_refinement_history(
     section_id: int,
+    response: Response,
+    limit: Optional[int] = Query(default=None, ge=1, le=500),
+    cursor: Optional[int] = None,
     db: AsyncSession = Depends(get_db),
-    current_user: UserModel = Depends(get_current_user)
+    current_user: CurrentUser = Depends(get_current_user)
 ):
-    result = await db.execute(
+    # Paged only when asked to: the section editor shows the whole history.
+    if limit is None and cursor is not None:
+        limit = 50
+    query = (
         select(RefinementHistory)
+        .options(load_only(
+            RefinementHistory.id, RefinementHistory.prompt, RefinementHistory.created_at
+        ))
         .where(RefinementHistory.section_id == section_id)
-        .order_by(RefinementHistory.created_at.desc()) 
+        .order_by(RefinementHistory.created_at.desc(), RefinementHistory.id.desc())
     )
+    if limit:
+        query = query.limit(limit + 1)
+    if cursor is not None:
+        # Keyset on (created_at, id); the cursor row's timestamp is read in SQL
+        # so no datetime has to round-trip through the client.
+        cursor_created_at = (
+            select(RefinementHistory.created_at)
+            .where(RefinementHistory.id == cursor)
+            .scalar_subquery()
+        )
+        query = query.where(or_(
+            RefinementHistory.created_at < cursor_created_at,
+            and_(
+                RefinementHistory.created_at == cursor_created_at,
+                RefinementHistory.id < cursor
+            )
+        ))
+
+    result = await db.execute(query)
     history = result.scalars().all()
-    return history
\ No newline at end of file
+
+    if limit and len(history) > limit:
+        history = history[:limit]
+        response.headers["X-Next-Cursor"] = str(history[-1].id)
+
+    return history
+
+
+async def _get_history_entry(db: AsyncSession, section_id: int, history_id: int) -> RefinementHistory:
+    result = await db.execute(
+        select(RefinementHistory)
+        .options(load_only(
+            RefinementHistory.id, RefinementHistory.prompt, RefinementHistory.created_at
+        ))
+        .where(RefinementHistory.id == history_id, RefinementHistory.section_id == section_id)
+    )
+    entry = result.scalars().first()
+    if not entry:
+        raise HTTPException(status_code=404, detail="History entry not found")
+    return entry
+
+
+@router.get("/{section_id}/history/{history_id}", response_model=schemas.generation.RefinementVersionOut)
+async def get_section_version(
+    section_id: int,
+    history_id: int,
+    db: AsyncSession = Depends(get_db),
+    current_user: CurrentUser = Depends(get_current_user)
+):
+    """The section content as it was before the refinement of this entry."""
+    entry = await _get_history_entry(db, section_id, history_id)
+    content = await crud.get_history_content(db, section_id=section_id, history_id=history_id)
+
+    return schemas.generation.RefinementVersionOut(
+        id=entry.id,
+        prompt=entry.prompt,
+        created_at=entry.created_at,
+        content=content or ""
+    )
+
+
+@router.get("/{section_id}/history/{history_id}/diff", response_model=schemas.generation.VersionDiffOut)
+async def diff_section_versions(
+    section_id: int,
+    history_id: int,
+    against: Optional[int] = None,
+    db: AsyncSession = Depends(get_db),
+    current_user: CurrentUser = Depends(get_current_user)
+):
+    """
+    Unified diff from the version stored by `history_id` to the version of
+    history entry `against`, or to the current content when it is omitted.
+    """
+    await _get_history_entry(db, section_id, history_id)
+    old_content = await crud.get_history_content(db, section_id=section_id, history_id=history_id)
+
+    if against is None:
+        result = await db.execute(
+            select(DocumentSection.content).where(DocumentSection.id == section_id)
+        )
+        new_content = result.scalars().first()
+        to_version = "current"
+    else:
+        await _get_history_entry(db, section_id, against)
+        new_content = await crud.get_history_content(db, section_id=section_id, history_id=against)
+        to_version = str(against)
+
+    diff = difflib.unified_diff(
+        (old_content or "").splitlines(keepends=True),
+        (new_content or "").splitlines(keepends=True),
+        fromfile=str(history_id),
+        tofile=to_version
+    )
+    return schemas.generation.VersionDiffOut(
+        from_version=str(history_id),
+        to_version=to_version,
+        diff="".join(diff)
+    )
@@ -0,0 +1,22 @@
+from fastapi import APIRouter, Depends
+
+from .auth import get_current_user
+from ....services import llm_service
+from ....services.llm_cache import llm_cache
+from ....services.render_service import render_pool
+
+# Operational details (model, circuit state, queue depth) are for signed-in
+# users only; /metrics stays open for scraping.
+router = APIRouter(dependencies=[Depends(get_current_user)])
+
+@router.get("/llm-cache")
+def read_llm_cache_stats():
+    return llm_cache.stats()
+
+@router.get("/llm")
+def read_llm_stats():
+    return llm_service.stats()
+
+@router.get("/render")
+def read_render_stats():
+    return {"pending": render_pool.pending, "document_types": render_pool.stats.snapshot()}
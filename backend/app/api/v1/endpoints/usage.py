@@ -0,0 +1,65 @@
+from datetime import datetime, timedelta, timezone
+from fastapi import APIRouter, Depends, HTTPException, status
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from .... import crud
+from ....db import AsyncSessionLocal
+from .auth import get_current_user
+from ....core.config import settings
+from ....core.user_cache import CurrentUser
+from ....schemas.usage import UsageOut
+from ....services.llm_provider import LLMError
+from ....services.usage_tracker import QuotaExceeded, llm_user, usage_tracker
+
+router = APIRouter()
+
+async def get_db():
+    async with AsyncSessionLocal() as session:
+        yield session
+
+def _seconds_until_quota_reset() -> int:
+    now = datetime.now(timezone.utc)
+    midnight = (now + timedelta(days=1)).replace(hour=0, minute=0, second=0, microsecond=0)
+    return int((midnight - now).total_seconds()) + 1
+
+def quota_exceeded_error(e: QuotaExceeded) -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+        detail=str(e),
+        headers={"Retry-After": str(_seconds_until_quota_reset())}
+    )
+
+def llm_unavailable_error(e: LLMError) -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+        detail=str(e),
+        headers={"Retry-After": str(int(settings.LLM_BREAKER_RESET_SECONDS))}
+    )
+
+async def require_token_quota(current_user: CurrentUser = Depends(get_current_user)) -> CurrentUser:
+    """
+    Dependency for endpoints that call the LLM: charges the request's LLM
+    usage to the user and rejects it with 429 once their daily quota is spent.
+    """
+    llm_user.set(current_user.id)
+    try:
+        await usage_tracker.check(current_user.id)
+    except QuotaExceeded as e:
+        raise quota_exceeded_error(e)
+    return current_user
+
+@router.get("/me", response_model=UsageOut)
+async def read_my_usage(
+    db: AsyncSession = Depends(get_db),
+    current_user: CurrentUser = Depends(get_current_user)
+):
+    used, quota = await usage_tracker.usage_today(current_user.id)
+    day = datetime.now(timezone.utc).date()
+    breakdown = await crud.get_usage_breakdown(db, user_id=current_user.id, day=day)
+    return UsageOut(
+        day=day,
+        used_tokens=used,
+        quota=quota or None,
+        remaining_tokens=max(0, quota - used) if quota else None,
+        breakdown=breakdown
+    )
@@ -0,0 +1,305 @@
+import re
+import time
+from bisect import bisect_left
+from typing import Callable, Dict, Iterable, List, Tuple
+
+from sqlalchemy import event
+
+# Request handling is single-threaded on the event loop, so metric values are
+# plain attributes updated without locks; a scrape may see a histogram one
+# observation behind, which Prometheus tolerates.
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+SIZE_BUCKETS = (1e4, 5e4, 1e5, 5e5, 1e6, 5e6, 1e7, 5e7)
+
+REGISTRY: List["_Metric"] = []
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names: Tuple[str, ...], values: Tuple[str, ...], extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _format_value(value: float) -> str:
+    return repr(float(value)) if value != int(value) else str(int(value))
+
+
+class _Metric:
+    metric_type = "untyped"
+
+    def __init__(self, name: str, documentation: str, labelnames: Iterable[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._children: Dict[tuple, object] = {}
+        REGISTRY.append(self)
+
+    def labels(self, *values):
+        child = self._children.get(values)
+        if child is None:
+            if len(values) != len(self.labelnames):
+                raise ValueError(f"{self.name} expects labels {self.labelnames}")
+            child = self._children[values] = self._new_child()
+        return child
+
+    def _new_child(self):
+        raise NotImplementedError
+
+    def _samples(self) -> Iterable[str]:
+        raise NotImplementedError
+
+    def render(self) -> str:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.metric_type}"]
+        lines.extend(self._samples())
+        return "\n".join(lines)
+
+
+class _Value:
+    __slots__ = ("value",)
+
+    def __init__(self):
+        self.value = 0.0
+
+    def inc(self, amount: float = 1.0) -> None:
+        self.value += amount
+
+    def dec(self, amount: float = 1.0) -> None:
+        self.value -= amount
+
+    def set(self, value: float) -> None:
+        self.value = value
+
+
+class Counter(_Metric):
+    metric_type = "counter"
+
+    def _new_child(self):
+        return _Value()
+
+    def inc(self, amount: float = 1.0) -> None:
+        self.labels().inc(amount)
+
+    def _samples(self):
+        for values, child in self._children.items():
+            yield f"{self.name}{_format_labels(self.labelnames, values)} {_format_value(child.value)}"
+
+
+class Gauge(Counter):
+    metric_type = "gauge"
+
+    def dec(self, amount: float = 1.0) -> None:
+        self.labels().dec(amount)
+
+    def set(self, value: float) -> None:
+        self.labels().set(value)
+
+
+class _HistogramValue:
+    __slots__ = ("buckets", "counts", "sum")
+
+    def __init__(self, buckets: Tuple[float, ...]):
+        self.buckets = buckets
+        # One slot per bucket plus +Inf; cumulated only when scraped.
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.sum += value
+
+
+class Histogram(_Metric):
+    metric_type = "histogram"
+
+    def __init__(self, name: str, documentation: str, labelnames: Iterable[str] = (),
+                 buckets: Tuple[float, ...] = LATENCY_BUCKETS):
+        self.buckets = tuple(sorted(buckets))
+        super().__init__(name, documentation, labelnames)
+
+    def _new_child(self):
+        return _HistogramValue(self.buckets)
+
+    def observe(self, value: float) -> None:
+        self.labels().observe(value)
+
+    def _samples(self):
+        for values, child in self._children.items():
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), child.counts):
+                cumulative += count
+                le = "+Inf" if bound == float("inf") else _format_value(bound)
+                labels = _format_labels(self.labelnames, values, 'le="%s"' % le)
+                yield f"{self.name}_bucket{labels} {cumulative}"
+            labels = _format_labels(self.labelnames, values)
+            yield f"{self.name}_sum{labels} {_format_value(child.sum)}"
+            yield f"{self.name}_count{labels} {cumulative}"
+
+
+class CallbackMetric(_Metric):
+    """
+    A counter or gauge read from existing state at scrape time. `func`
+    returns `(label_values, value)` pairs.
+    """
+
+    def __init__(self, name: str, documentation: str, metric_type: str,
+                 labelnames: Iterable[str], func: Callable[[], Iterable[Tuple[tuple, float]]]):
+        self.metric_type = metric_type
+        self._func = func
+        super().__init__(name, documentation, labelnames)
+
+    def _samples(self):
+        for values, value in self._func():
+            yield f"{self.name}{_format_labels(self.labelnames, values)} {_format_value(value)}"
+
+
+def render_metrics() -> str:
+    """All registered metrics in the Prometheus text exposition format."""
+    return "\n".join(metric.render() for metric in REGISTRY) + "\n"
+
+
+HTTP_REQUESTS = Counter(
+    "http_requests_total", "HTTP requests by method, route template and status.",
+    ("method", "route", "status")
+)
+HTTP_REQUEST_SECONDS = Histogram(
+    "http_request_duration_seconds", "HTTP request latency, including streamed bodies.",
+    ("method", "route")
+)
+HTTP_IN_PROGRESS = Gauge("http_requests_in_progress", "HTTP requests being served.", ("method",))
+
+LLM_CALL_SECONDS = Histogram(
+    "llm_call_duration_seconds", "Latency of successful upstream LLM calls.", ("model", "operation")
+)
+LLM_ERRORS = Counter(
+    "llm_errors_total", "Failed upstream LLM calls and rejections by error kind.",
+    ("model", "operation", "kind")
+)
+LLM_RETRIES = Counter("llm_retries_total", "Retried upstream LLM calls.", ("model", "operation"))
+LLM_HEDGES = Counter(
+    "llm_hedged_requests_total", "Hedged LLM requests sent, and how many of them won.",
+    ("model", "operation", "outcome")
+)
+LLM_COALESCED = Counter(
+    "llm_coalesced_requests_total", "LLM requests that shared an identical in-flight call.", ("operation",)
+)
+
+DB_QUERY_SECONDS = Histogram(
+    "db_query_duration_seconds", "Database statement latency by statement type.", ("statement",)
+)
+
+_CACHES: Dict[str, Callable[[], Tuple[int, int]]] = {}
+
+
+def register_cache(name: str, hits_and_misses: Callable[[], Tuple[int, int]]) -> None:
+    """Exposes a cache's own hit/miss counters as metrics."""
+    _CACHES[name] = hits_and_misses
+
+
+def _cache_requests():
+    for name, func in _CACHES.items():
+        hits, misses = func()
+        yield (name, "hit"), hits
+        yield (name, "miss"), misses
+
+
+def _cache_hit_ratios():
+    for name, func in _CACHES.items():
+        hits, misses = func()
+        yield (name,), hits / (hits + misses) if hits + misses else 0.0
+
+
+CallbackMetric("cache_requests_total", "Cache lookups by result.", "counter", ("cache", "result"), _cache_requests)
+CallbackMetric("cache_hit_ratio", "Cache hits over all lookups.", "gauge", ("cache",), _cache_hit_ratios)
+
+RENDER_SECONDS = Histogram("export_render_duration_seconds", "Export render time.", ("format",))
+RENDER_BYTES = Histogram(
+    "export_output_bytes", "Size of rendered export files.", ("format",), buckets=SIZE_BUCKETS
+)
+
+
+_PATH_PARAM = re.compile(r"{(\w+)(?::\w+)?}")
+
+
+def _route_template(scope) -> str:
+    """
+    Full template of the matched route, e.g. `/api/v1/projects/{project_id}`.
+    Routes of included routers only carry their own part of the path, so the
+    prefix is recovered from the request path.
+    """
+    template = getattr(scope.get("route"), "path", None)
+    if template is None:
+        return "unmatched"
+    params = scope.get("path_params", {})
+    concrete = _PATH_PARAM.sub(lambda m: str(params.get(m.group(1), m.group(0))), template)
+    path = scope["path"]
+    if path.endswith(concrete):
+        return path[:len(path) - len(concrete)] + template
+    return template
+
+
+class MetricsMiddleware:
+    """
+    ASGI middleware recording per-route latency, status and in-flight count.
+    Routes are labelled by their template (`/api/v1/projects/{project_id}`)
+    so label cardinality stays bounded.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        method = scope["method"]
+        status_code = 500
+
+        async def send_with_status(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        in_progress = HTTP_IN_PROGRESS.labels(method)
+        in_progress.inc()
+        started = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            in_progress.dec()
+            route = _route_template(scope)
+            HTTP_REQUEST_SECONDS.labels(method, route).observe(time.perf_counter() - started)
+            HTTP_REQUESTS.labels(method, route, str(status_code)).inc()
+
+
+_STATEMENT_TYPES = {"SELECT", "INSERT", "UPDATE", "DELETE", "WITH", "PRAGMA", "BEGIN", "COMMIT", "ROLLBACK"}
+
+
+def _statement_type(statement: str) -> str:
+    words = statement.lstrip().split(None, 1)
+    keyword = words[0].upper() if words else ""
+    return keyword if keyword in _STATEMENT_TYPES else "OTHER"
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info["metrics_query_started"] = time.perf_counter()
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    started = conn.info.pop("metrics_query_started", None)
+    if started is not None:
+        DB_QUERY_SECONDS.labels(_statement_type(statement)).observe(time.perf_counter() - started)
+
+
+def instrument_engine(engine) -> None:
+    """Times every statement run through an (async) engine."""
+    sync_engine = getattr(engine, "sync_engine", engine)
+    event.listen(sync_engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(sync_engine, "after_cursor_execute", _after_cursor_execute)
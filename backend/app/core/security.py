@@ -1,20 +1,91 @@
 
+import asyncio
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
 from datetime import datetime, timedelta
-from typing import Optional
-from passlib.context import CryptContext
-from jose import JWTError, jwt
-from passlib.context import CryptContext
+from typing import Optional, Tuple
 from .config import settings 
 
-pwd_context = CryptContext(schemes=["argon2"], deprecated="auto")
+# passlib and jose are imported on first use (or by `warm_up`) to keep
+# startup fast; hashing usually runs in pool processes that import them anyway.
+_pwd_context = None
+
+def get_pwd_context():
+    global _pwd_context
+    if _pwd_context is None:
+        from passlib.context import CryptContext
+        _pwd_context = CryptContext(
+            schemes=["argon2"],
+            deprecated="auto",
+            argon2__time_cost=settings.ARGON2_TIME_COST,
+            argon2__memory_cost=settings.ARGON2_MEMORY_COST,
+            argon2__parallelism=settings.ARGON2_PARALLELISM,
+        )
+    return _pwd_context
 
 def verify_password(plain_password: str, hashed_password: str) -> bool:
-    return pwd_context.verify(plain_password, hashed_password)
+    return get_pwd_context().verify(plain_password, hashed_password)
+
+def verify_and_update_password(plain_password: str, hashed_password: str) -> Tuple[bool, Optional[str]]:
+    """Returns (valid, new_hash); new_hash is set when the stored hash uses outdated parameters."""
+    return get_pwd_context().verify_and_update(plain_password, hashed_password)
 
 def get_password_hash(password: str) -> str:
-    return pwd_context.hash(password)
+    return get_pwd_context().hash(password)
+
+def warm_up() -> None:
+    """Loads passlib, the argon2 backend and jose ahead of the first login. Blocking."""
+    get_pwd_context().hash("warm-up")
+    import jose.jwt  # noqa: F401
+
+
+class PasswordHashingBusy(Exception):
+    """Raised when too many hashing jobs are already waiting for the pool."""
+
+
+_hash_executor: Optional[Executor] = None
+_hash_pending = 0
+
+def _get_hash_executor() -> Executor:
+    global _hash_executor
+    if _hash_executor is None:
+        if settings.PASSWORD_HASH_EXECUTOR == "process":
+            _hash_executor = ProcessPoolExecutor(max_workers=settings.PASSWORD_HASH_WORKERS)
+        else:
+            _hash_executor = ThreadPoolExecutor(
+                max_workers=settings.PASSWORD_HASH_WORKERS, thread_name_prefix="password-hash"
+            )
+    return _hash_executor
+
+async def _run_hashing(func, *args):
+    """
+    Runs an argon2 call on the dedicated pool so it never blocks the event
+    loop. Fails fast once the pool and its queue are full.
+    """
+    global _hash_pending
+    if _hash_pending >= settings.PASSWORD_HASH_WORKERS + settings.PASSWORD_HASH_MAX_QUEUE:
+        raise PasswordHashingBusy()
+    _hash_pending += 1
+    try:
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(_get_hash_executor(), func, *args)
+    finally:
+        _hash_pending -= 1
+
+async def get_password_hash_async(password: str) -> str:
+    return await _run_hashing(get_password_hash, password)
+
+async def verify_and_update_password_async(plain_password: str, hashed_password: str) -> Tuple[bool, Optional[str]]:
+    return await _run_hashing(verify_and_update_password, plain_password, hashed_password)
+
+def shutdown_hash_executor():
+    global _hash_executor
+    if _hash_executor is not None:
+        _hash_executor.shutdown(wait=False, cancel_futures=True)
+        _hash_executor = None
+
 
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
+    from jose import jwt
     to_encode = data.copy()
     if expires_delta:
         expire = datetime.utcnow() + expires_delta
@@ -23,4 +94,12 @@ def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
     
     to_encode.update({"exp": expire})
     encoded_jwt = jwt.encode(to_encode, settings.SECRET_KEY, algorithm=settings.ALGORITHM)
-    return encoded_jwt
\ No newline at end of file
+    return encoded_jwt
+
+def decode_access_token(token: str) -> Optional[dict]:
+    """The token's claims, or None if it is malformed, forged or expired."""
+    from jose import JWTError, jwt
+    try:
+        return jwt.decode(token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM])
+    except JWTError:
+        return None
@@ -0,0 +1,87 @@
+
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Dict, Optional, Set
+from sqlalchemy import event
+from .config import settings
+from ..models.user import User
+
+
+@dataclass(frozen=True)
+class CurrentUser:
+    """Identity of the authenticated user, detached from any DB session."""
+    id: int
+    email: str
+
+
+class UserCache:
+    """
+    Bounded LRU of access token -> CurrentUser. An entry never outlives the
+    token's own `exp`, and all entries of a user can be dropped at once.
+    """
+
+    def __init__(self, max_entries: int, ttl_seconds: int):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()
+        self._tokens_by_user: Dict[int, Set[str]] = {}
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, token: str) -> Optional[CurrentUser]:
+        entry = self._entries.get(token)
+        if entry is None:
+            self.misses += 1
+            return None
+        user, expires_at = entry
+        if expires_at <= time.time():
+            self._remove(token)
+            self.misses += 1
+            return None
+        self._entries.move_to_end(token)
+        self.hits += 1
+        return user
+
+    def set(self, token: str, user: CurrentUser, token_expires_at: Optional[float]) -> None:
+        if self.max_entries <= 0:
+            return
+        expires_at = time.time() + self.ttl_seconds
+        if token_expires_at is not None:
+            expires_at = min(expires_at, token_expires_at)
+        self._entries[token] = (user, expires_at)
+        self._entries.move_to_end(token)
+        self._tokens_by_user.setdefault(user.id, set()).add(token)
+        while len(self._entries) > self.max_entries:
+            oldest = next(iter(self._entries))
+            self._remove(oldest)
+
+    def invalidate_user(self, user_id: int) -> None:
+        for token in self._tokens_by_user.pop(user_id, set()):
+            self._entries.pop(token, None)
+
+    def clear(self) -> None:
+        self._entries.clear()
+        self._tokens_by_user.clear()
+
+    def _remove(self, token: str) -> None:
+        entry = self._entries.pop(token, None)
+        if entry is None:
+            return
+        tokens = self._tokens_by_user.get(entry[0].id)
+        if tokens is not None:
+            tokens.discard(token)
+            if not tokens:
+                del self._tokens_by_user[entry[0].id]
+
+
+user_cache = UserCache(
+    max_entries=settings.USER_CACHE_MAX_ENTRIES,
+    ttl_seconds=settings.USER_CACHE_TTL_SECONDS,
+)
+
+
+@event.listens_for(User, "after_update")
+@event.listens_for(User, "after_delete")
+def _invalidate_changed_user(mapper, connection, target):
+    user_cache.invalidate_user(target.id)
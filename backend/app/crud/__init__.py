@@ -1,4 +1,8 @@
 
 
 from .crud_user import create_user, get_user_by_email, authenticate_user
-from .crud_project import create_project, get_projects_by_owner
\ No newline at end of file
+from .crud_project import create_project, get_projects_by_owner
+from .crud_job import create_generation_job, get_generation_job
+from .crud_history import add_history_entry, get_history_content
+from .crud_section import project_has_sections, update_sections_batch
+from .crud_usage import add_token_usage, get_daily_usage, get_usage_breakdown
@@ -0,0 +1,83 @@
+
+
+from sqlalchemy import and_
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.future import select
+from typing import Optional
+from ..core.config import settings
+from ..models.refinement_history import RefinementHistory
+from ..services.history_codec import DELTA, decode_version, encode_version
+
+async def get_history_content(db: AsyncSession, section_id: int, history_id: int) -> Optional[str]:
+    """
+    Reconstructs the content stored by one history entry. Follows the
+    entry's chain of delta bases back to a snapshot (or legacy plain-text
+    row) in one recursive query, so the cost is bounded by
+    HISTORY_SNAPSHOT_INTERVAL.
+    """
+    columns = (
+        RefinementHistory.id,
+        RefinementHistory.base_id,
+        RefinementHistory.encoding,
+        RefinementHistory.payload,
+        RefinementHistory.previous_content,
+    )
+    chain = (
+        select(*columns)
+        .where(RefinementHistory.section_id == section_id, RefinementHistory.id == history_id)
+        .cte("chain", recursive=True)
+    )
+    chain = chain.union_all(
+        select(*columns).join(
+            chain,
+            and_(RefinementHistory.id == chain.c.base_id, chain.c.encoding == DELTA)
+        )
+    )
+    result = await db.execute(select(chain).order_by(chain.c.id))
+    rows = result.all()
+    if not rows or rows[-1].id != history_id:
+        return None
+
+    content = None
+    for row in rows:
+        content = decode_version(row.encoding, row.payload, row.previous_content, content)
+    return content
+
+
+async def add_history_entry(
+    db: AsyncSession,
+    section_id: int,
+    prompt: str,
+    previous_content: Optional[str]
+) -> RefinementHistory:
+    """Adds (without committing) a history entry stored as a snapshot or delta."""
+    result = await db.execute(
+        select(RefinementHistory.id, RefinementHistory.depth)
+        .where(RefinementHistory.section_id == section_id)
+        .order_by(RefinementHistory.id.desc())
+        .limit(1)
+    )
+    last = result.first()
+
+    base_content, base_depth = None, None
+    if last is not None and last.depth is not None:
+        base_content = await get_history_content(db, section_id, last.id)
+        base_depth = last.depth
+
+    encoding, payload, depth = encode_version(
+        previous_content or "",
+        base_content,
+        base_depth,
+        settings.HISTORY_SNAPSHOT_INTERVAL
+    )
+    history_entry = RefinementHistory(
+        prompt=prompt,
+        previous_content="",
+        encoding=encoding,
+        payload=payload,
+        depth=depth,
+        base_id=last.id if encoding == DELTA else None,
+        section_id=section_id
+    )
+    db.add(history_entry)
+    return history_entry
@@ -0,0 +1,30 @@
+
+
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import List
+from ..models.generation_job import GenerationJob
+
+async def create_generation_job(
+    db: AsyncSession,
+    project_id: int,
+    owner_id: int,
+    main_topic: str,
+    section_titles: List[str]
+) -> GenerationJob:
+    db_job = GenerationJob(
+        project_id=project_id,
+        owner_id=owner_id,
+        status="queued",
+        main_topic=main_topic,
+    )
+    db_job.set_sections([{"title": title, "content": None} for title in section_titles])
+
+    db.add(db_job)
+    await db.commit()
+    await db.refresh(db_job)
+
+    return db_job
+
+
+async def get_generation_job(db: AsyncSession, job_id: int):
+    return await db.get(GenerationJob, job_id)
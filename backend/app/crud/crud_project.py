@@ -2,8 +2,11 @@
 
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.future import select
+from sqlalchemy.orm import load_only
+from typing import Optional
 from ..models.project import Project
 from ..schemas.project import ProjectCreate
+from ..services import search_index
 
 async def create_project(db: AsyncSession, project: ProjectCreate, owner_id: int) -> Project:
     
@@ -15,15 +18,37 @@ async def create_project(db: AsyncSession, project: ProjectCreate, owner_id: int
         db_project.set_sections(sections_list)
 
     db.add(db_project)
+    await db.flush()
+    await search_index.index_project(db, db_project)
     await db.commit()
     await db.refresh(db_project)
     
     return db_project
 
 
-async def get_projects_by_owner(db: AsyncSession, owner_id: int) -> list[Project]:
-
-    result = await db.execute(
-        select(Project).filter(Project.owner_id == owner_id).order_by(Project.id.desc())
+async def get_projects_by_owner(
+    db: AsyncSession,
+    owner_id: int,
+    limit: Optional[int] = None,
+    before_id: Optional[int] = None
+) -> list[Project]:
+    """
+    Newest projects first. Pass the last id of a page as `before_id` to get
+    the next one (keyset pagination). The `sections` JSON blob is not loaded.
+    """
+    query = (
+        select(Project)
+        .options(load_only(
+            Project.id, Project.title, Project.document_type, Project.owner_id,
+            Project.main_topic, Project.tone, Project.target_audience
+        ))
+        .filter(Project.owner_id == owner_id)
+        .order_by(Project.id.desc())
     )
+    if before_id is not None:
+        query = query.filter(Project.id < before_id)
+    if limit is not None:
+        query = query.limit(limit)
+
+    result = await db.execute(query)
     return result.scalars().all()
\ No newline at end of file
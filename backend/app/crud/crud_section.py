@@ -0,0 +1,84 @@
+
+from sqlalchemy import update
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.future import select
+from typing import Dict, List, Tuple
+from ..models.document_section import DocumentSection
+from ..models.project import Project
+from ..schemas.generation import SectionBatchItem
+from ..services import search_index
+from ..services.project_cache import bump_project_version
+
+def _section_values(item: SectionBatchItem) -> dict:
+    values = {}
+    # `user_notes` is the editor's older name for `comment`, as in PATCH.
+    if item.user_notes is not None:
+        values["comment"] = item.user_notes
+    for field in ("comment", "feedback", "section_order", "content"):
+        value = getattr(item, field)
+        if value is not None:
+            values[field] = value
+    return values
+
+async def project_has_sections(db: AsyncSession, project_id: int) -> bool:
+    result = await db.execute(
+        select(DocumentSection.id).where(DocumentSection.project_id == project_id).limit(1)
+    )
+    return result.first() is not None
+
+async def update_sections_batch(
+    db: AsyncSession, owner_id: int, items: List[SectionBatchItem]
+) -> Tuple[List[DocumentSection], List[dict]]:
+    """
+    Applies partial updates to several sections in one transaction. Ownership
+    of every section is checked with a single query; items that fail it (or
+    are duplicated, or change nothing) are reported in the returned errors and
+    skipped, while the rest are written with one executemany UPDATE per set of
+    changed columns. Returns the updated rows and the per-item errors.
+    """
+    errors = []
+    requested: Dict[int, dict] = {}
+    for item in items:
+        if item.id in requested:
+            errors.append({"id": item.id, "detail": "Duplicate section id in batch"})
+            continue
+        values = _section_values(item)
+        if not values:
+            errors.append({"id": item.id, "detail": "No fields to update"})
+            continue
+        requested[item.id] = values
+
+    if not requested:
+        return [], errors
+
+    result = await db.execute(
+        select(DocumentSection.id, DocumentSection.project_id)
+        .join(Project, Project.id == DocumentSection.project_id)
+        .where(DocumentSection.id.in_(requested), Project.owner_id == owner_id)
+    )
+    owned = dict(result.all())
+    for section_id in requested:
+        if section_id not in owned:
+            errors.append({"id": section_id, "detail": "Section not found"})
+
+    rows = [{"id": section_id, **values} for section_id, values in requested.items() if section_id in owned]
+    if not rows:
+        return [], errors
+
+    # Bulk UPDATE by primary key: rows sharing the same set of columns are sent
+    # as one executemany statement.
+    await db.execute(update(DocumentSection), rows)
+    edited = [row["id"] for row in rows if "content" in row]
+    if edited:
+        result = await db.execute(select(DocumentSection).where(DocumentSection.id.in_(edited)))
+        await search_index.index_sections(db, result.scalars().all())
+    for project_id in {owned[row["id"]] for row in rows}:
+        await bump_project_version(db, project_id)
+    await db.commit()
+
+    result = await db.execute(
+        select(DocumentSection)
+        .where(DocumentSection.id.in_([row["id"] for row in rows]))
+        .order_by(DocumentSection.project_id, DocumentSection.section_order)
+    )
+    return result.scalars().all(), errors
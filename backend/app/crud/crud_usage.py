@@ -0,0 +1,62 @@
+
+from datetime import date
+from sqlalchemy import func
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.future import select
+from typing import List, Optional, Tuple
+from ..models.token_usage import TokenUsage
+from ..models.user import User
+
+async def add_token_usage(db: AsyncSession, rows: List[dict]) -> None:
+    """
+    Adds a batch of aggregated usage rows in one statement, summing into the
+    existing (user, day, operation, model) rows. Commits.
+    """
+    dialect = db.bind.dialect.name
+    if dialect in ("sqlite", "postgresql"):
+        insert = sqlite.insert if dialect == "sqlite" else postgresql.insert
+        stmt = insert(TokenUsage).values(rows)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=["user_id", "day", "operation", "model"],
+            set_={
+                "calls": TokenUsage.calls + stmt.excluded.calls,
+                "prompt_tokens": TokenUsage.prompt_tokens + stmt.excluded.prompt_tokens,
+                "output_tokens": TokenUsage.output_tokens + stmt.excluded.output_tokens,
+                "updated_at": func.now(),
+            }
+        )
+        await db.execute(stmt)
+    else:
+        for row in rows:
+            result = await db.execute(select(TokenUsage).where(
+                TokenUsage.user_id == row["user_id"],
+                TokenUsage.day == row["day"],
+                TokenUsage.operation == row["operation"],
+                TokenUsage.model == row["model"]
+            ))
+            usage = result.scalars().first()
+            if usage is None:
+                db.add(TokenUsage(**row))
+                continue
+            usage.calls += row["calls"]
+            usage.prompt_tokens += row["prompt_tokens"]
+            usage.output_tokens += row["output_tokens"]
+    await db.commit()
+
+async def get_daily_usage(db: AsyncSession, user_id: int, day: date) -> Tuple[int, Optional[int]]:
+    """Tokens recorded for a user on a day, and the user's quota override."""
+    used = await db.execute(
+        select(func.coalesce(func.sum(TokenUsage.prompt_tokens + TokenUsage.output_tokens), 0))
+        .where(TokenUsage.user_id == user_id, TokenUsage.day == day)
+    )
+    quota = await db.execute(select(User.daily_token_quota).where(User.id == user_id))
+    return used.scalar_one(), quota.scalar_one_or_none()
+
+async def get_usage_breakdown(db: AsyncSession, user_id: int, day: date) -> List[TokenUsage]:
+    result = await db.execute(
+        select(TokenUsage)
+        .where(TokenUsage.user_id == user_id, TokenUsage.day == day)
+        .order_by(TokenUsage.operation, TokenUsage.model)
+    )
+    return result.scalars().all()
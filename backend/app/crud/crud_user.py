@@ -4,14 +4,14 @@ from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.future import select
 from ..models.user import User
 from ..schemas.user import UserCreate
-from ..core.security import get_password_hash, verify_password
+from ..core.security import get_password_hash_async, verify_and_update_password_async
 
 async def get_user_by_email(db: AsyncSession, email: str):
     result = await db.execute(select(User).filter(User.email == email))
     return result.scalars().first()
 
 async def create_user(db: AsyncSession, user: UserCreate):
-    hashed_password = get_password_hash(user.password)
+    hashed_password = await get_password_hash_async(user.password)
     db_user = User(email=user.email, hashed_password=hashed_password)
     db.add(db_user)
     await db.commit()
@@ -22,6 +22,12 @@ async def authenticate_user(db: AsyncSession, email: str, password: str):
     user = await get_user_by_email(db, email=email)
     if not user:
         return None
-    if not verify_password(password, user.hashed_password):
+    valid, new_hash = await verify_and_update_password_async(password, user.hashed_password)
+    if not valid:
         return None
+    if new_hash:
+        # Argon2 parameters changed since this hash was made; upgrade it transparently.
+        user.hashed_password = new_hash
+        await db.commit()
+        await db.refresh(user)
     return user
\ No newline at end of file
@@ -1,13 +1,59 @@
 
-from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession
+from sqlalchemy import event
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import AsyncEngine, create_async_engine, AsyncSession
 from sqlalchemy.orm import sessionmaker
-from .models.user import Base 
+from typing import Optional
+from .core.config import settings
+from .core.metrics import instrument_engine
+from .migrations import run_migrations
 
-DATABASE_URL = "sqlite+aiosqlite:///./test.db"
+DATABASE_URL = settings.DATABASE_URL
 
-engine = create_async_engine(DATABASE_URL, echo=True)
+
+def _apply_sqlite_pragmas(dbapi_connection, connection_record):
+    # WAL lets readers proceed while a writer commits; NORMAL sync is safe in WAL mode.
+    cursor = dbapi_connection.cursor()
+    cursor.execute("PRAGMA journal_mode=WAL")
+    cursor.execute("PRAGMA synchronous=NORMAL")
+    cursor.execute(f"PRAGMA busy_timeout={int(settings.SQLITE_BUSY_TIMEOUT_MS)}")
+    cursor.execute(f"PRAGMA mmap_size={int(settings.SQLITE_MMAP_SIZE)}")
+    cursor.close()
+
+
+def create_engine_from_settings(url: Optional[str] = None, echo: Optional[bool] = None) -> AsyncEngine:
+    """
+    Builds the async engine from settings. Server databases get a sized
+    connection pool; file-based SQLite gets WAL and related pragmas on
+    every new connection.
+    """
+    url = make_url(url or settings.DATABASE_URL)
+    kwargs = {
+        "echo": settings.DB_ECHO if echo is None else echo,
+        "pool_pre_ping": True,
+    }
+
+    is_sqlite = url.get_backend_name() == "sqlite"
+    is_memory = is_sqlite and url.database in (None, "", ":memory:")
+    if not is_memory:
+        kwargs.update(
+            pool_size=settings.DB_POOL_SIZE,
+            max_overflow=settings.DB_MAX_OVERFLOW,
+            pool_timeout=settings.DB_POOL_TIMEOUT,
+            pool_recycle=settings.DB_POOL_RECYCLE,
+        )
+    if is_sqlite:
+        kwargs["connect_args"] = {"timeout": settings.SQLITE_BUSY_TIMEOUT_MS / 1000}
+
+    db_engine = create_async_engine(url, **kwargs)
+    if is_sqlite and not is_memory:
+        event.listen(db_engine.sync_engine, "connect", _apply_sqlite_pragmas)
+    instrument_engine(db_engine)
+    return db_engine
+
+
+engine = create_engine_from_settings()
 AsyncSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine, class_=AsyncSession)
 
 async def init_db():
-    async with engine.begin() as conn:
-        await conn.run_sync(Base.metadata.create_all)
\ No newline at end of file
+    await run_migrations(engine)
@@ -1,10 +1,25 @@
 # backend/app/main.py - FINAL CORRECTED VERSION
 
+import asyncio
+import traceback
+
 from fastapi import FastAPI
+from fastapi.responses import PlainTextResponse
 from fastapi.middleware.cors import CORSMiddleware
-from .api.v1.endpoints import auth, projects, sections
+from .api.v1.endpoints import auth, projects, sections, jobs, usage, search, stats
 from .db import init_db
 from .core.config import settings  
+from .core.metrics import MetricsMiddleware, register_cache, render_metrics
+from .core import security
+from .core.security import shutdown_hash_executor
+from .core.user_cache import user_cache
+from .services import document_service, llm_service
+from .services.llm_cache import llm_cache
+from .services.export_cache import export_cache
+from .services.project_cache import project_cache
+from .services.job_queue import job_queue
+from .services.render_service import render_pool
+from .services.usage_tracker import usage_tracker
 
 if not settings.GEMINI_API_KEY:
     raise ValueError(
@@ -15,9 +30,32 @@ if not settings.GEMINI_API_KEY:
 
 app = FastAPI(title="AI Document Authoring Platform API")
 
+def _warm_up():
+    """Loads the lazily imported dependencies so first requests don't pay for it."""
+    try:
+        llm_service.warm_up()
+        security.warm_up()
+        document_service.warm_up()
+    except Exception:
+        print("--- STARTUP WARM-UP FAILED ---")
+        traceback.print_exc()
+
 @app.on_event("startup")
 async def on_startup():
     await init_db()
+    usage_tracker.start()
+    job_queue.start(settings.JOB_WORKERS)
+    print("🔥 USING MODEL:", llm_service.client.model_name)
+    if settings.STARTUP_WARMUP:
+        # Not awaited: startup completes and requests are served meanwhile.
+        app.state.warm_up = asyncio.get_running_loop().run_in_executor(None, _warm_up)
+
+@app.on_event("shutdown")
+async def on_shutdown():
+    await job_queue.stop()
+    await usage_tracker.stop()
+    shutdown_hash_executor()
+    render_pool.shutdown()
 
 origins = [
     # "http://localhost:3000",
@@ -31,11 +69,26 @@ app.add_middleware(
     allow_methods=["*"],
     allow_headers=["*"],
 )
+# Outermost, so latency covers the whole stack including CORS handling.
+app.add_middleware(MetricsMiddleware)
+
+register_cache("llm", lambda: (llm_cache.memory_hits + llm_cache.disk_hits, llm_cache.misses))
+register_cache("export", lambda: (export_cache.hits, export_cache.misses))
+register_cache("user", lambda: (user_cache.hits, user_cache.misses))
+register_cache("project", lambda: (project_cache.hits, project_cache.misses))
 
 app.include_router(auth.router, prefix="/api/v1/auth", tags=["Auth"])
 app.include_router(projects.router, prefix="/api/v1/projects", tags=["Projects"])
 app.include_router(sections.router, prefix="/api/v1/sections", tags=["Sections"])
+app.include_router(jobs.router, prefix="/api/v1/jobs", tags=["Jobs"])
+app.include_router(usage.router, prefix="/api/v1/usage", tags=["Usage"])
+app.include_router(search.router, prefix="/api/v1/search", tags=["Search"])
+app.include_router(stats.router, prefix="/api/v1/stats", tags=["Stats"])
 
 @app.get("/")
 def read_root():
-    return {"message": "Welcome to the AI Document Authoring Platform!"}
\ No newline at end of file
+    return {"message": "Welcome to the AI Document Authoring Platform!"}
+
+@app.get("/metrics", include_in_schema=False)
+def read_metrics():
+    return PlainTextResponse(render_metrics(), media_type="text/plain; version=0.0.4")
\ No newline at end of file
@@ -0,0 +1,226 @@
+# Versioned schema migrations: `python -m app.migrations` upgrades the
+# configured database and prints the resulting version.
+#
+# Fresh databases get the current schema from the models and are stamped
+# with the latest version. Existing databases run every migration newer
+# than their recorded version, in order, each in the same transaction as
+# its version bump. Migrations must be safe to run on a schema that
+# already has the change (use checkfirst / IF NOT EXISTS).
+
+from dataclasses import dataclass
+from typing import Callable, List
+
+from itertools import groupby
+
+from sqlalchemy import Column, DateTime, Integer, MetaData, String, Table, inspect, select, text, update
+from sqlalchemy.engine import Connection
+from sqlalchemy.sql import func
+
+from .core.config import settings
+from .models.user import Base
+from .models.refinement_history import RefinementHistory
+from .models.document_section import DocumentSection
+from .models.project import Project
+from .services.history_codec import DELTA, encode_version
+from .services.search_index import create_search_index, rebuild_search_index
+from .services.section_keys import generation_key
+# Register every table with the metadata.
+from .models import user, project, document_section, refinement_history, generation_job, token_usage  # noqa: F401
+
+
+@dataclass(frozen=True)
+class Migration:
+    version: int
+    description: str
+    upgrade: Callable[[Connection], None]
+
+
+_version_metadata = MetaData()
+schema_migrations = Table(
+    "schema_migrations",
+    _version_metadata,
+    Column("version", Integer, primary_key=True),
+    Column("description", String, nullable=False),
+    Column("applied_at", DateTime(timezone=True), server_default=func.now()),
+)
+
+
+def _create_model_indexes(*index_names: str) -> Callable[[Connection], None]:
+    """Creates indexes declared on the models, if they don't exist yet."""
+    def upgrade(conn: Connection) -> None:
+        for table in Base.metadata.sorted_tables:
+            for index in table.indexes:
+                if index.name in index_names:
+                    index.create(conn, checkfirst=True)
+    return upgrade
+
+
+def _add_model_columns(table_name: str, *column_names: str) -> Callable[[Connection], None]:
+    """Adds nullable columns declared on the models, if they don't exist yet."""
+    def upgrade(conn: Connection) -> None:
+        table = Base.metadata.tables[table_name]
+        existing = {column["name"] for column in inspect(conn).get_columns(table_name)}
+        for name in column_names:
+            if name in existing:
+                continue
+            column_type = table.c[name].type.compile(dialect=conn.dialect)
+            conn.execute(text(f"ALTER TABLE {table_name} ADD COLUMN {name} {column_type}"))
+    return upgrade
+
+
+def _encode_refinement_history(conn: Connection) -> None:
+    """Rewrites plain-text history rows as snapshot/delta chains per section."""
+    _add_model_columns("refinement_history", "encoding", "payload", "depth")(conn)
+
+    table = RefinementHistory.__table__
+    rows = conn.execute(
+        select(table.c.id, table.c.section_id, table.c.previous_content)
+        .where(table.c.encoding.is_(None))
+        .order_by(table.c.section_id, table.c.id)
+    ).all()
+    for _, section_rows in groupby(rows, key=lambda row: row.section_id):
+        previous, previous_depth = None, None
+        for row in section_rows:
+            content = row.previous_content or ""
+            encoding, payload, depth = encode_version(
+                content, previous, previous_depth, settings.HISTORY_SNAPSHOT_INTERVAL
+            )
+            conn.execute(
+                update(table)
+                .where(table.c.id == row.id)
+                .values(encoding=encoding, payload=payload, depth=depth, previous_content="")
+            )
+            previous, previous_depth = content, depth
+
+
+def _add_generation_keys(conn: Connection) -> None:
+    """Keys existing sections by their project's current topic so they can be reused."""
+    _add_model_columns("document_sections", "generation_key")(conn)
+
+    sections, projects = DocumentSection.__table__, Project.__table__
+    rows = conn.execute(
+        select(sections.c.id, sections.c.title, sections.c.content, projects.c.main_topic)
+        .join(projects, projects.c.id == sections.c.project_id)
+        .where(sections.c.generation_key.is_(None), projects.c.main_topic.is_not(None))
+    ).all()
+    for row in rows:
+        key = generation_key(row.main_topic, row.title, row.content)
+        if key is not None:
+            conn.execute(update(sections).where(sections.c.id == row.id).values(generation_key=key))
+
+
+def _add_history_base_ids(conn: Connection) -> None:
+    """Deltas written so far were encoded against the section's previous row."""
+    _add_model_columns("refinement_history", "base_id")(conn)
+
+    table = RefinementHistory.__table__
+    rows = conn.execute(
+        select(table.c.id, table.c.section_id, table.c.encoding, table.c.base_id)
+        .order_by(table.c.section_id, table.c.id)
+    ).all()
+    for _, section_rows in groupby(rows, key=lambda row: row.section_id):
+        previous_id = None
+        for row in section_rows:
+            if row.encoding == DELTA and row.base_id is None and previous_id is not None:
+                conn.execute(update(table).where(table.c.id == row.id).values(base_id=previous_id))
+            previous_id = row.id
+
+
+def _add_project_versions(conn: Connection) -> None:
+    _add_model_columns("projects", "version")(conn)
+    projects = Project.__table__
+    conn.execute(update(projects).where(projects.c.version.is_(None)).values(version=1))
+
+
+MIGRATIONS: List[Migration] = [
+    Migration(
+        1,
+        "Composite indexes for section, history and project listing queries",
+        _create_model_indexes(
+            "ix_document_sections_project_id_section_order",
+            "ix_refinement_history_section_id_created_at",
+            "ix_projects_owner_id_id",
+        ),
+    ),
+    Migration(
+        2,
+        "Store refinement history as compressed snapshots and deltas",
+        _encode_refinement_history,
+    ),
+    Migration(
+        3,
+        "Token usage accounting and per-user daily quotas",
+        _add_model_columns("users", "daily_token_quota"),
+    ),
+    Migration(
+        4,
+        "Generation keys for incremental regeneration",
+        _add_generation_keys,
+    ),
+    Migration(
+        5,
+        "Full-text search index over projects and sections",
+        rebuild_search_index,
+    ),
+    Migration(
+        6,
+        "Project versions for conditional project reads",
+        _add_project_versions,
+    ),
+    Migration(
+        7,
+        "Record the base version of each refinement history delta",
+        _add_history_base_ids,
+    ),
+    Migration(
+        8,
+        "Lease tokens for generation jobs",
+        _add_model_columns("generation_jobs", "lease_token"),
+    ),
+]
+
+
+def current_version(conn: Connection) -> int:
+    if not inspect(conn).has_table("schema_migrations"):
+        return 0
+    versions = conn.execute(select(schema_migrations.c.version)).scalars().all()
+    return max(versions, default=0)
+
+
+def upgrade(conn: Connection) -> int:
+    """Brings the schema up to date and returns the resulting version."""
+    app_tables = {table.name for table in Base.metadata.sorted_tables}
+    is_fresh = not app_tables & set(inspect(conn).get_table_names())
+
+    _version_metadata.create_all(conn)
+    version = current_version(conn)
+
+    # Creates tables that don't exist yet; it never alters existing ones.
+    Base.metadata.create_all(conn)
+    # The search table isn't a model (FTS5 / tsvector), so it's created here.
+    create_search_index(conn)
+
+    for migration in MIGRATIONS:
+        if migration.version <= version:
+            continue
+        if not is_fresh:
+            migration.upgrade(conn)
+        conn.execute(
+            schema_migrations.insert().values(
+                version=migration.version, description=migration.description
+            )
+        )
+        version = migration.version
+    return version
+
+
+async def run_migrations(engine) -> int:
+    async with engine.begin() as conn:
+        return await conn.run_sync(upgrade)
+
+
+if __name__ == "__main__":
+    import asyncio
+    from .db import engine
+
+    print(f"Database schema is at version {asyncio.run(run_migrations(engine))}.")
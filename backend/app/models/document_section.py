@@ -1,18 +1,25 @@
 
-from sqlalchemy import Column, Integer, String, Text, ForeignKey
+from sqlalchemy import Column, Integer, String, ForeignKey, Index
 from sqlalchemy.orm import relationship
 from .user import Base
+from .types import CompressedText
 
 class DocumentSection(Base):
     __tablename__ = "document_sections"
+    __table_args__ = (
+        Index("ix_document_sections_project_id_section_order", "project_id", "section_order"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     title = Column(String, nullable=False)
-    content = Column(Text, nullable=True)
+    content = Column(CompressedText, nullable=True)
     section_order = Column(Integer, nullable=False)
     project_id = Column(Integer, ForeignKey("projects.id"), nullable=False)
-    comment = Column(Text, nullable=True)
+    comment = Column(CompressedText, nullable=True)
     feedback = Column(String, nullable=True)
+    # Key of the (main topic, title) the content was generated for; null when
+    # generation failed. Incremental regeneration reuses sections by this key.
+    generation_key = Column(String, nullable=True)
 
     project = relationship("Project")
     
@@ -0,0 +1,37 @@
+
+from sqlalchemy import Column, Integer, String, Text, ForeignKey, DateTime
+from sqlalchemy.sql import func
+from .user import Base
+import json
+from typing import List
+
+class GenerationJob(Base):
+    __tablename__ = "generation_jobs"
+
+    id = Column(Integer, primary_key=True, index=True)
+    project_id = Column(Integer, ForeignKey("projects.id"), nullable=False)
+    owner_id = Column(Integer, ForeignKey("users.id"), nullable=False)
+    status = Column(String, nullable=False, default="queued", index=True)
+    main_topic = Column(Text, nullable=False)
+    # JSON list of {"title": ..., "content": ...}; content stays null until generated.
+    sections = Column(Text, nullable=False)
+    error = Column(Text, nullable=True)
+    attempts = Column(Integer, nullable=False, default=0)
+    lease_expires_at = Column(DateTime, nullable=True)
+    # Set when a worker claims the job; its writes only apply while it still holds it.
+    lease_token = Column(String, nullable=True)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
+
+    def set_sections(self, sections_list: List[dict]):
+        """Converts the per-section progress list to a JSON string before saving."""
+        self.sections = json.dumps(sections_list)
+
+    def get_sections(self) -> List[dict]:
+        """Converts the JSON string from the DB back into a Python list."""
+        if self.sections:
+            try:
+                return json.loads(self.sections)
+            except (json.JSONDecodeError, TypeError):
+                return []
+        return []
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, ForeignKey, Text
+from sqlalchemy import Column, Integer, String, ForeignKey, Text, Index
 from sqlalchemy.orm import relationship
 from .user import Base
 import json
@@ -6,6 +6,9 @@ from typing import List
 
 class Project(Base):
     __tablename__ = "projects"
+    __table_args__ = (
+        Index("ix_projects_owner_id_id", "owner_id", "id"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     title = Column(String, index=True, nullable=False)
@@ -16,9 +19,18 @@ class Project(Base):
     tone = Column(String, nullable=True)
     target_audience = Column(String, nullable=True)
     sections = Column(Text, nullable=True)
-    
+    # Bumped on every write to the project or its sections; backs the ETag of
+    # the project detail response.
+    version = Column(Integer, nullable=False, default=1)
 
     owner = relationship("User")
+    # Read-only; sections are written through DocumentSection directly.
+    document_sections = relationship(
+        "DocumentSection",
+        viewonly=True,
+        order_by="DocumentSection.section_order"
+    )
+
     def set_sections(self, sections_list: List[str]):
         """Converts a Python list to a JSON string before saving."""
         self.sections = json.dumps(sections_list)
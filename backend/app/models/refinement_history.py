@@ -1,15 +1,28 @@
 
-from sqlalchemy import Column, Integer, String, Text, ForeignKey, DateTime
+from sqlalchemy import Column, Integer, String, Text, ForeignKey, DateTime, Index, LargeBinary
 from sqlalchemy.sql import func
 from sqlalchemy.orm import relationship
 from .user import Base
+from .types import CompressedText
 
 class RefinementHistory(Base):
     __tablename__ = "refinement_history"
+    __table_args__ = (
+        Index("ix_refinement_history_section_id_created_at", "section_id", "created_at"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     prompt = Column(Text, nullable=False)
-    previous_content = Column(Text, nullable=False)
+    # Legacy rows keep plain text here. Encoded rows leave it empty and store a
+    # zlib "snapshot" or a "delta" against the previous version in `payload`.
+    previous_content = Column(CompressedText, nullable=False)
+    encoding = Column(String, nullable=True)
+    payload = Column(LargeBinary, nullable=True)
+    # Deltas since the last snapshot; 0 for snapshots.
+    depth = Column(Integer, nullable=True)
+    # The version a delta was encoded against. Not always the previous row:
+    # concurrent refines of a section can encode deltas against the same base.
+    base_id = Column(Integer, nullable=True)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     section_id = Column(Integer, ForeignKey("document_sections.id"), nullable=False)
 
@@ -0,0 +1,20 @@
+from sqlalchemy import Column, Integer, String, ForeignKey, Date, DateTime, UniqueConstraint
+from sqlalchemy.sql import func
+from .user import Base
+
+class TokenUsage(Base):
+    """LLM token spend per user, day, operation and model."""
+    __tablename__ = "token_usage"
+    __table_args__ = (
+        UniqueConstraint("user_id", "day", "operation", "model", name="uq_token_usage_user_day_operation_model"),
+    )
+
+    id = Column(Integer, primary_key=True, index=True)
+    user_id = Column(Integer, ForeignKey("users.id"), nullable=True)
+    day = Column(Date, nullable=False)
+    operation = Column(String, nullable=False)
+    model = Column(String, nullable=False)
+    calls = Column(Integer, nullable=False, default=0)
+    prompt_tokens = Column(Integer, nullable=False, default=0)
+    output_tokens = Column(Integer, nullable=False, default=0)
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
@@ -0,0 +1,73 @@
+
+import base64
+import zlib
+from sqlalchemy.types import Text, TypeDecorator
+from ..core.config import settings
+
+# Compressed values are stored as "<TAG><codec>:<base64 payload>". The tag is
+# an escape character that never starts real prose, so anything without it
+# (including every row written before compression existed) is plain text.
+# Plain text that does start with the tag is stored as "<TAG>raw:<text>".
+_TAG = "\x1b"
+
+
+def _zstd():
+    try:
+        import zstandard
+    except ImportError:
+        return None
+    return zstandard
+
+
+def compress_text(value: str, codec: str, min_bytes: int) -> str:
+    plain = f"{_TAG}raw:{value}" if value.startswith(_TAG) else value
+    raw = value.encode("utf-8")
+    if len(raw) < min_bytes:
+        return plain
+    if codec == "zstd" and _zstd() is not None:
+        payload = _zstd().ZstdCompressor(level=10).compress(raw)
+    else:
+        codec, payload = "zlib", zlib.compress(raw, 6)
+    encoded = f"{_TAG}{codec}:{base64.b64encode(payload).decode('ascii')}"
+    return encoded if len(encoded) < len(plain) else plain
+
+
+def decompress_text(value: str) -> str:
+    if not value.startswith(_TAG):
+        return value
+    codec, _, payload = value[1:].partition(":")
+    if codec == "raw":
+        return payload
+    if codec == "zlib":
+        return zlib.decompress(base64.b64decode(payload)).decode("utf-8")
+    if codec == "zstd":
+        zstandard = _zstd()
+        if zstandard is None:
+            raise RuntimeError("zstd-compressed value found but the zstandard package is not installed")
+        return zstandard.ZstdDecompressor().decompress(base64.b64decode(payload)).decode("utf-8")
+    # Unknown tag: leave the value untouched rather than failing the read.
+    return value
+
+
+class CompressedText(TypeDecorator):
+    """
+    Text column that transparently compresses values of at least
+    TEXT_COMPRESSION_MIN_BYTES. Values are decompressed only when the column
+    is actually loaded, so queries that project it away (load_only) never
+    pay for it.
+    """
+
+    impl = Text
+    cache_ok = True
+
+    def process_bind_param(self, value, dialect):
+        if value is None:
+            return None
+        return compress_text(
+            value, settings.TEXT_COMPRESSION_CODEC, settings.TEXT_COMPRESSION_MIN_BYTES
+        )
+
+    def process_result_value(self, value, dialect):
+        if value is None:
+            return None
+        return decompress_text(value)
@@ -9,4 +9,6 @@ class User(Base):
 
     id = Column(Integer, primary_key=True, index=True)
     email = Column(String, unique=True, index=True, nullable=False)
-    hashed_password = Column(String, nullable=False)
\ No newline at end of file
+    hashed_password = Column(String, nullable=False)
+    # Overrides LLM_DAILY_TOKEN_QUOTA for this user; 0 means unlimited.
+    daily_token_quota = Column(Integer, nullable=True)
\ No newline at end of file
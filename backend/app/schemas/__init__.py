@@ -1,2 +1,2 @@
 from .user import UserCreate, UserOut
-from .project import Project, ProjectCreate
\ No newline at end of file
+from .project import Project, ProjectCreate, ProjectSummary
\ No newline at end of file
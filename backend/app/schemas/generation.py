@@ -1,7 +1,7 @@
 
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
 from typing import List
-from typing import Optional
+from typing import Literal, Optional
 from datetime import datetime
 
 
@@ -25,17 +25,46 @@ class DocumentSection(BaseModel):
         orm_mode = True
         
 class RefineRequest(BaseModel):
-    prompt: str        
+    prompt: str
+    # "auto" refines long sections in concurrent chunks; "whole" or "chunked" force a mode.
+    mode: Literal["auto", "whole", "chunked"] = "auto"
     
 class SectionUpdate(BaseModel):
     comment: Optional[str] = None
     user_notes: Optional[str] = None
     feedback: Optional[str] = None
 
+class SectionBatchItem(SectionUpdate):
+    id: int
+    section_order: Optional[int] = None
+    content: Optional[str] = None
+
+class SectionBatchUpdate(BaseModel):
+    updates: List[SectionBatchItem] = Field(..., min_length=1, max_length=500)
+
+class SectionBatchError(BaseModel):
+    id: int
+    detail: str
+
+class SectionBatchResult(BaseModel):
+    updated: List[DocumentSection]
+    errors: List[SectionBatchError]
+
 class RefinementHistoryOut(BaseModel):
     id: int
     prompt: str
     created_at: datetime
 
     class Config:
-        from_attributes = True   
\ No newline at end of file
+        from_attributes = True
+
+class RefinementVersionOut(BaseModel):
+    id: int
+    prompt: str
+    created_at: datetime
+    content: str
+
+class VersionDiffOut(BaseModel):
+    from_version: str
+    to_version: str
+    diff: str
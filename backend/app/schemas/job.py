@@ -0,0 +1,42 @@
+from pydantic import BaseModel
+from typing import List, Optional
+from datetime import datetime
+
+
+class JobSectionStatus(BaseModel):
+    title: str
+    section_order: int
+    status: str
+
+class JobOut(BaseModel):
+    id: int
+    project_id: int
+    status: str
+    error: Optional[str] = None
+    completed_sections: int
+    total_sections: int
+    sections: List[JobSectionStatus] = []
+    created_at: Optional[datetime] = None
+    updated_at: Optional[datetime] = None
+
+    @classmethod
+    def from_job(cls, job) -> "JobOut":
+        sections = [
+            JobSectionStatus(
+                title=section["title"],
+                section_order=i,
+                status="done" if section.get("content") is not None else "pending",
+            )
+            for i, section in enumerate(job.get_sections())
+        ]
+        return cls(
+            id=job.id,
+            project_id=job.project_id,
+            status=job.status,
+            error=job.error,
+            completed_sections=sum(1 for s in sections if s.status == "done"),
+            total_sections=len(sections),
+            sections=sections,
+            created_at=job.created_at,
+            updated_at=job.updated_at,
+        )
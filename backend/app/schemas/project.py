@@ -34,4 +34,17 @@ class Project(BaseModel):
     target_audience: Optional[str] = None
 
     class Config:
-        from_attributes = True
\ No newline at end of file
+        from_attributes = True
+
+class ProjectSummary(BaseModel):
+    id: int
+    title: str
+    document_type: str
+    owner_id: int
+
+    main_topic: Optional[str] = None
+    tone: Optional[str] = None
+    target_audience: Optional[str] = None
+
+    class Config:
+        from_attributes = True
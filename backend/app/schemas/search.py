@@ -0,0 +1,15 @@
+from pydantic import BaseModel
+from typing import Literal, Optional
+
+
+class SearchHit(BaseModel):
+    kind: Literal["project", "section"]
+    project_id: int
+    project_title: str
+    # None for project hits.
+    section_id: Optional[int] = None
+    # HTML-escaped, with matched terms wrapped in <mark>.
+    title: str
+    snippet: str
+    # Higher is better; only comparable within one result list.
+    score: float
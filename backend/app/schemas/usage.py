@@ -0,0 +1,23 @@
+from pydantic import BaseModel
+from typing import List, Optional
+from datetime import date
+
+
+class UsageBreakdown(BaseModel):
+    operation: str
+    model: str
+    calls: int
+    prompt_tokens: int
+    output_tokens: int
+
+    class Config:
+        from_attributes = True
+
+class UsageOut(BaseModel):
+    day: date
+    used_tokens: int
+    # None when the user has no daily limit.
+    quota: Optional[int] = None
+    remaining_tokens: Optional[int] = None
+    # Persisted totals; calls made since the last flush only show in `used_tokens`.
+    breakdown: List[UsageBreakdown] = []
@@ -1,9 +1,8 @@
 
-from docx import Document
-from pptx import Presentation
-from pptx.util import Inches
-from typing import List
+from typing import BinaryIO, List, Tuple, Union
 import io
+import os
+import time
 
 class SectionData:
     def __init__(self, title: str, content: str):
@@ -11,6 +10,20 @@ class SectionData:
         self.content = content
 
 def create_word_document(sections: List[SectionData]) -> io.BytesIO:
+    file_stream = io.BytesIO()
+    _build_word_document(sections).save(file_stream)
+    file_stream.seek(0)
+    return file_stream
+
+def warm_up() -> None:
+    """Imports python-docx and python-pptx ahead of the first export. Blocking."""
+    import docx  # noqa: F401
+    import pptx  # noqa: F401
+
+def _build_word_document(sections: List[SectionData]):
+    # Imported here: python-docx/pptx are slow to import and only needed for exports.
+    from docx import Document
+
     document = Document()
     document.add_heading(sections[0].title if sections else "Generated Document", level=1)
 
@@ -19,10 +32,7 @@ def create_word_document(sections: List[SectionData]) -> io.BytesIO:
         document.add_paragraph(section.content)
         document.add_page_break()
 
-    file_stream = io.BytesIO()
-    document.save(file_stream)
-    file_stream.seek(0)
-    return file_stream
+    return document
 
 def _split_text_into_chunks(text: str, max_chars: int) -> List[str]:
     """
@@ -54,6 +64,15 @@ def _split_text_into_chunks(text: str, max_chars: int) -> List[str]:
 
 
 def create_powerpoint_presentation(sections: List[SectionData]) -> io.BytesIO:
+    file_stream = io.BytesIO()
+    _build_powerpoint_presentation(sections).save(file_stream)
+    file_stream.seek(0)
+    return file_stream
+
+
+def _build_powerpoint_presentation(sections: List[SectionData]):
+    from pptx import Presentation
+
     prs = Presentation()
     title_slide_layout = prs.slide_layouts[0]
     content_slide_layout = prs.slide_layouts[1]
@@ -89,7 +108,35 @@ def create_powerpoint_presentation(sections: List[SectionData]) -> io.BytesIO:
             
             body.text = chunk
 
-    file_stream = io.BytesIO()
-    prs.save(file_stream)
-    file_stream.seek(0)
-    return file_stream
\ No newline at end of file
+    return prs
+
+
+def save_document(
+    document_type: str,
+    sections: List[SectionData],
+    target: Union[str, BinaryIO]
+) -> float:
+    """
+    Renders a document of the given type straight into `target` (a file path
+    or any writable object; it does not need to be seekable) and returns the
+    render time in seconds. The zip parts are written as they are produced,
+    so the finished file is never held in memory as a whole.
+    """
+    started = time.perf_counter()
+    if document_type == 'docx':
+        package = _build_word_document(sections)
+    elif document_type == 'pptx':
+        package = _build_powerpoint_presentation(sections)
+    else:
+        raise ValueError(f"Unsupported document type: {document_type}")
+    package.save(target)
+    return time.perf_counter() - started
+
+
+def render_document_to_file(document_type: str, sections: List[SectionData], path: str) -> Tuple[int, float]:
+    """
+    Renders into a file and returns (size in bytes, render seconds).
+    Module-level so it can run in a worker process.
+    """
+    seconds = save_document(document_type, sections, path)
+    return os.path.getsize(path), seconds
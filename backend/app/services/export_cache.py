@@ -0,0 +1,134 @@
+import asyncio
+import hashlib
+import os
+import uuid
+from typing import List, Optional, Tuple
+
+from ..core.config import settings
+from .document_service import SectionData
+
+
+def content_hash(document_type: str, sections: List[SectionData]) -> str:
+    """
+    Hash of everything the rendered file depends on: the document type and
+    the ordered section titles and contents. Fields are length-prefixed so
+    different splits of the same text cannot collide.
+    """
+    digest = hashlib.sha256()
+    digest.update(document_type.encode("utf-8"))
+    for section in sections:
+        for field in (section.title or "", section.content or ""):
+            encoded = field.encode("utf-8")
+            digest.update(len(encoded).to_bytes(8, "big"))
+            digest.update(encoded)
+    return digest.hexdigest()
+
+
+class ExportCache:
+    """
+    Bounded on-disk cache of rendered exports, one file per
+    `<project_id>-<content_hash>.<document_type>`. Least recently served
+    files are evicted once the directory exceeds `max_bytes`.
+    """
+
+    def __init__(self, directory: str, max_bytes: int):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+
+    def _path(self, project_id: int, digest: str, document_type: str) -> str:
+        return os.path.join(self.directory, f"{project_id}-{digest}.{document_type}")
+
+    def _lookup(self, path: str) -> bool:
+        try:
+            os.utime(path)
+            return True
+        except FileNotFoundError:
+            return False
+
+    def _commit(self, tmp_path: str, path: str) -> bool:
+        try:
+            os.replace(tmp_path, path)
+        except FileNotFoundError:
+            return False
+        self._evict(keep=path)
+        return True
+
+    def _discard(self, tmp_path: str) -> None:
+        try:
+            os.remove(tmp_path)
+        except FileNotFoundError:
+            pass
+
+    def _evict(self, keep: str) -> None:
+        entries = []
+        with os.scandir(self.directory) as it:
+            for entry in it:
+                if entry.is_file() and not entry.name.endswith(".tmp"):
+                    stat = entry.stat()
+                    entries.append((stat.st_mtime, stat.st_size, entry.path))
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            if path == keep:
+                continue
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+            total -= size
+
+    def _remove_project(self, project_id: int) -> None:
+        prefix = f"{project_id}-"
+        try:
+            with os.scandir(self.directory) as it:
+                # In-flight renders keep their temporary files; they commit
+                # under the old content hash, which is no longer requested.
+                paths = [
+                    entry.path for entry in it
+                    if entry.name.startswith(prefix) and not entry.name.endswith(".tmp")
+                ]
+        except FileNotFoundError:
+            return
+        for path in paths:
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+
+    async def get(self, project_id: int, digest: str, document_type: str) -> Optional[str]:
+        """Returns the path of the cached file, or None."""
+        path = self._path(project_id, digest, document_type)
+        if await asyncio.to_thread(self._lookup, path):
+            self.hits += 1
+            return path
+        self.misses += 1
+        return None
+
+    def reserve(self, project_id: int, digest: str, document_type: str) -> Tuple[str, str]:
+        """
+        Returns (temporary path, final path) for a file about to be rendered.
+        The renderer writes to the temporary path; `commit` publishes it.
+        """
+        os.makedirs(self.directory, exist_ok=True)
+        path = self._path(project_id, digest, document_type)
+        return f"{path}.{uuid.uuid4().hex}.tmp", path
+
+    async def commit(self, tmp_path: str, path: str) -> bool:
+        """Publishes a rendered file; False if the temporary file is gone (not cached)."""
+        return await asyncio.to_thread(self._commit, tmp_path, path)
+
+    async def discard(self, tmp_path: str) -> None:
+        await asyncio.to_thread(self._discard, tmp_path)
+
+    async def invalidate_project(self, project_id: int) -> None:
+        """Drops every cached export of a project; call after any section write."""
+        await asyncio.to_thread(self._remove_project, project_id)
+
+
+export_cache = ExportCache(
+    directory=settings.EXPORT_CACHE_DIR,
+    max_bytes=settings.EXPORT_CACHE_MAX_BYTES,
+)
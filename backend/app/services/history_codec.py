@@ -0,0 +1,84 @@
+import difflib
+import json
+import re
+import zlib
+from typing import Optional, Tuple
+
+SNAPSHOT = "snapshot"
+DELTA = "delta"
+
+_TOKEN_RE = re.compile(r"\S+\s*|\s+")
+
+
+def _tokenize(text: str) -> list:
+    """Words with their trailing whitespace, so tokens join back losslessly."""
+    return _TOKEN_RE.findall(text)
+
+
+def encode_snapshot(text: str) -> bytes:
+    return zlib.compress(text.encode("utf-8"), 9)
+
+
+def encode_delta(base: str, text: str) -> bytes:
+    """
+    Word-level delta from `base` to `text`: a list of [start, end] ranges to
+    copy from the base and plain strings to insert, zlib-compressed.
+    """
+    base_tokens = _tokenize(base)
+    new_tokens = _tokenize(text)
+    ops = []
+    matcher = difflib.SequenceMatcher(None, base_tokens, new_tokens, autojunk=False)
+    for tag, i1, i2, j1, j2 in matcher.get_opcodes():
+        if tag == "equal":
+            ops.append([i1, i2])
+        elif j2 > j1:
+            ops.append("".join(new_tokens[j1:j2]))
+    return zlib.compress(json.dumps(ops, separators=(",", ":")).encode("utf-8"), 9)
+
+
+def apply_delta(base: str, payload: bytes) -> str:
+    base_tokens = _tokenize(base)
+    parts = []
+    for op in json.loads(zlib.decompress(payload)):
+        if isinstance(op, str):
+            parts.append(op)
+        else:
+            parts.append("".join(base_tokens[op[0]:op[1]]))
+    return "".join(parts)
+
+
+def encode_version(
+    text: str,
+    previous: Optional[str],
+    previous_depth: Optional[int],
+    snapshot_interval: int
+) -> Tuple[str, bytes, int]:
+    """
+    Picks the encoding for a new version and returns (encoding, payload,
+    depth). A snapshot is written when there is no previous version, when
+    the delta chain reached `snapshot_interval`, or when the delta would not
+    be smaller than the snapshot (e.g. a full rewrite).
+    """
+    snapshot = encode_snapshot(text)
+    if previous is None or previous_depth is None or previous_depth + 1 >= snapshot_interval:
+        return SNAPSHOT, snapshot, 0
+    delta = encode_delta(previous, text)
+    if len(delta) >= len(snapshot):
+        return SNAPSHOT, snapshot, 0
+    return DELTA, delta, previous_depth + 1
+
+
+def decode_version(
+    encoding: Optional[str],
+    payload: Optional[bytes],
+    plain_text: Optional[str],
+    previous: Optional[str]
+) -> str:
+    """Rebuilds one version given the version before it (needed for deltas)."""
+    if encoding == SNAPSHOT:
+        return zlib.decompress(payload).decode("utf-8")
+    if encoding == DELTA:
+        if previous is None:
+            raise ValueError("Delta version without a base version")
+        return apply_delta(previous, payload)
+    return plain_text or ""
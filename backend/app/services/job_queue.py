@@ -0,0 +1,297 @@
+import asyncio
+import json
+import traceback
+import uuid
+from datetime import datetime, timedelta
+from typing import List, Optional, Tuple
+
+from sqlalchemy import and_, delete, or_, update
+from sqlalchemy.future import select
+
+from .. import crud
+from ..core.config import settings
+from ..db import AsyncSessionLocal
+from ..models.document_section import DocumentSection
+from ..models.generation_job import GenerationJob
+from ..models.project import Project
+from . import llm_service, search_index
+from .llm_provider import LLMError
+from .export_cache import export_cache
+from .project_cache import bump_project_version
+from .section_keys import generation_key
+from .usage_tracker import QuotaExceeded, llm_user
+
+
+class LeaseLost(Exception):
+    """The job was reclaimed by another worker after this one's lease expired."""
+
+
+def _claimable(now: datetime):
+    """Queued jobs, plus running jobs whose worker stopped renewing its lease."""
+    return or_(
+        GenerationJob.status == "queued",
+        and_(GenerationJob.status == "running", GenerationJob.lease_expires_at < now),
+    )
+
+
+def _leased(job_id: int, lease_token: str):
+    return and_(
+        GenerationJob.id == job_id,
+        GenerationJob.status == "running",
+        GenerationJob.lease_token == lease_token,
+    )
+
+
+def _lease_expiry() -> datetime:
+    return datetime.utcnow() + timedelta(seconds=settings.JOB_LEASE_SECONDS)
+
+
+async def claim_next_job() -> Optional[Tuple[int, str]]:
+    """
+    Atomically marks the oldest claimable job as running and returns its id
+    and a new lease token. Safe to call from several workers and processes
+    sharing the database. Jobs already claimed JOB_MAX_ATTEMPTS times are
+    failed instead, so a job that keeps crashing its worker isn't retried forever.
+    """
+    async with AsyncSessionLocal() as db:
+        now = datetime.utcnow()
+        await db.execute(
+            update(GenerationJob)
+            .where(_claimable(now), GenerationJob.attempts >= settings.JOB_MAX_ATTEMPTS)
+            .values(
+                status="failed",
+                error=f"Gave up after {settings.JOB_MAX_ATTEMPTS} attempts",
+                lease_expires_at=None,
+                lease_token=None,
+            )
+        )
+        result = await db.execute(
+            select(GenerationJob.id)
+            .where(_claimable(now))
+            .order_by(GenerationJob.id)
+            .limit(1)
+        )
+        job_id = result.scalars().first()
+        if job_id is None:
+            await db.commit()
+            return None
+
+        lease_token = uuid.uuid4().hex
+        claimed = await db.execute(
+            update(GenerationJob)
+            .where(GenerationJob.id == job_id, _claimable(now))
+            .values(
+                status="running",
+                attempts=GenerationJob.attempts + 1,
+                lease_expires_at=now + timedelta(seconds=settings.JOB_LEASE_SECONDS),
+                lease_token=lease_token,
+            )
+        )
+        await db.commit()
+        return (job_id, lease_token) if claimed.rowcount == 1 else None
+
+
+async def renew_lease(job_id: int, lease_token: str) -> bool:
+    """Extends the lease; False if the job is no longer held with this token."""
+    async with AsyncSessionLocal() as db:
+        renewed = await db.execute(
+            update(GenerationJob)
+            .where(_leased(job_id, lease_token))
+            .values(lease_expires_at=_lease_expiry())
+        )
+        await db.commit()
+        return renewed.rowcount == 1
+
+
+async def _keep_leased(job_id: int, lease_token: str, work: asyncio.Task, lost: asyncio.Event) -> None:
+    """Renews the lease while `work` runs, however long one section takes; cancels it once lost."""
+    while True:
+        await asyncio.sleep(settings.JOB_LEASE_SECONDS / 3)
+        try:
+            held = await renew_lease(job_id, lease_token)
+        except Exception:
+            # Transient database trouble: try again, the lease has time left.
+            traceback.print_exc()
+            continue
+        if not held:
+            lost.set()
+            work.cancel()
+            return
+
+
+async def run_job(job_id: int, lease_token: str) -> None:
+    """
+    Runs a claimed job while a heartbeat keeps its lease. If the lease is
+    lost anyway (e.g. the process stalled), the job stops without writing
+    anything more and is left to the worker that reclaimed it.
+    """
+    lost = asyncio.Event()
+    work = asyncio.ensure_future(_generate(job_id, lease_token))
+    heartbeat = asyncio.create_task(_keep_leased(job_id, lease_token, work, lost))
+    try:
+        await work
+    except LeaseLost:
+        print(f"--- GENERATION JOB {job_id} LEASE LOST, LEFT TO THE WORKER THAT RECLAIMED IT ---")
+    except asyncio.CancelledError:
+        # Either the heartbeat stopped the work, or this worker is shutting down.
+        if not lost.is_set() or asyncio.current_task().cancelling():
+            raise
+        print(f"--- GENERATION JOB {job_id} LEASE LOST, LEFT TO THE WORKER THAT RECLAIMED IT ---")
+    finally:
+        heartbeat.cancel()
+
+
+async def _generate(job_id: int, lease_token: str) -> None:
+    """
+    Generates every section that has no content yet, saving progress after
+    each one so a restarted job only redoes unfinished sections, then
+    replaces the project's sections in one transaction. Every write is
+    conditional on still holding the lease.
+    """
+    async with AsyncSessionLocal() as db:
+        job = await db.get(GenerationJob, job_id)
+        if job is None:
+            return
+        # Commits expire the instance, so read what we need up front.
+        project_id = job.project_id
+        main_topic = job.main_topic
+        sections = job.get_sections()
+        llm_user.set(job.owner_id)
+        try:
+            # Regenerating a project asks for new text rather than the cached one.
+            fresh = await crud.project_has_sections(db, project_id)
+
+            async def generate(index: int):
+                content = await llm_service.generate_content_for_section(
+                    main_topic=main_topic,
+                    section_title=sections[index]["title"],
+                    fresh=fresh
+                )
+                return index, content
+
+            pending = [
+                asyncio.ensure_future(generate(i))
+                for i, section in enumerate(sections) if section.get("content") is None
+            ]
+            try:
+                for next_done in asyncio.as_completed(pending):
+                    index, content = await next_done
+                    sections[index]["content"] = content
+                    saved = await db.execute(
+                        update(GenerationJob)
+                        .where(_leased(job_id, lease_token))
+                        .values(sections=json.dumps(sections), lease_expires_at=_lease_expiry())
+                    )
+                    await db.commit()
+                    if saved.rowcount != 1:
+                        raise LeaseLost()
+            finally:
+                # Don't keep spending tokens on sections nobody will save.
+                for task in pending:
+                    task.cancel()
+
+            # Claims the job row first, so the sections are only replaced by
+            # the worker that still holds the lease.
+            completed = await db.execute(
+                update(GenerationJob)
+                .where(_leased(job_id, lease_token))
+                .values(status="completed", lease_expires_at=None, lease_token=None)
+            )
+            if completed.rowcount != 1:
+                await db.rollback()
+                raise LeaseLost()
+
+            project = await db.get(Project, project_id)
+            if project is None:
+                raise ValueError("Project no longer exists")
+            project.main_topic = main_topic
+            await search_index.index_project(db, project)
+            await search_index.remove_project_sections(db, project_id)
+            await db.execute(
+                delete(DocumentSection).where(DocumentSection.project_id == project_id)
+            )
+            generated = [
+                DocumentSection(
+                    title=section["title"],
+                    content=section["content"],
+                    section_order=i,
+                    project_id=project_id,
+                    generation_key=generation_key(main_topic, section["title"], section["content"])
+                )
+                for i, section in enumerate(sections)
+            ]
+            db.add_all(generated)
+            await db.flush()
+            await search_index.index_sections(db, generated)
+            await bump_project_version(db, project_id)
+            await db.commit()
+            await export_cache.invalidate_project(project_id)
+        except (LeaseLost, asyncio.CancelledError):
+            raise
+        except QuotaExceeded as e:
+            # Sections finished so far stay saved on the job for a later retry.
+            await _fail(db, job_id, lease_token, f"Token quota exceeded: {e}")
+        except LLMError as e:
+            await _fail(db, job_id, lease_token, f"Model unavailable: {e}")
+        except Exception as e:
+            print(f"--- GENERATION JOB {job_id} FAILED ---")
+            traceback.print_exc()
+            await _fail(db, job_id, lease_token, str(e))
+
+
+async def _fail(db, job_id: int, lease_token: str, error: str) -> None:
+    await db.rollback()
+    await db.execute(
+        update(GenerationJob)
+        .where(_leased(job_id, lease_token))
+        .values(status="failed", error=error, lease_expires_at=None, lease_token=None)
+    )
+    await db.commit()
+
+
+class JobQueue:
+    """
+    Pool of async workers pulling generation jobs from the database. The
+    database is the queue, so jobs survive restarts and can also be picked
+    up by a separate `python -m app.worker` process.
+    """
+
+    def __init__(self, poll_interval: float):
+        self.poll_interval = poll_interval
+        self._wakeup = asyncio.Event()
+        self._workers: List[asyncio.Task] = []
+
+    def start(self, workers: int) -> None:
+        for _ in range(workers):
+            self._workers.append(asyncio.create_task(self._worker_loop()))
+
+    async def stop(self) -> None:
+        for worker in self._workers:
+            worker.cancel()
+        await asyncio.gather(*self._workers, return_exceptions=True)
+        self._workers = []
+
+    def notify(self) -> None:
+        """Wakes idle workers right away instead of waiting for the next poll."""
+        self._wakeup.set()
+
+    async def _worker_loop(self) -> None:
+        while True:
+            try:
+                claimed = await claim_next_job()
+            except Exception:
+                traceback.print_exc()
+                claimed = None
+
+            if claimed is not None:
+                await run_job(*claimed)
+                continue
+
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), self.poll_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+
+
+job_queue = JobQueue(poll_interval=settings.JOB_POLL_INTERVAL_SECONDS)
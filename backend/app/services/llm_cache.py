@@ -0,0 +1,195 @@
+import asyncio
+import hashlib
+import sqlite3
+import threading
+import time
+import unicodedata
+from collections import OrderedDict
+from typing import Optional
+
+from ..core.config import settings
+
+
+def make_key(model_name: str, prompt: str) -> str:
+    """
+    Content address of a prompt: model name plus the prompt with unicode and
+    trailing whitespace normalized, so cosmetic differences still hit.
+    """
+    normalized = unicodedata.normalize("NFC", prompt)
+    normalized = "\n".join(line.rstrip() for line in normalized.strip().splitlines())
+    return hashlib.sha256(f"{model_name}\n{normalized}".encode("utf-8")).hexdigest()
+
+
+class MemoryTier:
+    """LRU with per-entry expiry. Only touched from the event loop."""
+
+    def __init__(self, max_entries: int, ttl_seconds: int):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()
+
+    def get(self, key: str) -> Optional[str]:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        value, expires_at = entry
+        if expires_at < time.time():
+            del self._entries[key]
+            return None
+        self._entries.move_to_end(key)
+        return value
+
+    def set(self, key: str, value: str, expires_at: Optional[float] = None) -> None:
+        if self.max_entries <= 0:
+            return
+        if expires_at is None:
+            expires_at = time.time() + self.ttl_seconds
+        self._entries[key] = (value, expires_at)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        self._entries.clear()
+
+
+class SQLiteTier:
+    """
+    Persistent tier in its own SQLite file. Calls are blocking and are meant
+    to be run in a worker thread.
+
+    Eviction runs in batches: the table may grow a tenth past `max_entries`
+    before expired and least recently used rows are deleted down to it.
+    """
+
+    def __init__(self, path: str, max_entries: int, ttl_seconds: int):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.evict_batch = max(1, max_entries // 10)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS llm_cache ("
+            " key TEXT PRIMARY KEY,"
+            " value TEXT NOT NULL,"
+            " expires_at REAL NOT NULL,"
+            " last_access REAL NOT NULL)"
+        )
+        self._conn.execute(
+            "CREATE INDEX IF NOT EXISTS ix_llm_cache_last_access ON llm_cache (last_access)"
+        )
+        self._conn.commit()
+        # Upper bound on the row count: every write counts, replaced keys too.
+        self._rows = self._conn.execute("SELECT COUNT(*) FROM llm_cache").fetchone()[0]
+
+    def get(self, key: str) -> Optional[tuple]:
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT value, expires_at FROM llm_cache WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                return None
+            if row[1] < now:
+                self._conn.execute("DELETE FROM llm_cache WHERE key = ?", (key,))
+                self._conn.commit()
+                return None
+            self._conn.execute("UPDATE llm_cache SET last_access = ? WHERE key = ?", (now, key))
+            self._conn.commit()
+            return row
+
+    def set(self, key: str, value: str) -> None:
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO llm_cache (key, value, expires_at, last_access)"
+                " VALUES (?, ?, ?, ?)",
+                (key, value, now + self.ttl_seconds, now),
+            )
+            self._rows += 1
+            if self._rows > self.max_entries + self.evict_batch:
+                self._evict(now)
+            self._conn.commit()
+
+    def _evict(self, now: float) -> None:
+        self._conn.execute("DELETE FROM llm_cache WHERE expires_at < ?", (now,))
+        rows = self._conn.execute("SELECT COUNT(*) FROM llm_cache").fetchone()[0]
+        if rows > self.max_entries:
+            self._conn.execute(
+                "DELETE FROM llm_cache WHERE key IN ("
+                " SELECT key FROM llm_cache ORDER BY last_access LIMIT ?)",
+                (rows - self.max_entries,),
+            )
+        self._rows = min(rows, self.max_entries)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._conn.execute("DELETE FROM llm_cache")
+            self._conn.commit()
+            self._rows = 0
+
+
+class LLMCache:
+    def __init__(self, path: str, memory_entries: int, disk_entries: int, ttl_seconds: int):
+        self.memory = MemoryTier(memory_entries, ttl_seconds)
+        self._path = path
+        self._disk_entries = disk_entries
+        self._ttl_seconds = ttl_seconds
+        self._disk: Optional[SQLiteTier] = None
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.upstream_seconds = 0.0
+
+    def _get_disk(self) -> SQLiteTier:
+        # Opened on first use so importing the service never touches the filesystem.
+        if self._disk is None:
+            self._disk = SQLiteTier(self._path, self._disk_entries, self._ttl_seconds)
+        return self._disk
+
+    async def get(self, key: str) -> Optional[str]:
+        value = self.memory.get(key)
+        if value is not None:
+            self.memory_hits += 1
+            return value
+        row = await asyncio.to_thread(lambda: self._get_disk().get(key))
+        if row is not None:
+            self.disk_hits += 1
+            self.memory.set(key, row[0], expires_at=row[1])
+            return row[0]
+        self.misses += 1
+        return None
+
+    async def set(self, key: str, value: str) -> None:
+        if not value:
+            return
+        self.memory.set(key, value)
+        await asyncio.to_thread(lambda: self._get_disk().set(key, value))
+
+    def record_upstream_time(self, seconds: float) -> None:
+        self.upstream_seconds += seconds
+
+    def clear(self) -> None:
+        self.memory.clear()
+        self._get_disk().clear()
+
+    def stats(self) -> dict:
+        hits = self.memory_hits + self.disk_hits
+        lookups = hits + self.misses
+        avg_upstream = self.upstream_seconds / self.misses if self.misses else 0.0
+        return {
+            "memory_hits": self.memory_hits,
+            "disk_hits": self.disk_hits,
+            "misses": self.misses,
+            "hit_ratio": hits / lookups if lookups else 0.0,
+            "avg_upstream_seconds": avg_upstream,
+            "estimated_seconds_saved": hits * avg_upstream,
+        }
+
+
+llm_cache = LLMCache(
+    path=settings.LLM_CACHE_PATH,
+    memory_entries=settings.LLM_CACHE_MEMORY_ENTRIES,
+    disk_entries=settings.LLM_CACHE_DISK_ENTRIES,
+    ttl_seconds=settings.LLM_CACHE_TTL_SECONDS,
+)
@@ -0,0 +1,364 @@
+import asyncio
+import random
+import sys
+import threading
+import time
+from collections import deque
+from contextvars import ContextVar
+from typing import AsyncIterator, Optional
+
+from ..core.metrics import LLM_CALL_SECONDS, LLM_ERRORS, LLM_HEDGES, LLM_RETRIES
+from .rate_limiter import RateLimiter, estimate_tokens
+from .usage_tracker import UsageTracker, llm_user
+
+# What a call is for ("outline", "generate", "refine"); set by llm_service and
+# used only to label metrics.
+llm_operation: ContextVar[str] = ContextVar("llm_operation", default="other")
+
+
+class LLMError(Exception):
+    """The model could not produce an answer."""
+
+
+class LLMUnavailable(LLMError):
+    """The upstream is degraded: retries were exhausted or the circuit is open."""
+
+
+# Errors that say nothing about the prompt itself and are worth another try.
+_RETRYABLE_GOOGLE_ERRORS = (
+    "ServiceUnavailable", "TooManyRequests", "InternalServerError", "GatewayTimeout", "DeadlineExceeded",
+)
+
+
+def is_retryable(error: BaseException) -> bool:
+    if isinstance(error, (asyncio.TimeoutError, ConnectionError)):
+        return True
+    # google.api_core is slow to import; if it isn't loaded, nothing raised one of its errors.
+    google_exceptions = sys.modules.get("google.api_core.exceptions")
+    if google_exceptions is None:
+        return False
+    return isinstance(error, tuple(getattr(google_exceptions, name) for name in _RETRYABLE_GOOGLE_ERRORS))
+
+
+class LazyGeminiModel:
+    """
+    Stands in for `genai.GenerativeModel(model_name)`. google.generativeai
+    takes about a second to import, so it is imported and configured on the
+    first call (off the event loop) or by an explicit `load()`.
+    """
+
+    def __init__(self, model_name: str, api_key: str):
+        self._name = model_name
+        self._api_key = api_key
+        # Same normalization as the SDK, so cache keys don't change.
+        self.model_name = model_name if "/" in model_name else f"models/{model_name}"
+        self._model = None
+        self._lock = threading.Lock()
+
+    def load(self):
+        if self._model is None:
+            with self._lock:
+                if self._model is None:
+                    import google.generativeai as genai
+                    genai.configure(api_key=self._api_key)
+                    self._model = genai.GenerativeModel(self._name)
+        return self._model
+
+    async def generate_content_async(self, prompt, **kwargs):
+        model = self._model or await asyncio.to_thread(self.load)
+        return await model.generate_content_async(prompt, **kwargs)
+
+
+class GeminiProvider:
+    """Adapter for a `genai.GenerativeModel` (or anything with the same call)."""
+
+    def __init__(self, model):
+        self.model = model
+
+    @property
+    def model_name(self) -> str:
+        return self.model.model_name
+
+    async def complete(self, prompt: str):
+        return await self.model.generate_content_async(prompt)
+
+    async def stream(self, prompt: str):
+        return await self.model.generate_content_async(prompt, stream=True)
+
+
+class CircuitBreaker:
+    """
+    Opens after `failure_threshold` consecutive upstream failures and rejects
+    calls until `reset_seconds` have passed. Then a single trial call is let
+    through: success closes the circuit, failure opens it again.
+    """
+
+    def __init__(self, failure_threshold: int, reset_seconds: float):
+        self.failure_threshold = failure_threshold
+        self.reset_seconds = reset_seconds
+        self._failures = 0
+        self._opened_at: Optional[float] = None
+        self._trial_in_flight = False
+
+    @property
+    def state(self) -> str:
+        if self._opened_at is None:
+            return "closed"
+        if time.monotonic() - self._opened_at >= self.reset_seconds:
+            return "half_open"
+        return "open"
+
+    def allow(self) -> bool:
+        state = self.state
+        if state == "closed":
+            return True
+        if state == "half_open" and not self._trial_in_flight:
+            self._trial_in_flight = True
+            return True
+        return False
+
+    def record_success(self) -> None:
+        self._failures = 0
+        self._opened_at = None
+        self._trial_in_flight = False
+
+    def record_failure(self) -> None:
+        self._failures += 1
+        self._trial_in_flight = False
+        if self.failure_threshold > 0 and self._failures >= self.failure_threshold:
+            self._opened_at = time.monotonic()
+
+    def release(self) -> None:
+        """Ends a call that neither proved nor disproved upstream health."""
+        self._trial_in_flight = False
+
+
+class LatencyWindow:
+    """Recent successful call latencies, used to pick the hedging delay."""
+
+    def __init__(self, size: int = 200, min_samples: int = 20):
+        self._samples = deque(maxlen=size)
+        self._min_samples = min_samples
+
+    def add(self, seconds: float) -> None:
+        self._samples.append(seconds)
+
+    def p95(self) -> Optional[float]:
+        if len(self._samples) < self._min_samples:
+            return None
+        ordered = sorted(self._samples)
+        return ordered[int(len(ordered) * 0.95) - 1]
+
+
+class ResilientClient:
+    """
+    Calls a provider with a per-call deadline, jittered exponential retries
+    on retryable errors, optional hedging and a circuit breaker. Every
+    attempt, hedges included, goes through the shared concurrency bound and
+    rate limiter, and is charged to the current user when `usage` is given;
+    their daily quota is checked once per call, before the first attempt.
+    """
+
+    def __init__(
+        self,
+        provider,
+        rate_limiter: RateLimiter,
+        concurrency: asyncio.Semaphore,
+        timeout: float,
+        max_attempts: int,
+        retry_base: float,
+        retry_max: float,
+        hedge: bool,
+        hedge_min_delay: float,
+        breaker: CircuitBreaker,
+        usage: Optional[UsageTracker] = None,
+    ):
+        self.provider = provider
+        self.rate_limiter = rate_limiter
+        self.concurrency = concurrency
+        self.timeout = timeout or None
+        self.max_attempts = max(1, max_attempts)
+        self.retry_base = retry_base
+        self.retry_max = retry_max
+        self.hedge = hedge
+        self.hedge_min_delay = hedge_min_delay
+        self.breaker = breaker
+        self.usage = usage
+        self.latencies = LatencyWindow()
+        self.counters = dict.fromkeys(
+            ("calls", "retries", "timeouts", "failures", "rejected", "hedges", "hedge_wins"), 0
+        )
+
+    @property
+    def model_name(self) -> str:
+        return self.provider.model_name
+
+    def _count(self, name: str, error: Optional[BaseException] = None) -> None:
+        """Bumps a local counter and the matching exported metric."""
+        self.counters[name] += 1
+        labels = (self.model_name, llm_operation.get())
+        if name == "retries":
+            LLM_RETRIES.labels(*labels).inc()
+        elif name == "rejected":
+            LLM_ERRORS.labels(*labels, "CircuitOpen").inc()
+        elif name == "failures":
+            LLM_ERRORS.labels(*labels, type(error).__name__).inc()
+        elif name == "hedges":
+            LLM_HEDGES.labels(*labels, "sent").inc()
+        elif name == "hedge_wins":
+            LLM_HEDGES.labels(*labels, "won").inc()
+
+    def _observe(self, seconds: float) -> None:
+        self.latencies.add(seconds)
+        LLM_CALL_SECONDS.labels(self.model_name, llm_operation.get()).observe(seconds)
+
+    def _backoff(self, attempt: int) -> float:
+        # "Full jitter": spreads retries from many callers over the whole window.
+        return random.uniform(0, min(self.retry_max, self.retry_base * 2 ** (attempt - 1)))
+
+    def _hedge_delay(self) -> Optional[float]:
+        if not self.hedge:
+            return None
+        p95 = self.latencies.p95()
+        return max(self.hedge_min_delay, p95 or 0.0)
+
+    def _record_usage(self, estimated: int, response) -> None:
+        usage = getattr(response, "usage_metadata", None)
+        self.rate_limiter.record_usage(estimated, getattr(usage, "total_token_count", 0) or 0)
+        if self.usage is not None:
+            self.usage.record(
+                llm_operation.get(),
+                self.model_name,
+                prompt_tokens=getattr(usage, "prompt_token_count", 0) or estimated,
+                output_tokens=getattr(usage, "candidates_token_count", 0) or 0,
+            )
+
+    async def _attempt(self, prompt: str):
+        estimated = estimate_tokens(prompt)
+        async with self.concurrency:
+            await self.rate_limiter.acquire(estimated)
+            self._count("calls")
+            started = time.perf_counter()
+            try:
+                response = await asyncio.wait_for(self.provider.complete(prompt), self.timeout)
+            except asyncio.TimeoutError:
+                self._count("timeouts")
+                raise
+        self._observe(time.perf_counter() - started)
+        self._record_usage(estimated, response)
+        return response
+
+    async def _hedged(self, prompt: str):
+        """One attempt, plus a second one if the first is slower than the hedge delay."""
+        delay = self._hedge_delay()
+        if delay is None:
+            return await self._attempt(prompt)
+
+        first = asyncio.ensure_future(self._attempt(prompt))
+        tasks = {first}
+        try:
+            done, _ = await asyncio.wait(tasks, timeout=delay)
+            if done:
+                return first.result()
+            self._count("hedges")
+            second = asyncio.ensure_future(self._attempt(prompt))
+            tasks.add(second)
+            pending, error = set(tasks), None
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is None:
+                        if task is second:
+                            self._count("hedge_wins")
+                        return task.result()
+                    error = task.exception()
+            raise error
+        finally:
+            for task in tasks:
+                task.cancel()
+
+    async def _with_retries(self, call, prompt: str):
+        if self.usage is not None:
+            await self.usage.check(llm_user.get())
+        for attempt in range(1, self.max_attempts + 1):
+            if not self.breaker.allow():
+                self._count("rejected")
+                raise LLMUnavailable(f"{self.model_name}: circuit open")
+            try:
+                response = await call(prompt)
+            except BaseException as e:
+                if not is_retryable(e):
+                    self.breaker.release()
+                    if isinstance(e, Exception):
+                        LLM_ERRORS.labels(self.model_name, llm_operation.get(), type(e).__name__).inc()
+                    raise
+                self.breaker.record_failure()
+                self._count("failures", e)
+                if attempt == self.max_attempts:
+                    raise LLMUnavailable(f"{self.model_name}: {e!r} after {attempt} attempts") from e
+                self._count("retries")
+                await asyncio.sleep(self._backoff(attempt))
+                continue
+            self.breaker.record_success()
+            return response
+
+    async def complete(self, prompt: str):
+        """Returns the provider's response for a prompt."""
+        return await self._with_retries(self._hedged, prompt)
+
+    async def stream(self, prompt: str) -> AsyncIterator[str]:
+        """
+        Yields the text chunks of a streamed response. The deadline applies to
+        the first response and to each following chunk. Retries only happen
+        before the first chunk is yielded, and streams are never hedged.
+        """
+        if self.usage is not None:
+            await self.usage.check(llm_user.get())
+        for attempt in range(1, self.max_attempts + 1):
+            if not self.breaker.allow():
+                self._count("rejected")
+                raise LLMUnavailable(f"{self.model_name}: circuit open")
+            estimated = estimate_tokens(prompt)
+            yielded = False
+            try:
+                async with self.concurrency:
+                    await self.rate_limiter.acquire(estimated)
+                    self._count("calls")
+                    started = time.perf_counter()
+                    response = await asyncio.wait_for(self.provider.stream(prompt), self.timeout)
+                    chunks = response.__aiter__()
+                    while True:
+                        try:
+                            chunk = await asyncio.wait_for(chunks.__anext__(), self.timeout)
+                        except StopAsyncIteration:
+                            break
+                        yielded = True
+                        yield chunk.text
+            except BaseException as e:
+                if not is_retryable(e):
+                    self.breaker.release()
+                    if isinstance(e, Exception):
+                        LLM_ERRORS.labels(self.model_name, llm_operation.get(), type(e).__name__).inc()
+                    raise
+                if isinstance(e, asyncio.TimeoutError):
+                    self._count("timeouts")
+                self.breaker.record_failure()
+                self._count("failures", e)
+                if yielded or attempt == self.max_attempts:
+                    raise LLMUnavailable(f"{self.model_name}: {e!r} after {attempt} attempts") from e
+                self._count("retries")
+                await asyncio.sleep(self._backoff(attempt))
+                continue
+            self._observe(time.perf_counter() - started)
+            self._record_usage(estimated, response)
+            self.breaker.record_success()
+            return
+
+    def stats(self) -> dict:
+        p95 = self.latencies.p95()
+        return {
+            "model": self.model_name,
+            "circuit": self.breaker.state,
+            "p95_ms": round(p95 * 1000, 1) if p95 is not None else None,
+            **self.counters,
+        }
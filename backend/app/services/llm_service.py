@@ -1,58 +1,344 @@
 
-from typing import List
-import google.generativeai as genai
+from typing import Callable, List, Optional
+import asyncio
+import functools
+import re
+import time
 from ..core.config import settings
+from ..core.metrics import LLM_COALESCED
+from .rate_limiter import RateLimiter
+from .llm_provider import CircuitBreaker, GeminiProvider, LazyGeminiModel, LLMError, ResilientClient, llm_operation
+from .llm_cache import llm_cache, make_key
+from .single_flight import SingleFlight
+from .usage_tracker import QuotaExceeded, llm_user, usage_tracker
 import traceback 
 
 
-genai.configure(api_key=settings.GEMINI_API_KEY)
+rate_limiter = RateLimiter(
+    requests_per_minute=settings.LLM_REQUESTS_PER_MINUTE,
+    tokens_per_minute=settings.LLM_TOKENS_PER_MINUTE,
+)
+_concurrency = asyncio.Semaphore(max(1, settings.LLM_MAX_CONCURRENCY))
+single_flight = SingleFlight()
 
-model = genai.GenerativeModel('gemini-2.5-pro')
-print("🔥 USING MODEL:", model.model_name)
 
+_PARAGRAPH_BREAK = re.compile(r"\n\s*\n")
+_QUOTED = re.compile(r'["\u201c]([^"\u201d]+)["\u201d]')
+_UNCHANGED = "UNCHANGED"
+# Neighbouring text shown with each chunk so the edits read continuously.
+_CHUNK_CONTEXT_CHARS = 400
 
 
-async def generate_content_for_section(main_topic: str, section_title: str) -> str:
+def build_client(model_name: str) -> ResilientClient:
+    """Wraps a Gemini model in the configured deadline/retry/hedging/breaker policy."""
+    return ResilientClient(
+        GeminiProvider(LazyGeminiModel(model_name, settings.GEMINI_API_KEY)),
+        rate_limiter=rate_limiter,
+        concurrency=_concurrency,
+        timeout=settings.LLM_TIMEOUT_SECONDS,
+        max_attempts=settings.LLM_MAX_ATTEMPTS,
+        retry_base=settings.LLM_RETRY_BASE_SECONDS,
+        retry_max=settings.LLM_RETRY_MAX_SECONDS,
+        hedge=settings.LLM_HEDGE_ENABLED,
+        hedge_min_delay=settings.LLM_HEDGE_MIN_DELAY_SECONDS,
+        breaker=CircuitBreaker(settings.LLM_BREAKER_FAILURES, settings.LLM_BREAKER_RESET_SECONDS),
+        usage=usage_tracker,
+    )
+
+
+client = build_client(settings.LLM_MODEL)
+# Cheaper/faster model used for outlines when the main one is unavailable.
+fallback_client: Optional[ResilientClient] = None
+if settings.LLM_FALLBACK_MODEL:
+    fallback_client = build_client(settings.LLM_FALLBACK_MODEL)
+
+
+def warm_up() -> None:
+    """Imports and configures the Gemini SDK ahead of the first call. Blocking."""
+    for llm in (client, fallback_client):
+        model = getattr(llm.provider, "model", None) if llm else None
+        if isinstance(model, LazyGeminiModel):
+            model.load()
+
+
+def _operation(name: str):
+    """Labels the LLM calls made inside the decorated function for metrics."""
+    def decorator(func):
+        @functools.wraps(func)
+        async def wrapper(*args, **kwargs):
+            token = llm_operation.set(name)
+            try:
+                return await func(*args, **kwargs)
+            finally:
+                llm_operation.reset(token)
+        return wrapper
+    return decorator
+
+
+def stats() -> dict:
+    return {
+        "primary": client.stats(),
+        "fallback": fallback_client.stats() if fallback_client else None,
+        "coalesced": single_flight.coalesced,
+        "in_flight": single_flight.in_flight(),
+    }
+
+
+async def _generate_text(prompt: str, llm: Optional[ResilientClient] = None, fresh: bool = False) -> str:
     """
-    Generates content for a specific document section using the Gemini API.
+    Returns the model's text for a prompt, served from the response cache
+    when an identical prompt was answered before, unless `fresh` is set.
+    Callers asking for the same prompt while it is in flight share that
+    call; it runs with the first caller's context, so its tokens are charged
+    to that user only.
     """
+    llm = llm or client
+    key = make_key(llm.model_name, prompt)
+    if not settings.LLM_SINGLE_FLIGHT_ENABLED:
+        return await _fetch_text(key, prompt, llm, fresh)
+    operation = llm_operation.get()
     try:
-        prompt = (
-            f"You are an expert business document writer. "
-            f"The main topic of the document is: '{main_topic}'. "
-            f"The specific section you need to write is: '{section_title}'. "
-            f"Please write detailed, professional content for this section. "
-            f"Do not include the section title itself in your response, only the content."
+        return await single_flight.do(
+            # A fresh call must not share a call that may be answered from the cache.
+            f"fresh:{key}" if fresh else key,
+            lambda: _fetch_text(key, prompt, llm, fresh),
+            on_coalesced=lambda: LLM_COALESCED.labels(operation).inc()
         )
-        response = await model.generate_content_async(prompt)
-        return response.text
+    except QuotaExceeded as e:
+        # Another user's quota stopped the shared call; ours may still allow it.
+        if e.user_id == llm_user.get():
+            raise
+        return await _fetch_text(key, prompt, llm, fresh)
+
+
+async def _fetch_text(key: str, prompt: str, llm: ResilientClient, fresh: bool = False) -> str:
+    if not settings.LLM_CACHE_ENABLED:
+        return (await llm.complete(prompt)).text
+    cached = None if fresh else await llm_cache.get(key)
+    if cached is not None:
+        return cached
+    started = time.perf_counter()
+    text = (await llm.complete(prompt)).text
+    llm_cache.record_upstream_time(time.perf_counter() - started)
+    await llm_cache.set(key, text)
+    return text
+
+
+async def _generate_stream(prompt: str, on_delta: Callable[[str], None], fresh: bool = False) -> str:
+    """
+    Streaming counterpart of `_generate_text`. Every text chunk is handed to
+    `on_delta` as it arrives and the full text is returned at the end. A cache
+    hit is delivered as a single chunk.
+    """
+    key = make_key(client.model_name, prompt)
+    if settings.LLM_CACHE_ENABLED and not fresh:
+        cached = await llm_cache.get(key)
+        if cached is not None:
+            on_delta(cached)
+            return cached
+
+    parts = []
+    started = time.perf_counter()
+    async for text in client.stream(prompt):
+        parts.append(text)
+        on_delta(text)
+    text = "".join(parts)
+    if settings.LLM_CACHE_ENABLED:
+        llm_cache.record_upstream_time(time.perf_counter() - started)
+        await llm_cache.set(key, text)
+    return text
+
+
+def _section_prompt(main_topic: str, section_title: str) -> str:
+    return (
+        f"You are an expert business document writer. "
+        f"The main topic of the document is: '{main_topic}'. "
+        f"The specific section you need to write is: '{section_title}'. "
+        f"Please write detailed, professional content for this section. "
+        f"Do not include the section title itself in your response, only the content."
+    )
+
+
+@_operation("generate")
+async def generate_content_for_section(main_topic: str, section_title: str, fresh: bool = False) -> str:
+    """
+    Generates content for a specific document section using the Gemini API.
+    Raises `LLMError` on failure, or `QuotaExceeded`, so no error text is
+    ever stored as content. With `fresh`, e.g. when the user regenerates a
+    section, the response cache is not consulted, though the new text is
+    still stored in it.
+    """
+    try:
+        prompt = _section_prompt(main_topic, section_title)
+        return await _generate_text(prompt, fresh=fresh)
+    except (QuotaExceeded, LLMError):
+        raise
     except Exception as e:
         print("--- DETAILED ERROR IN generate_content_for_section ---")
         traceback.print_exc()
         print("----------------------------------------------------")
-        return "Error: Could not generate content due to an API issue."
+        raise LLMError("Could not generate content due to an API issue.") from e
 
 
-async def refine_content_for_section(original_content: str, refinement_prompt: str) -> str:
+@_operation("generate")
+async def stream_content_for_section(
+    main_topic: str,
+    section_title: str,
+    on_delta: Optional[Callable[[str], None]] = None,
+    fresh: bool = False
+) -> str:
+    """
+    Same as `generate_content_for_section`, but when `on_delta` is given the
+    response is streamed and each text chunk is passed to it as it arrives.
+    """
+    if on_delta is None:
+        return await generate_content_for_section(main_topic, section_title, fresh=fresh)
     try:
-        prompt = (
-            f"You are a world-class editor. Your task is to refine the following text based on a specific instruction.\n\n"
-            f"--- Original Text ---\n{original_content}\n\n"
-            f"--- Instruction ---\n{refinement_prompt}\n\n"
-            f"Please provide only the fully refined text as your response."
+        return await _generate_stream(_section_prompt(main_topic, section_title), on_delta, fresh=fresh)
+    except (QuotaExceeded, LLMError):
+        raise
+    except Exception as e:
+        print("--- DETAILED ERROR IN stream_content_for_section ---")
+        traceback.print_exc()
+        print("--------------------------------------------------")
+        raise LLMError("Could not generate content due to an API issue.") from e
+
+
+async def generate_contents_for_sections(
+    main_topic: str, section_titles: List[str], fresh: bool = False
+) -> List[str]:
+    """
+    Generates content for every section concurrently. Results are returned in
+    the same order as `section_titles`, exactly as a sequential run would.
+    Raises `LLMError` or `QuotaExceeded` if any section fails; the others
+    are then cancelled.
+    """
+    tasks = [
+        asyncio.ensure_future(
+            generate_content_for_section(main_topic=main_topic, section_title=title, fresh=fresh)
         )
-        response = await model.generate_content_async(prompt)
-        return response.text
+        for title in section_titles
+    ]
+    try:
+        return await asyncio.gather(*tasks)
+    except BaseException:
+        for task in tasks:
+            task.cancel()
+        raise
+
+
+def _split_into_chunks(text: str, max_chars: int) -> List[str]:
+    """
+    Groups paragraphs (blank-line separated) into chunks of at most
+    `max_chars`. A paragraph longer than that becomes a chunk of its own;
+    paragraphs are never split.
+    """
+    chunks, current, size = [], [], 0
+    for paragraph in _PARAGRAPH_BREAK.split(text.strip()):
+        if current and size + len(paragraph) > max_chars:
+            chunks.append("\n\n".join(current))
+            current, size = [], 0
+        current.append(paragraph)
+        size += len(paragraph) + 2
+    if current:
+        chunks.append("\n\n".join(current))
+    return chunks
+
+
+def _quoted_phrases(instruction: str) -> List[str]:
+    """Phrases the instruction quotes, e.g. `replace "ACME Corp" with "Acme"`."""
+    return [phrase.lower() for phrase in _QUOTED.findall(instruction) if phrase.strip()]
+
+
+def _refine_prompt(original_content: str, refinement_prompt: str) -> str:
+    return (
+        f"You are a world-class editor. Your task is to refine the following text based on a specific instruction.\n\n"
+        f"--- Original Text ---\n{original_content}\n\n"
+        f"--- Instruction ---\n{refinement_prompt}\n\n"
+        f"Please provide only the fully refined text as your response."
+    )
+
+
+def _refine_chunk_prompt(chunks: List[str], index: int, refinement_prompt: str) -> str:
+    before = chunks[index - 1][-_CHUNK_CONTEXT_CHARS:] if index > 0 else "(start of text)"
+    after = chunks[index + 1][:_CHUNK_CONTEXT_CHARS] if index + 1 < len(chunks) else "(end of text)"
+    return (
+        f"You are a world-class editor refining a long text part by part, based on a specific instruction. "
+        f"This is part {index + 1} of {len(chunks)}; the other parts are edited separately with the same instruction.\n\n"
+        f"--- Instruction ---\n{refinement_prompt}\n\n"
+        f"--- Text just before this part (for context only, do not repeat it) ---\n{before}\n\n"
+        f"--- Part to refine ---\n{chunks[index]}\n\n"
+        f"--- Text just after this part (for context only, do not repeat it) ---\n{after}\n\n"
+        f"Provide only the refined version of this part as your response. "
+        f"If the instruction requires no change to this part, respond with exactly {_UNCHANGED}."
+    )
+
+
+async def _refine_chunked(original_content: str, refinement_prompt: str) -> str:
+    """
+    Refines paragraph-bounded chunks concurrently and stitches them back in
+    order. When the instruction quotes phrases from the text, only chunks
+    containing one of them are sent; the model may also answer that a chunk
+    needs no change.
+    """
+    chunks = _split_into_chunks(original_content, settings.REFINE_CHUNK_CHARS)
+    # Quotes that don't occur in the text (`make the tone "more formal"`) don't
+    # make an instruction local.
+    lowered = original_content.lower()
+    phrases = [phrase for phrase in _quoted_phrases(refinement_prompt) if phrase in lowered]
+
+    async def refine(index: int) -> str:
+        if phrases and not any(phrase in chunks[index].lower() for phrase in phrases):
+            return chunks[index]
+        text = (await _generate_text(_refine_chunk_prompt(chunks, index, refinement_prompt))).strip()
+        return chunks[index] if not text or text == _UNCHANGED else text
+
+    tasks = [asyncio.ensure_future(refine(i)) for i in range(len(chunks))]
+    try:
+        refined = await asyncio.gather(*tasks)
+    except BaseException:
+        # One failed part fails the whole refinement; don't leave the rest running.
+        for task in tasks:
+            task.cancel()
+        raise
+    return "\n\n".join(refined)
+
+
+@_operation("refine")
+async def refine_content_for_section(
+    original_content: str,
+    refinement_prompt: str,
+    mode: str = "auto"
+) -> str:
+    """
+    Rewrites a section according to an instruction. Raises `LLMError` on
+    failure, or `QuotaExceeded`, so the caller keeps the original text
+    instead of an error message.
+
+    `mode` is "whole" (one prompt), "chunked" (see `_refine_chunked`) or
+    "auto", which chunks texts of at least REFINE_CHUNKED_MIN_CHARS.
+    """
+    chunked = mode == "chunked" or (
+        mode == "auto" and len(original_content or "") >= settings.REFINE_CHUNKED_MIN_CHARS
+    )
+    try:
+        if chunked:
+            return await _refine_chunked(original_content, refinement_prompt)
+        return await _generate_text(_refine_prompt(original_content, refinement_prompt))
+    except QuotaExceeded:
+        raise
     except Exception as e:
         print("--- DETAILED ERROR IN refine_content_for_section ---")
         traceback.print_exc()
         print("--------------------------------------------------")
-        return "Error: Could not refine content due to an API issue."
+        raise LLMError("Could not refine content due to an API issue.") from e
 
 
+@_operation("outline")
 async def generate_outline(main_topic: str, doc_type: str) -> List[str]:
     """
-    Generates a list of section headers or slide titles for a given topic.
+    Generates a list of section headers or slide titles for a given topic,
+    asking the fallback model when the main one is unavailable.
     """
     item_type = "section headers" if doc_type == "docx" else "slide titles"
     try:
@@ -62,8 +348,14 @@ async def generate_outline(main_topic: str, doc_type: str) -> List[str]:
             f"Return the list as a simple comma-separated string, without numbers or bullets. "
             f"For example: Introduction, Market Analysis, Competitive Landscape, Conclusion"
         )
-        response = await model.generate_content_async(prompt)
-        return [item.strip() for item in response.text.split(',')]
+        try:
+            text = await _generate_text(prompt)
+        except LLMError:
+            if fallback_client is None:
+                raise
+            print(f"Outline: {client.model_name} unavailable, using {fallback_client.model_name}")
+            text = await _generate_text(prompt, llm=fallback_client)
+        return [item.strip() for item in text.split(',')]
     except Exception as e:
         print("--- DETAILED ERROR IN generate_outline ---")
         traceback.print_exc()
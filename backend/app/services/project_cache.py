@@ -0,0 +1,129 @@
+import time
+from collections import OrderedDict
+from typing import Optional
+
+from sqlalchemy import event, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from ..core.config import settings
+from ..models.project import Project
+
+_PENDING = "project_cache_pending"
+
+
+class CachedProject:
+    __slots__ = ("version", "owner_id", "body", "checked_at")
+
+    def __init__(self, version: int, owner_id: int, body: Optional[bytes], checked_at: float):
+        self.version = version
+        self.owner_id = owner_id
+        self.body = body
+        self.checked_at = checked_at
+
+
+class ProjectCache:
+    """
+    Bounded LRU of project id -> (version, owner, serialized detail response).
+    An entry is trusted for `version_ttl_seconds` after its version was read
+    from the database, and dropped as soon as this process commits a write to
+    the project. A body is only ever served for the version it was built from.
+    """
+
+    def __init__(self, max_entries: int, max_bytes: int, version_ttl_seconds: float):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.version_ttl_seconds = version_ttl_seconds
+        self._entries: "OrderedDict[int, CachedProject]" = OrderedDict()
+        self._bytes = 0
+        # Bumped by every invalidation; a read that started before one must
+        # not store what it read.
+        self.generation = 0
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, project_id: int) -> Optional[CachedProject]:
+        """The project's entry, if its version was checked recently enough."""
+        entry = self._entries.get(project_id)
+        if entry is None:
+            return None
+        if time.monotonic() - entry.checked_at > self.version_ttl_seconds:
+            self._remove(project_id)
+            return None
+        self._entries.move_to_end(project_id)
+        return entry
+
+    def body(self, entry: Optional[CachedProject]) -> Optional[bytes]:
+        """The cached response for `entry`, if any; counts a hit or a miss."""
+        if entry is not None and entry.body is not None:
+            self.hits += 1
+            return entry.body
+        self.misses += 1
+        return None
+
+    def store(
+        self, project_id: int, version: int, owner_id: int,
+        body: Optional[bytes], generation: int
+    ) -> CachedProject:
+        """
+        Records what a read that started at `generation` saw. A body already
+        cached for the same version is kept. Returns the entry even when it
+        could not be stored.
+        """
+        previous = self._entries.get(project_id)
+        if body is None and previous is not None and previous.version == version:
+            body = previous.body
+        entry = CachedProject(version, owner_id, body, time.monotonic())
+        if self.max_entries <= 0 or generation != self.generation:
+            return entry
+        if body is not None and len(body) > self.max_bytes:
+            entry.body = None
+        self._remove(project_id)
+        self._entries[project_id] = entry
+        self._bytes += len(entry.body or b"")
+        while len(self._entries) > self.max_entries or self._bytes > self.max_bytes:
+            self._remove(next(iter(self._entries)))
+        return entry
+
+    def invalidate(self, project_id: int) -> None:
+        self.generation += 1
+        self._remove(project_id)
+
+    def clear(self) -> None:
+        self.generation += 1
+        self._entries.clear()
+        self._bytes = 0
+
+    def _remove(self, project_id: int) -> None:
+        entry = self._entries.pop(project_id, None)
+        if entry is not None:
+            self._bytes -= len(entry.body or b"")
+
+
+project_cache = ProjectCache(
+    max_entries=settings.PROJECT_CACHE_MAX_ENTRIES,
+    max_bytes=settings.PROJECT_CACHE_MAX_BYTES,
+    version_ttl_seconds=settings.PROJECT_VERSION_TTL_SECONDS,
+)
+
+
+async def bump_project_version(db: AsyncSession, project_id: int) -> None:
+    """
+    Marks the project as changed, in the same transaction as the change.
+    Call before committing any write to a project or its sections. The
+    cached entry is dropped once `db` commits; dropping it earlier would let
+    a concurrent read cache the old data again.
+    """
+    await db.execute(update(Project).where(Project.id == project_id).values(version=Project.version + 1))
+    db.sync_session.info.setdefault(_PENDING, set()).add(project_id)
+
+
+@event.listens_for(Session, "after_commit")
+def _invalidate_committed(session):
+    for project_id in session.info.pop(_PENDING, ()):
+        project_cache.invalidate(project_id)
+
+
+@event.listens_for(Session, "after_rollback")
+def _forget_rolled_back(session):
+    session.info.pop(_PENDING, None)
@@ -0,0 +1,71 @@
+import asyncio
+import time
+from typing import Optional
+
+
+class TokenBucket:
+    """
+    Classic token bucket. `acquire` waits until enough tokens are available,
+    `consume` debits tokens after the fact and may push the balance negative,
+    which simply delays the next `acquire`.
+    """
+
+    def __init__(self, capacity: float, refill_per_second: float):
+        self.capacity = float(capacity)
+        self.refill_per_second = float(refill_per_second)
+        self._tokens = float(capacity)
+        self._updated_at = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        elapsed = now - self._updated_at
+        self._updated_at = now
+        self._tokens = min(self.capacity, self._tokens + elapsed * self.refill_per_second)
+
+    async def acquire(self, amount: float = 1.0) -> None:
+        # A single request larger than the bucket would never fit; let it
+        # through once the bucket is full instead of waiting forever.
+        amount = min(float(amount), self.capacity)
+        async with self._lock:
+            while True:
+                self._refill()
+                if self._tokens >= amount:
+                    self._tokens -= amount
+                    return
+                await asyncio.sleep((amount - self._tokens) / self.refill_per_second)
+
+    def consume(self, amount: float) -> None:
+        self._refill()
+        self._tokens -= amount
+
+
+class RateLimiter:
+    """
+    Requests-per-minute and tokens-per-minute limits shared by every LLM call
+    in the process. Either limit can be disabled by passing 0.
+    """
+
+    def __init__(self, requests_per_minute: int, tokens_per_minute: int):
+        self._requests: Optional[TokenBucket] = None
+        self._tokens: Optional[TokenBucket] = None
+        if requests_per_minute > 0:
+            self._requests = TokenBucket(requests_per_minute, requests_per_minute / 60.0)
+        if tokens_per_minute > 0:
+            self._tokens = TokenBucket(tokens_per_minute, tokens_per_minute / 60.0)
+
+    async def acquire(self, estimated_tokens: int) -> None:
+        if self._requests is not None:
+            await self._requests.acquire(1)
+        if self._tokens is not None:
+            await self._tokens.acquire(estimated_tokens)
+
+    def record_usage(self, estimated_tokens: int, actual_tokens: int) -> None:
+        """Corrects the token bucket once the real usage of a call is known."""
+        if self._tokens is not None and actual_tokens:
+            self._tokens.consume(actual_tokens - estimated_tokens)
+
+
+def estimate_tokens(text: str) -> int:
+    """Rough prompt size estimate (~4 characters per token)."""
+    return max(1, len(text) // 4)
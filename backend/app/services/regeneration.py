@@ -0,0 +1,133 @@
+from dataclasses import dataclass, field
+from typing import Collection, Dict, List, Tuple
+
+from sqlalchemy import delete, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.future import select
+from sqlalchemy.orm import load_only
+
+from ..models.document_section import DocumentSection
+from ..models.project import Project
+from ..models.refinement_history import RefinementHistory
+from . import llm_service, search_index
+from .project_cache import bump_project_version
+from .section_keys import generation_key, section_key
+
+
+@dataclass
+class RegenerationPlan:
+    # Existing sections to keep, with their new section_order.
+    keep: List[Tuple[DocumentSection, int]] = field(default_factory=list)
+    # Indexes into the requested titles that need new content.
+    generate: List[int] = field(default_factory=list)
+    # Existing sections that are no longer wanted.
+    delete_ids: List[int] = field(default_factory=list)
+    # Generated index -> the unwanted section at that position, which a
+    # section-by-section writer removes together with its replacement.
+    replaces: Dict[int, int] = field(default_factory=dict)
+
+
+async def plan_regeneration(
+    db: AsyncSession, project_id: int, main_topic: str, section_titles: List[str]
+) -> RegenerationPlan:
+    """
+    Matches the requested titles against the project's stored sections by
+    generation key. Matching sections are kept as they are, refinements and
+    comments included; the rest of the titles need generating. Duplicate
+    titles each claim their own stored section. Section content is not loaded.
+    """
+    result = await db.execute(
+        select(DocumentSection)
+        .options(load_only(
+            DocumentSection.id, DocumentSection.section_order,
+            DocumentSection.title, DocumentSection.generation_key
+        ))
+        .where(DocumentSection.project_id == project_id)
+        .order_by(DocumentSection.section_order)
+    )
+    available: Dict[str, List[DocumentSection]] = {}
+    for section in result.scalars().all():
+        available.setdefault(section.generation_key, []).append(section)
+
+    plan = RegenerationPlan()
+    for index, title in enumerate(section_titles):
+        matches = available.get(section_key(main_topic, title))
+        if matches:
+            plan.keep.append((matches.pop(0), index))
+        else:
+            plan.generate.append(index)
+    unwanted = [section for sections in available.values() for section in sections]
+    plan.delete_ids = [section.id for section in unwanted]
+    by_order = {section.section_order: section.id for section in unwanted}
+    plan.replaces = {index: by_order[index] for index in plan.generate if index in by_order}
+    return plan
+
+
+async def delete_sections(db: AsyncSession, section_ids: Collection[int]) -> None:
+    """Deletes sections along with their search rows and refinement history."""
+    if section_ids:
+        section_ids = list(section_ids)
+        await search_index.remove_sections(db, section_ids)
+        await db.execute(delete(RefinementHistory).where(RefinementHistory.section_id.in_(section_ids)))
+        await db.execute(delete(DocumentSection).where(DocumentSection.id.in_(section_ids)))
+
+
+async def apply_plan(
+    db: AsyncSession, project_id: int, plan: RegenerationPlan, already_deleted: Collection[int] = ()
+) -> None:
+    """
+    Deletes the sections that are no longer wanted (except `already_deleted`)
+    and moves the kept ones to their new order. Call it in the transaction
+    that stores the generated sections, so a failed generation changes nothing.
+    """
+    skipped = set(already_deleted)
+    await delete_sections(db, [section_id for section_id in plan.delete_ids if section_id not in skipped])
+    for section, order in plan.keep:
+        if section.section_order != order:
+            await db.execute(
+                update(DocumentSection).where(DocumentSection.id == section.id).values(section_order=order)
+            )
+
+
+async def regenerate_incrementally(
+    db: AsyncSession, project: Project, main_topic: str, section_titles: List[str]
+) -> List[DocumentSection]:
+    """
+    Brings a project's sections in line with `section_titles`, generating
+    content only for titles whose key has no stored section. Returns all
+    sections in their new order. Everything is generated before anything is
+    written, so if generation fails (e.g. `QuotaExceeded`) the project is
+    left as it was.
+    """
+    project_id = project.id
+    plan = await plan_regeneration(db, project_id, main_topic, section_titles)
+    titles = [section_titles[i] for i in plan.generate]
+    contents = []
+    if titles:
+        contents = await llm_service.generate_contents_for_sections(main_topic=main_topic, section_titles=titles)
+
+    project.main_topic = main_topic
+    await search_index.index_project(db, project)
+    await apply_plan(db, project_id, plan)
+    generated = [
+        DocumentSection(
+            title=title,
+            content=content,
+            section_order=index,
+            project_id=project_id,
+            generation_key=generation_key(main_topic, title, content),
+        )
+        for index, title, content in zip(plan.generate, titles, contents)
+    ]
+    db.add_all(generated)
+    await db.flush()
+    await search_index.index_sections(db, generated)
+    await bump_project_version(db, project_id)
+    await db.commit()
+
+    result = await db.execute(
+        select(DocumentSection)
+        .where(DocumentSection.project_id == project_id)
+        .order_by(DocumentSection.section_order)
+    )
+    return list(result.scalars().all())
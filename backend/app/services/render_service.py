@@ -0,0 +1,260 @@
+import asyncio
+import os
+import threading
+import time
+import weakref
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from concurrent.futures import TimeoutError as FutureTimeoutError
+from typing import AsyncIterator, Dict, List, Optional
+
+from ..core.config import settings
+from ..core.metrics import RENDER_BYTES, RENDER_SECONDS
+from .document_service import SectionData, render_document_to_file, save_document
+
+
+class RenderPoolBusy(Exception):
+    """Raised when every render worker is busy and the wait queue is full."""
+
+
+class RenderCancelled(Exception):
+    """Raised inside a render thread when the client went away."""
+
+
+# How often a render thread blocked on a full queue checks for cancellation.
+_PUT_POLL_SECONDS = 0.2
+
+
+def _put_threadsafe(loop, queue: asyncio.Queue, item, cancelled: threading.Event, stall_seconds: float) -> None:
+    """
+    Puts `item` on the loop's queue from a render thread. Waits in short
+    slices so the thread notices cancellation even when nobody is reading
+    the queue, e.g. a response that was dropped before it started.
+    """
+    put = asyncio.run_coroutine_threadsafe(queue.put(item), loop)
+    deadline = time.monotonic() + stall_seconds
+    while True:
+        try:
+            put.result(timeout=_PUT_POLL_SECONDS)
+            return
+        except FutureTimeoutError:
+            pass
+        # cancel() fails if the put completed in the meantime.
+        if (cancelled.is_set() or time.monotonic() >= deadline) and put.cancel():
+            raise RenderCancelled()
+
+
+class RenderStats:
+    """Render time per document type."""
+
+    def __init__(self):
+        self._stats: Dict[str, dict] = {}
+
+    def record(self, document_type: str, seconds: float, size: int) -> None:
+        stats = self._stats.setdefault(
+            document_type, {"count": 0, "total_seconds": 0.0, "max_seconds": 0.0, "total_bytes": 0}
+        )
+        stats["count"] += 1
+        stats["total_seconds"] += seconds
+        stats["max_seconds"] = max(stats["max_seconds"], seconds)
+        stats["total_bytes"] += size
+        RENDER_SECONDS.labels(document_type).observe(seconds)
+        RENDER_BYTES.labels(document_type).observe(size)
+
+    def snapshot(self) -> Dict[str, dict]:
+        return {
+            document_type: {
+                **stats,
+                "avg_seconds": stats["total_seconds"] / stats["count"] if stats["count"] else 0.0,
+            }
+            for document_type, stats in self._stats.items()
+        }
+
+
+class _ChunkWriter:
+    """
+    File-like object handed to the zip writer in a render thread. Output is
+    batched into chunks and pushed onto a bounded asyncio queue; when the
+    queue is full the render thread blocks, so memory stays bounded by
+    `maxsize * chunk_size` no matter how large the document is. Everything
+    is also copied to `tee` so the finished file can be cached.
+    """
+
+    def __init__(
+        self, loop, queue: asyncio.Queue, tee, cancelled: threading.Event,
+        chunk_size: int, stall_seconds: float
+    ):
+        self._loop = loop
+        self._queue = queue
+        self._tee = tee
+        self._cancelled = cancelled
+        self._chunk_size = chunk_size
+        self._stall_seconds = stall_seconds
+        self._buffer = bytearray()
+        self._stopped = False
+        self.size = 0
+
+    def _put(self, item) -> None:
+        try:
+            _put_threadsafe(self._loop, self._queue, item, self._cancelled, self._stall_seconds)
+        except RenderCancelled:
+            self._stopped = True
+            raise
+
+    def write(self, data) -> int:
+        if self._stopped:
+            # The abandoned zip writer still flushes its end record when collected.
+            return len(data)
+        data = bytes(data)
+        self._tee.write(data)
+        self._buffer += data
+        self.size += len(data)
+        if len(self._buffer) >= self._chunk_size:
+            self.flush()
+        return len(data)
+
+    def flush(self) -> None:
+        if self._buffer:
+            chunk, self._buffer = bytes(self._buffer), bytearray()
+            self._put(chunk)
+
+
+class RenderPool:
+    """
+    Runs python-docx/python-pptx rendering outside the event loop. At most
+    `workers` documents render at once and at most `max_queue` more wait;
+    beyond that callers get RenderPoolBusy instead of piling up.
+
+    With a process pool, documents are rendered straight into a file. With
+    a thread pool, `stream` also lets the response start sending the zip
+    while the document is still being written.
+    """
+
+    def __init__(
+        self, kind: str, workers: int, max_queue: int,
+        chunk_size: int = 64 * 1024, stall_seconds: float = 60.0
+    ):
+        self.kind = kind
+        self.workers = max(1, workers)
+        self.max_queue = max_queue
+        self.chunk_size = chunk_size
+        self.stall_seconds = stall_seconds
+        self.stats = RenderStats()
+        self._executor: Optional[Executor] = None
+        self._pending = 0
+
+    def _get_executor(self) -> Executor:
+        if self._executor is None:
+            if self.kind == "thread":
+                self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="render")
+            else:
+                self._executor = ProcessPoolExecutor(max_workers=self.workers)
+        return self._executor
+
+    @property
+    def pending(self) -> int:
+        return self._pending
+
+    @property
+    def can_stream(self) -> bool:
+        return self.kind == "thread"
+
+    def _reserve(self) -> None:
+        if self._pending >= self.workers + self.max_queue:
+            raise RenderPoolBusy()
+        self._pending += 1
+
+    async def render_to_file(self, document_type: str, sections: List[SectionData], path: str) -> int:
+        """Renders into `path` and returns the file size."""
+        self._reserve()
+        try:
+            loop = asyncio.get_running_loop()
+            size, seconds = await loop.run_in_executor(
+                self._get_executor(), render_document_to_file, document_type, sections, path
+            )
+        finally:
+            self._pending -= 1
+        self.stats.record(document_type, seconds, size)
+        return size
+
+    def stream(self, document_type: str, sections: List[SectionData], tee_path: str) -> AsyncIterator[bytes]:
+        """
+        Starts rendering on the thread pool and returns an async iterator of
+        zip chunks. The full output is also written to `tee_path`. Raises
+        RenderPoolBusy right away, before any response has been started.
+
+        The render stops, and frees its worker, when the iterator is closed,
+        garbage collected (even if it was never started), or not read from
+        for `stall_seconds`. A stopped render removes its partial `tee_path`.
+        """
+        if not self.can_stream:
+            raise RuntimeError("Streaming renders need the thread executor")
+        self._reserve()
+        loop = asyncio.get_running_loop()
+        queue: asyncio.Queue = asyncio.Queue(maxsize=8)
+        cancelled = threading.Event()
+
+        def discard_partial():
+            try:
+                os.remove(tee_path)
+            except FileNotFoundError:
+                pass
+
+        def produce():
+            try:
+                with open(tee_path, "wb") as tee:
+                    writer = _ChunkWriter(loop, queue, tee, cancelled, self.chunk_size, self.stall_seconds)
+                    seconds = save_document(document_type, sections, writer)
+                    writer.flush()
+                result = ("done", seconds, writer.size)
+            except RenderCancelled:
+                discard_partial()
+                return
+            except BaseException as e:
+                result = ("error", e, 0)
+            try:
+                _put_threadsafe(loop, queue, result, cancelled, self.stall_seconds)
+            except RenderCancelled:
+                discard_partial()
+
+        future = loop.run_in_executor(self._get_executor(), produce)
+
+        def release(_):
+            self._pending -= 1
+        future.add_done_callback(release)
+
+        async def chunks():
+            try:
+                while True:
+                    item = await queue.get()
+                    if isinstance(item, bytes):
+                        yield item
+                        continue
+                    kind, value, size = item
+                    if kind == "error":
+                        raise value
+                    self.stats.record(document_type, value, size)
+                    return
+            finally:
+                # Unblock a render thread waiting on a full queue, then let it stop.
+                cancelled.set()
+                while not queue.empty():
+                    queue.get_nowait()
+                await asyncio.shield(future)
+
+        iterator = chunks()
+        # An async generator that never started doesn't run its `finally`.
+        weakref.finalize(iterator, cancelled.set)
+        return iterator
+
+    def shutdown(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+
+render_pool = RenderPool(
+    kind=settings.EXPORT_RENDER_EXECUTOR,
+    workers=settings.EXPORT_RENDER_WORKERS,
+    max_queue=settings.EXPORT_RENDER_MAX_QUEUE,
+    stall_seconds=settings.EXPORT_STREAM_STALL_SECONDS,
+)
@@ -0,0 +1,250 @@
+# Full-text search over a user's projects and sections.
+#
+# SQLite uses an FTS5 table, PostgreSQL a table with a weighted tsvector
+# column and a GIN index; other databases have no search. There is one row
+# per project (title, main topic) and one per section (title, content).
+# Section rows use the section id as document id, project rows the negated
+# project id. Section content is compressed at rest, so triggers can't feed
+# the index: it is written by the app, in the same transaction as the change
+# it reflects.
+
+import html
+import re
+from typing import Iterable, List, Optional
+
+from sqlalchemy import text
+from sqlalchemy.engine import Connection
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.future import select
+
+from ..models.document_section import DocumentSection
+from ..models.project import Project
+
+_SQLITE_DDL = (
+    # `owner` holds a "u<id>" token, so owner scoping is part of the FTS
+    # query and never scans other users' matches. Titles weigh 4x the body.
+    """CREATE VIRTUAL TABLE IF NOT EXISTS search_documents USING fts5(
+        title, body, owner, project_id UNINDEXED, section_id UNINDEXED,
+        tokenize = 'porter unicode61 remove_diacritics 2'
+    )""",
+    "INSERT INTO search_documents(search_documents, rank) VALUES ('rank', 'bm25(4.0, 1.0, 0.0, 0.0, 0.0)')",
+)
+
+_POSTGRES_DDL = (
+    """CREATE TABLE IF NOT EXISTS search_documents (
+        doc_id BIGINT PRIMARY KEY,
+        owner_id INTEGER NOT NULL,
+        project_id INTEGER NOT NULL,
+        section_id INTEGER,
+        title TEXT NOT NULL,
+        body TEXT NOT NULL,
+        tsv TSVECTOR GENERATED ALWAYS AS (
+            setweight(to_tsvector('english', title), 'A') || setweight(to_tsvector('english', body), 'B')
+        ) STORED
+    )""",
+    "CREATE INDEX IF NOT EXISTS ix_search_documents_tsv ON search_documents USING GIN (tsv)",
+    "CREATE INDEX IF NOT EXISTS ix_search_documents_owner_id ON search_documents (owner_id)",
+)
+
+# The owner is looked up from the project, so callers only pass what changed.
+_SQLITE_INSERT = text(
+    "INSERT INTO search_documents (rowid, title, body, owner, project_id, section_id) "
+    "SELECT :doc_id, :title, :body, 'u' || owner_id, id, :section_id FROM projects WHERE id = :project_id"
+)
+_SQLITE_DELETE = text("DELETE FROM search_documents WHERE rowid = :doc_id")
+
+_POSTGRES_UPSERT = text(
+    "INSERT INTO search_documents (doc_id, owner_id, project_id, section_id, title, body) "
+    "SELECT :doc_id, owner_id, id, :section_id, :title, :body FROM projects WHERE id = :project_id "
+    "ON CONFLICT (doc_id) DO UPDATE SET title = EXCLUDED.title, body = EXCLUDED.body"
+)
+_POSTGRES_DELETE = text("DELETE FROM search_documents WHERE doc_id = :doc_id")
+
+# Match markers in titles and snippets; replaced by <mark> after escaping.
+_START, _STOP = "\x02", "\x03"
+
+# Snippets are computed inside the ranked, limited query: FTS5 evaluates them
+# for the returned page only, while filtering an outer query by rowid would
+# rank every match again.
+_SQLITE_SEARCH = text("""
+    SELECT hits.*, projects.title AS project_title
+    FROM (
+        SELECT rowid AS doc_id, project_id, section_id,
+               highlight(search_documents, 0, char(2), char(3)) AS title,
+               snippet(search_documents, 1, char(2), char(3), '…', 24) AS snippet,
+               -rank AS score
+        FROM search_documents
+        WHERE search_documents MATCH :query
+        ORDER BY rank
+        LIMIT :limit OFFSET :offset
+    ) AS hits
+    JOIN projects ON projects.id = hits.project_id
+    ORDER BY hits.score DESC
+""")
+
+_POSTGRES_SEARCH = text("""
+    WITH q AS (SELECT websearch_to_tsquery('english', :query) AS query),
+    page AS (
+        SELECT d.doc_id, d.project_id, d.section_id, d.title, d.body, ts_rank_cd(d.tsv, q.query) AS score
+        FROM search_documents d, q
+        WHERE d.owner_id = :owner_id AND d.tsv @@ q.query
+        ORDER BY score DESC, d.doc_id
+        LIMIT :limit OFFSET :offset
+    )
+    SELECT page.doc_id, page.project_id, page.section_id, projects.title AS project_title,
+           ts_headline('english', page.title, q.query, :title_options) AS title,
+           ts_headline('english', page.body, q.query, :snippet_options) AS snippet,
+           page.score
+    FROM page JOIN projects ON projects.id = page.project_id, q
+    ORDER BY page.score DESC, page.doc_id
+""")
+_HEADLINE = f"StartSel={_START}, StopSel={_STOP}"
+
+_WORD = re.compile(r"\w+")
+_MAX_TERMS = 16
+
+
+def _dialect(bind) -> Optional[str]:
+    name = bind.dialect.name
+    return name if name in ("sqlite", "postgresql") else None
+
+
+def _project_row(project_id: int, title: Optional[str], main_topic: Optional[str]) -> dict:
+    return {
+        "doc_id": -project_id, "project_id": project_id, "section_id": None,
+        "title": title or "", "body": main_topic or "",
+    }
+
+
+def _section_row(section_id: int, project_id: int, title: Optional[str], content: Optional[str]) -> dict:
+    return {
+        "doc_id": section_id, "project_id": project_id, "section_id": section_id,
+        "title": title or "", "body": content or "",
+    }
+
+
+def create_search_index(conn: Connection) -> None:
+    """Creates the search table if the database supports it. Safe to re-run."""
+    dialect = _dialect(conn)
+    if dialect is None:
+        return
+    for statement in _SQLITE_DDL if dialect == "sqlite" else _POSTGRES_DDL:
+        conn.execute(text(statement))
+
+
+def rebuild_search_index(conn: Connection) -> None:
+    """Re-indexes every project and section from scratch."""
+    dialect = _dialect(conn)
+    if dialect is None:
+        return
+    conn.execute(text("DELETE FROM search_documents"))
+    insert = _SQLITE_INSERT if dialect == "sqlite" else _POSTGRES_UPSERT
+    projects = Project.__table__
+    rows = [
+        _project_row(row.id, row.title, row.main_topic)
+        for row in conn.execute(projects.select().with_only_columns(projects.c.id, projects.c.title, projects.c.main_topic))
+    ]
+    if rows:
+        conn.execute(insert, rows)
+
+    sections = DocumentSection.__table__
+    result = conn.execution_options(yield_per=1000).execute(
+        sections.select().with_only_columns(
+            sections.c.id, sections.c.project_id, sections.c.title, sections.c.content
+        )
+    )
+    for batch in result.partitions():
+        conn.execute(insert, [_section_row(*row) for row in batch])
+
+
+async def _write(db: AsyncSession, rows: List[dict]) -> None:
+    dialect = _dialect(db.bind)
+    if dialect is None or not rows:
+        return
+    if dialect == "sqlite":
+        # FTS5 has no upsert.
+        await db.execute(_SQLITE_DELETE, [{"doc_id": row["doc_id"]} for row in rows])
+        await db.execute(_SQLITE_INSERT, rows)
+    else:
+        await db.execute(_POSTGRES_UPSERT, rows)
+
+
+async def _delete(db: AsyncSession, doc_ids: List[int]) -> None:
+    dialect = _dialect(db.bind)
+    if dialect is None or not doc_ids:
+        return
+    statement = _SQLITE_DELETE if dialect == "sqlite" else _POSTGRES_DELETE
+    await db.execute(statement, [{"doc_id": doc_id} for doc_id in doc_ids])
+
+
+async def index_project(db: AsyncSession, project) -> None:
+    """(Re-)indexes a project's title and main topic. Doesn't commit."""
+    await _write(db, [_project_row(project.id, project.title, project.main_topic)])
+
+
+async def index_sections(db: AsyncSession, sections: Iterable) -> None:
+    """(Re-)indexes flushed DocumentSection rows. Doesn't commit."""
+    await _write(db, [
+        _section_row(section.id, section.project_id, section.title, section.content)
+        for section in sections
+    ])
+
+
+async def remove_sections(db: AsyncSession, section_ids: Iterable[int]) -> None:
+    await _delete(db, list(section_ids))
+
+
+async def remove_project_sections(db: AsyncSession, project_id: int) -> None:
+    """Drops a project's sections from the index; call before deleting them."""
+    result = await db.execute(select(DocumentSection.id).where(DocumentSection.project_id == project_id))
+    await _delete(db, list(result.scalars().all()))
+
+
+def _fts5_query(owner_id: int, query: str) -> Optional[str]:
+    # Every word must match (as a quoted term, so FTS5 syntax in user input is inert).
+    terms = _WORD.findall(query)[:_MAX_TERMS]
+    if not terms:
+        return None
+    return f'owner : "u{owner_id}" AND {{title body}} : (' + " ".join(f'"{term}"' for term in terms) + ")"
+
+
+def _marked(value: Optional[str]) -> str:
+    return html.escape(value or "").replace(_START, "<mark>").replace(_STOP, "</mark>")
+
+
+def is_available(db: AsyncSession) -> bool:
+    return _dialect(db.bind) is not None
+
+
+async def search(db: AsyncSession, owner_id: int, query: str, limit: int, offset: int = 0) -> List[dict]:
+    """
+    The owner's best matching projects and sections, best first. Titles and
+    snippets are HTML-escaped with matches wrapped in <mark>.
+    """
+    dialect = _dialect(db.bind)
+    if dialect == "sqlite":
+        match = _fts5_query(owner_id, query)
+        if match is None:
+            return []
+        result = await db.execute(_SQLITE_SEARCH, {"query": match, "limit": limit, "offset": offset})
+    elif dialect == "postgresql":
+        result = await db.execute(_POSTGRES_SEARCH, {
+            "query": query, "owner_id": owner_id, "limit": limit, "offset": offset,
+            "title_options": _HEADLINE + ", HighlightAll=true",
+            "snippet_options": _HEADLINE + ", MaxWords=24, MinWords=12, MaxFragments=1",
+        })
+    else:
+        return []
+
+    return [
+        {
+            "kind": "section" if row.section_id is not None else "project",
+            "project_id": row.project_id,
+            "project_title": row.project_title,
+            "section_id": row.section_id,
+            "title": _marked(row.title),
+            "snippet": _marked(row.snippet),
+            "score": round(float(row.score), 4),
+        }
+        for row in result
+    ]
@@ -0,0 +1,23 @@
+import hashlib
+from typing import Optional
+
+
+def _normalize(text: str) -> str:
+    return " ".join((text or "").split()).casefold()
+
+
+def section_key(main_topic: str, title: str) -> str:
+    """
+    Stable key of what a section's content was generated from. Case and
+    whitespace differences don't change it; any other edit of the topic or
+    the title does.
+    """
+    raw = f"{_normalize(main_topic)}\x1f{_normalize(title)}"
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()[:32]
+
+
+def generation_key(main_topic: str, title: str, content: Optional[str]) -> Optional[str]:
+    """The key to store with freshly generated content; None if there is none."""
+    if not content:
+        return None
+    return section_key(main_topic, title)
@@ -0,0 +1,58 @@
+import asyncio
+from typing import Awaitable, Callable, Dict, Optional, TypeVar
+
+T = TypeVar("T")
+
+
+class _Flight:
+    __slots__ = ("task", "waiters")
+
+    def __init__(self, task: asyncio.Task):
+        self.task = task
+        self.waiters = 1
+
+
+class SingleFlight:
+    """
+    Runs at most one call per key at a time: callers arriving while a call
+    for their key is in flight await that call's result (or exception)
+    instead of starting their own. The call runs in a task of its own, so a
+    cancelled caller, e.g. a disconnected client, only stops waiting; the
+    call itself is cancelled once every caller waiting for it has gone.
+    """
+
+    def __init__(self):
+        self._flights: Dict[str, _Flight] = {}
+        self.coalesced = 0
+
+    def _finished(self, key: str, flight: _Flight, task: asyncio.Task) -> None:
+        if self._flights.get(key) is flight:
+            del self._flights[key]
+        if not task.cancelled():
+            # Retrieve the exception so an error nobody waited for isn't logged as unhandled.
+            task.exception()
+
+    async def do(self, key: str, call: Callable[[], Awaitable[T]],
+                 on_coalesced: Optional[Callable[[], None]] = None) -> T:
+        flight = self._flights.get(key)
+        if flight is None:
+            flight = self._flights[key] = _Flight(asyncio.ensure_future(call()))
+            flight.task.add_done_callback(lambda task: self._finished(key, flight, task))
+        else:
+            flight.waiters += 1
+            self.coalesced += 1
+            if on_coalesced is not None:
+                on_coalesced()
+        try:
+            return await asyncio.shield(flight.task)
+        except asyncio.CancelledError:
+            flight.waiters -= 1
+            if flight.waiters == 0 and not flight.task.done():
+                # Later callers must not join a call that is being cancelled.
+                if self._flights.get(key) is flight:
+                    del self._flights[key]
+                flight.task.cancel()
+            raise
+
+    def in_flight(self) -> int:
+        return len(self._flights)
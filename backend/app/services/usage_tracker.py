@@ -0,0 +1,152 @@
+import asyncio
+import traceback
+from contextvars import ContextVar
+from datetime import date, datetime, timezone
+from typing import Dict, Optional, Tuple
+
+from ..core.config import settings
+from ..db import AsyncSessionLocal
+from .. import crud
+
+# The user LLM calls are made for; set by the API's quota dependency and by
+# the job queue, read when usage is recorded.
+llm_user: ContextVar[Optional[int]] = ContextVar("llm_user", default=None)
+
+
+class QuotaExceeded(Exception):
+    """The user has used up their daily token quota."""
+
+    def __init__(self, user_id: int, used: int, quota: int):
+        super().__init__(f"Daily token quota of {quota} reached ({used} used)")
+        self.user_id = user_id
+        self.used = used
+        self.quota = quota
+
+
+def _today() -> date:
+    return datetime.now(timezone.utc).date()
+
+
+class UsageTracker:
+    """
+    Aggregates token usage per (user, day, operation, model) in memory and
+    writes it to `token_usage` in batches. Also answers "how much has this
+    user used today" for quota checks: the persisted total is read once and
+    kept up to date from recorded calls until the next flush, which drops it
+    so usage written by other processes is picked up.
+    """
+
+    def __init__(self, default_quota: int, flush_interval: float, max_pending: int):
+        self.default_quota = default_quota
+        self.flush_interval = flush_interval
+        self.max_pending = max_pending
+        self._pending: Dict[Tuple, list] = {}
+        self._pending_calls = 0
+        # user id -> (tokens used today, quota)
+        self._today: Dict[int, Tuple[int, int]] = {}
+        self._day = _today()
+        self._lock = asyncio.Lock()
+        self._task: Optional[asyncio.Task] = None
+        self._flushing: Optional[asyncio.Task] = None
+
+    def record(self, operation: str, model: str, prompt_tokens: int, output_tokens: int) -> None:
+        """Adds one call's usage for the current `llm_user`. Never touches the DB."""
+        user_id = llm_user.get()
+        day = _today()
+        key = (user_id, day, operation, model)
+        totals = self._pending.setdefault(key, [0, 0, 0])
+        totals[0] += 1
+        totals[1] += prompt_tokens
+        totals[2] += output_tokens
+        self._pending_calls += 1
+
+        if user_id in self._today and day == self._day:
+            used, quota = self._today[user_id]
+            self._today[user_id] = (used + prompt_tokens + output_tokens, quota)
+        if self._pending_calls >= self.max_pending and (self._flushing is None or self._flushing.done()):
+            self._flushing = asyncio.get_running_loop().create_task(self.flush())
+
+    async def usage_today(self, user_id: int) -> Tuple[int, int]:
+        """Tokens the user has used today and their quota (0 = unlimited)."""
+        day = _today()
+        if day != self._day:
+            self._day = day
+            self._today.clear()
+        cached = self._today.get(user_id)
+        if cached is not None:
+            return cached
+        async with self._lock:
+            async with AsyncSessionLocal() as db:
+                used, override = await crud.get_daily_usage(db, user_id=user_id, day=day)
+            # Calls recorded but not yet flushed; flushing waits for the lock.
+            used += sum(
+                totals[1] + totals[2]
+                for (pending_user, pending_day, _, _), totals in self._pending.items()
+                if pending_user == user_id and pending_day == day
+            )
+            quota = self.default_quota if override is None else override
+            self._today[user_id] = (used, quota)
+        return used, quota
+
+    async def check(self, user_id: Optional[int]) -> None:
+        """Raises QuotaExceeded if the user may not start another LLM call today."""
+        if user_id is None:
+            return
+        used, quota = await self.usage_today(user_id)
+        if quota > 0 and used >= quota:
+            raise QuotaExceeded(user_id, used, quota)
+
+    async def flush(self) -> None:
+        """Writes all pending usage in one statement."""
+        async with self._lock:
+            if not self._pending:
+                return
+            pending, self._pending, self._pending_calls = self._pending, {}, 0
+            rows = [
+                {
+                    "user_id": user_id, "day": day, "operation": operation, "model": model,
+                    "calls": calls, "prompt_tokens": prompt_tokens, "output_tokens": output_tokens,
+                }
+                for (user_id, day, operation, model), (calls, prompt_tokens, output_tokens) in pending.items()
+            ]
+            try:
+                async with AsyncSessionLocal() as db:
+                    await crud.add_token_usage(db, rows)
+            except Exception:
+                print("--- ERROR FLUSHING TOKEN USAGE ---")
+                traceback.print_exc()
+                # Keep the usage for the next attempt.
+                for key, totals in pending.items():
+                    merged = self._pending.setdefault(key, [0, 0, 0])
+                    for i, value in enumerate(totals):
+                        merged[i] += value
+                    self._pending_calls += totals[0]
+                return
+            self._today.clear()
+
+    async def _flush_periodically(self) -> None:
+        while True:
+            await asyncio.sleep(self.flush_interval)
+            await self.flush()
+
+    def start(self) -> None:
+        if self._task is None:
+            self._task = asyncio.get_running_loop().create_task(self._flush_periodically())
+
+    async def stop(self) -> None:
+        """Stops the periodic flush and writes what is left."""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        await self.flush()
+
+
+usage_tracker = UsageTracker(
+    default_quota=settings.LLM_DAILY_TOKEN_QUOTA,
+    flush_interval=settings.USAGE_FLUSH_INTERVAL_SECONDS,
+    max_pending=settings.USAGE_FLUSH_MAX_PENDING,
+)
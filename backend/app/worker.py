@@ -0,0 +1,30 @@
+# Standalone generation worker: `python -m app.worker [--workers N]`
+
+import argparse
+import asyncio
+
+from .core.config import settings
+from .db import init_db
+# Register every table with the metadata before `init_db` runs.
+from .models import user, project, document_section, refinement_history, generation_job, token_usage  # noqa: F401
+from .services.job_queue import job_queue
+from .services.usage_tracker import usage_tracker
+
+
+async def main(workers: int):
+    await init_db()
+    usage_tracker.start()
+    job_queue.start(workers)
+    print(f"Generation worker started with {workers} worker(s).")
+    try:
+        await asyncio.Event().wait()
+    finally:
+        await job_queue.stop()
+        await usage_tracker.stop()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Runs queued document generation jobs.")
+    parser.add_argument("--workers", type=int, default=max(1, settings.JOB_WORKERS))
+    args = parser.parse_args()
+    asyncio.run(main(args.workers))
@@ -0,0 +1,88 @@
+# backend/benchmarks/chunked_refine.py
+#
+# Wall-clock refinement latency for long sections, whole-text versus chunked,
+# against the stub model. The stub echoes the text it is asked to refine and
+# takes time proportional to the output, as a real model does. Run from
+# `backend`:
+#
+#   python -m benchmarks.chunked_refine --words 5000 8000
+
+import argparse
+import asyncio
+import os
+import random
+import sys
+import tempfile
+import time
+
+os.environ.setdefault("GEMINI_API_KEY", "benchmark")
+os.environ.setdefault("SECRET_KEY", "benchmark")
+os.environ["LLM_CACHE_ENABLED"] = "false"
+os.environ["LLM_REQUESTS_PER_MINUTE"] = "0"
+os.environ["LLM_TOKENS_PER_MINUTE"] = "0"
+os.environ.setdefault("LLM_TIMEOUT_SECONDS", "0")
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.fake_gemini import FakeGenerativeModel, install
+from benchmarks.history_storage import paragraph
+
+
+class EchoModel(FakeGenerativeModel):
+    """Returns the text between the prompt's "refine" markers, unchanged."""
+
+    def _text(self, prompt: str) -> str:
+        for start, end in (("--- Part to refine ---\n", "\n\n--- Text just after"),
+                           ("--- Original Text ---\n", "\n\n--- Instruction ---")):
+            if start in prompt:
+                return prompt.split(start, 1)[1].split(end, 1)[0]
+        return super()._text(prompt)
+
+
+def make_section(words: int, rng: random.Random) -> str:
+    paragraphs = []
+    while sum(len(p.split()) for p in paragraphs) < words:
+        paragraphs.append(paragraph(rng))
+    return "\n\n".join(paragraphs)
+
+
+async def main(args):
+    os.chdir(tempfile.mkdtemp())
+    from app.services import llm_service
+    from app.services.llm_service import refine_content_for_section
+
+    model = EchoModel(latency=args.latency, jitter=0.0, seconds_per_word=args.seconds_per_word)
+    install()
+    llm_service.client.provider.model = model
+
+    rng = random.Random(5)
+    print(f"stub: {args.latency}s + {args.seconds_per_word * 1000:.0f} ms/word, "
+          f"LLM_MAX_CONCURRENCY={llm_service.settings.LLM_MAX_CONCURRENCY}")
+    for words in args.words:
+        text = make_section(words, rng)
+        results = {}
+        for mode in ("whole", "chunked"):
+            calls = model.calls
+            started = time.perf_counter()
+            refined = await refine_content_for_section(text, "Tighten the wording.", mode=mode)
+            results[mode] = time.perf_counter() - started
+            assert refined.split() == text.split(), "stitched text differs from the input"
+            print(f"{words:>6} words  {mode:<8} {results[mode]:6.2f} s  ({model.calls - calls} calls)")
+
+        # A local instruction only touches the chunks that quote the phrase.
+        target = text.split("\n\n")[len(text.split("\n\n")) // 2].split()[0:3]
+        instruction = f'Rephrase the sentence starting with "{" ".join(target)}".'
+        calls = model.calls
+        started = time.perf_counter()
+        await refine_content_for_section(text, instruction, mode="chunked")
+        local = time.perf_counter() - started
+        print(f"{words:>6} words  local    {local:6.2f} s  ({model.calls - calls} calls)")
+        print(f"{'':>6}        speedup  {results['whole'] / results['chunked']:.1f}x chunked, "
+              f"{results['whole'] / local:.1f}x local")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Chunked refinement benchmark.")
+    parser.add_argument("--words", type=int, nargs="+", default=[2000, 5000, 8000])
+    parser.add_argument("--latency", type=float, default=0.8, help="stub time to first token, seconds")
+    parser.add_argument("--seconds-per-word", type=float, default=0.004, help="stub output speed")
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,135 @@
+# backend/benchmarks/db_concurrency.py
+#
+# Mixed read/write throughput against SQLite: the old engine setup
+# (echo=True, rollback journal) versus the settings-driven engine
+# (WAL, synchronous=NORMAL, busy_timeout, mmap, no echo). Run from `backend`:
+#
+#   python -m benchmarks.db_concurrency --workers 16 --seconds 5
+
+import argparse
+import asyncio
+import contextlib
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+
+os.environ.setdefault("GEMINI_API_KEY", "benchmark")
+os.environ.setdefault("SECRET_KEY", "benchmark")
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import update
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+from sqlalchemy.future import select
+from sqlalchemy.orm import joinedload, sessionmaker
+
+from app.db import create_engine_from_settings
+from app.models.user import Base, User
+from app.models.project import Project
+from app.models.document_section import DocumentSection
+from app.models import refinement_history  # noqa: F401
+
+
+def percentile(values, pct):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct / 100))]
+
+
+async def seed(session_factory, projects: int, sections: int):
+    async with session_factory() as db:
+        db.add(User(id=1, email="bench@example.com", hashed_password="x"))
+        for p in range(1, projects + 1):
+            db.add(Project(id=p, title=f"Project {p}", document_type="docx", owner_id=1))
+            for s in range(sections):
+                db.add(DocumentSection(
+                    title=f"Section {s}", content="lorem ipsum " * 400,
+                    section_order=s, project_id=p
+                ))
+        await db.commit()
+
+
+async def workload(session_factory, projects: int, workers: int, seconds: float, write_ratio: float):
+    latencies = {"read": [], "write": []}
+    errors = 0
+    deadline = time.perf_counter() + seconds
+
+    async def worker():
+        nonlocal errors
+        rng = random.Random()
+        while time.perf_counter() < deadline:
+            project_id = rng.randint(1, projects)
+            kind = "write" if rng.random() < write_ratio else "read"
+            started = time.perf_counter()
+            try:
+                async with session_factory() as db:
+                    if kind == "read":
+                        result = await db.execute(
+                            select(Project)
+                            .options(joinedload(Project.document_sections))
+                            .where(Project.id == project_id)
+                        )
+                        result.unique().scalars().first()
+                    else:
+                        await db.execute(
+                            update(DocumentSection)
+                            .where(DocumentSection.project_id == project_id)
+                            .values(feedback=str(rng.random()))
+                        )
+                        await db.commit()
+            except Exception:
+                errors += 1
+                continue
+            latencies[kind].append(time.perf_counter() - started)
+
+    await asyncio.gather(*(worker() for _ in range(workers)))
+    return latencies, errors
+
+
+async def run_case(label, make_engine, args):
+    path = os.path.join(tempfile.mkdtemp(), "bench.db")
+    url = f"sqlite+aiosqlite:///{path}"
+    engine = make_engine(url)
+    session_factory = sessionmaker(bind=engine, class_=AsyncSession, expire_on_commit=False)
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    await seed(session_factory, args.projects, args.sections)
+
+    latencies, errors = await workload(
+        session_factory, args.projects, args.workers, args.seconds, args.write_ratio
+    )
+    await engine.dispose()
+
+    ops = len(latencies["read"]) + len(latencies["write"])
+    print(f"{label:<10} {ops / args.seconds:>9.1f} ops/s  errors={errors}", file=sys.__stdout__)
+    for kind, values in latencies.items():
+        if values:
+            print(
+                f"  {kind:<6} n={len(values):<6} p50={statistics.median(values) * 1000:7.1f} ms"
+                f"  p95={percentile(values, 95) * 1000:7.1f} ms"
+                f"  p99={percentile(values, 99) * 1000:7.1f} ms",
+                file=sys.__stdout__,
+            )
+
+
+def old_engine(url):
+    # Matches the previous hard-coded setup. Echo output goes to /dev/null so
+    # the terminal isn't flooded; a real console makes this case slower still.
+    return create_async_engine(url, echo=True)
+
+
+async def main(args):
+    with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+        await run_case("before", old_engine, args)
+    await run_case("after", lambda url: create_engine_from_settings(url, echo=False), args)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="SQLite mixed read/write benchmark.")
+    parser.add_argument("--workers", type=int, default=16)
+    parser.add_argument("--seconds", type=float, default=5.0)
+    parser.add_argument("--projects", type=int, default=50)
+    parser.add_argument("--sections", type=int, default=7)
+    parser.add_argument("--write-ratio", type=float, default=0.2)
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,128 @@
+# backend/benchmarks/fake_gemini.py
+#
+# A local stand-in for `genai.GenerativeModel` so the API can be load-tested
+# without spending Gemini quota. Install it with `install(...)` before the
+# first request; it replaces the models behind `llm_service.client` and
+# `llm_service.fallback_client`.
+
+import asyncio
+import random
+from dataclasses import dataclass
+
+try:
+    from google.api_core.exceptions import ServiceUnavailable as FakeGeminiError
+except ImportError:  # pragma: no cover - google-generativeai pulls this in
+    class FakeGeminiError(Exception):
+        pass
+
+_WORDS = (
+    "market growth strategy customer revenue platform analysis risk team "
+    "product data model forecast channel adoption cost value segment plan"
+).split()
+
+
+@dataclass
+class FakeUsage:
+    prompt_token_count: int
+    candidates_token_count: int
+
+    @property
+    def total_token_count(self) -> int:
+        return self.prompt_token_count + self.candidates_token_count
+
+
+class FakeChunk:
+    def __init__(self, text: str):
+        self.text = text
+
+
+class FakeResponse:
+    def __init__(self, text: str, usage: FakeUsage):
+        self.text = text
+        self.usage_metadata = usage
+
+
+class FakeStream:
+    """Async iterable of chunks with `usage_metadata`, like a streamed response."""
+
+    def __init__(self, chunks, chunk_delay: float, usage: FakeUsage):
+        self._chunks = chunks
+        self._chunk_delay = chunk_delay
+        self.usage_metadata = usage
+
+    async def __aiter__(self):
+        for chunk in self._chunks:
+            await asyncio.sleep(self._chunk_delay)
+            yield FakeChunk(chunk)
+
+
+class FakeGenerativeModel:
+    """
+    Answers prompts after `latency` seconds (+/- `jitter`), failing a fraction
+    `error_rate` of calls with a 503-style error. A fraction `slow_rate` of
+    calls takes `slow_factor` times longer, to model a slow upstream tail, and
+    non-streamed answers take another `seconds_per_word` per output word.
+    Outline prompts get a comma separated list; everything else gets
+    `output_words` words of text.
+    """
+
+    def __init__(self, latency: float = 0.5, jitter: float = 0.2, error_rate: float = 0.0,
+                 output_words: int = 300, slow_rate: float = 0.0, slow_factor: float = 10.0,
+                 seconds_per_word: float = 0.0, seed: int = 7, model_name: str = "models/fake-gemini"):
+        self.model_name = model_name
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.output_words = output_words
+        self.slow_rate = slow_rate
+        self.slow_factor = slow_factor
+        self.seconds_per_word = seconds_per_word
+        self.calls = 0
+        self.errors = 0
+        self._rng = random.Random(seed)
+
+    def _delay(self) -> float:
+        delay = max(0.0, self.latency + self._rng.uniform(-self.jitter, self.jitter))
+        if self._rng.random() < self.slow_rate:
+            delay *= self.slow_factor
+        return delay
+
+    def _text(self, prompt: str) -> str:
+        if "comma-separated" in prompt:
+            return ", ".join(f"Section {i + 1}" for i in range(self._rng.randint(5, 7)))
+        return " ".join(self._rng.choice(_WORDS) for _ in range(self.output_words))
+
+    def _usage(self, prompt: str, text: str) -> FakeUsage:
+        return FakeUsage(len(prompt) // 4, len(text) // 4)
+
+    async def generate_content_async(self, prompt, stream: bool = False, **kwargs):
+        self.calls += 1
+        delay = self._delay()
+        if self._rng.random() < self.error_rate:
+            self.errors += 1
+            await asyncio.sleep(delay / 2)
+            raise FakeGeminiError("fake backend overloaded")
+
+        text = self._text(prompt)
+        usage = self._usage(prompt, text)
+        if not stream:
+            await asyncio.sleep(delay + self.seconds_per_word * len(text.split()))
+            return FakeResponse(text, usage)
+
+        words = text.split(" ")
+        chunks = [" ".join(words[i:i + 20]) + " " for i in range(0, len(words), 20)]
+        # First chunk arrives after the usual latency; the rest trickle in.
+        await asyncio.sleep(delay)
+        return FakeStream(chunks, chunk_delay=0.01, usage=usage)
+
+
+def install(**options) -> FakeGenerativeModel:
+    """Replaces the Gemini models used by `llm_service` with a stub."""
+    from app.services import llm_service
+    from app.services.llm_provider import GeminiProvider
+
+    fake = FakeGenerativeModel(**options)
+    llm_service.client.provider = GeminiProvider(fake)
+    if llm_service.fallback_client is not None:
+        llm_service.fallback_client.provider = GeminiProvider(fake)
+    return fake
@@ -0,0 +1,97 @@
+# backend/benchmarks/history_storage.py
+#
+# Storage used by refinement history: plain text per refine (old layout)
+# versus compressed snapshots + deltas, on synthetic sections refined many
+# times with a mix of small edits, paragraph rewrites and full rewrites.
+# Run from `backend`:
+#
+#   python -m benchmarks.history_storage --sections 20 --refines 50
+
+import argparse
+import os
+import random
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.services.history_codec import decode_version, encode_version
+
+VOCABULARY = (
+    "market growth strategy revenue customer product team analysis risk cost "
+    "quarter forecast investment platform partner channel margin pricing launch "
+    "operations compliance roadmap segment adoption retention value data model"
+).split()
+
+
+def paragraph(rng: random.Random) -> str:
+    sentences = []
+    for _ in range(rng.randint(3, 6)):
+        words = [rng.choice(VOCABULARY) for _ in range(rng.randint(8, 18))]
+        sentences.append(" ".join(words).capitalize() + ".")
+    return " ".join(sentences)
+
+
+def refine(text: str, rng: random.Random) -> str:
+    paragraphs = text.split("\n\n")
+    roll = rng.random()
+    if roll < 0.05:
+        return "\n\n".join(paragraph(rng) for _ in range(len(paragraphs)))
+    if roll < 0.20:
+        paragraphs[rng.randrange(len(paragraphs))] = paragraph(rng)
+        return "\n\n".join(paragraphs)
+    index = rng.randrange(len(paragraphs))
+    words = paragraphs[index].split(" ")
+    for _ in range(rng.randint(1, 4)):
+        words[rng.randrange(len(words))] = rng.choice(VOCABULARY)
+    paragraphs[index] = " ".join(words)
+    return "\n\n".join(paragraphs)
+
+
+def main(args):
+    rng = random.Random(args.seed)
+    raw_bytes = 0
+    stored_bytes = 0
+    rebuild_times = []
+
+    for _ in range(args.sections):
+        text = "\n\n".join(paragraph(rng) for _ in range(args.paragraphs))
+        versions, rows = [], []
+        previous, previous_depth = None, None
+        for _ in range(args.refines):
+            versions.append(text)
+            encoding, payload, depth = encode_version(text, previous, previous_depth, args.interval)
+            rows.append((encoding, payload))
+            raw_bytes += len(text.encode("utf-8"))
+            stored_bytes += len(payload)
+            previous, previous_depth = text, depth
+            text = refine(text, rng)
+
+        # Rebuild every version the way the API does: from the nearest snapshot.
+        for target in range(len(rows)):
+            started = time.perf_counter()
+            start = max(i for i in range(target + 1) if rows[i][0] == "snapshot")
+            content = None
+            for encoding, payload in rows[start:target + 1]:
+                content = decode_version(encoding, payload, None, content)
+            rebuild_times.append(time.perf_counter() - started)
+            assert content == versions[target]
+
+    rebuild_times.sort()
+    print(f"sections x refines:   {args.sections} x {args.refines}")
+    print(f"plain text:           {raw_bytes / 1024:.1f} KiB")
+    print(f"snapshots + deltas:   {stored_bytes / 1024:.1f} KiB")
+    print(f"reduction:            {raw_bytes / stored_bytes:.1f}x")
+    print(f"rebuild p50 / max:    {statistics.median(rebuild_times) * 1000:.2f} ms"
+          f" / {rebuild_times[-1] * 1000:.2f} ms")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Refinement history storage benchmark.")
+    parser.add_argument("--sections", type=int, default=20)
+    parser.add_argument("--refines", type=int, default=50)
+    parser.add_argument("--paragraphs", type=int, default=6)
+    parser.add_argument("--interval", type=int, default=10)
+    parser.add_argument("--seed", type=int, default=7)
+    main(parser.parse_args())
@@ -0,0 +1,88 @@
+# backend/benchmarks/import_time.py
+#
+# Import-time budget check for the API process. Imports `app.main` in fresh
+# interpreters under `python -X importtime`, and exits non-zero if the
+# median cumulative import time exceeds the budget or if any dependency
+# that should load lazily was imported. Also run by tests/test_import_time.py;
+# from `backend`:
+#
+#   python -m benchmarks.import_time --budget-ms 1500
+
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Loaded on first use or by the startup warm-up, never by `import app.main`.
+LAZY_MODULES = ("google.generativeai", "google.api_core", "docx", "pptx", "passlib", "jose")
+
+
+def measure(module: str):
+    """Returns {imported module: (self us, cumulative us, depth)} for one fresh import."""
+    env = dict(os.environ)
+    env.setdefault("GEMINI_API_KEY", "benchmark")
+    env.setdefault("SECRET_KEY", "benchmark")
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=BACKEND_DIR, env=env, capture_output=True, text=True
+    )
+    if result.returncode != 0:
+        sys.exit(f"importing {module} failed:\n{result.stderr[-2000:]}")
+
+    imports = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        depth = (len(name) - len(name.lstrip())) // 2
+        imports[name.strip()] = (int(self_us), int(cumulative_us), depth)
+    return imports
+
+
+def eager_imports(runs) -> list:
+    """Lazily loaded modules that some run imported anyway."""
+    return sorted({
+        name for run in runs for name in run
+        if any(name == lazy or name.startswith(lazy + ".") for lazy in LAZY_MODULES)
+    })
+
+
+def main(args) -> int:
+    runs = [measure(args.module) for _ in range(args.runs)]
+    totals = [run[args.module][1] / 1000 for run in runs]
+    median = statistics.median(totals)
+
+    # The slowest direct imports, from the median run.
+    run = runs[totals.index(sorted(totals)[len(totals) // 2])]
+    children = sorted(
+        ((cumulative, name) for name, (_, cumulative, depth) in run.items() if depth == 1),
+        reverse=True
+    )
+    print(f"import {args.module}: median {median:.0f} ms over {args.runs} runs "
+          f"(min {min(totals):.0f}, max {max(totals):.0f}), budget {args.budget_ms:.0f} ms")
+    for cumulative, name in children[:args.top]:
+        print(f"  {cumulative / 1000:8.1f} ms  {name}")
+
+    ok = True
+    eager = eager_imports(runs)
+    if eager:
+        ok = False
+        print(f"FAIL  imported eagerly: {', '.join(eager[:10])}")
+    if median > args.budget_ms:
+        ok = False
+        print(f"FAIL  {median:.0f} ms is over the {args.budget_ms:.0f} ms budget")
+    if ok:
+        print("ok")
+    return 0 if ok else 1
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Import-time budget check.")
+    parser.add_argument("--module", default="app.main")
+    parser.add_argument("--budget-ms", type=float, default=float(os.getenv("IMPORT_TIME_BUDGET_MS", 1500)))
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--top", type=int, default=10, help="slowest direct imports to list")
+    sys.exit(main(parser.parse_args()))
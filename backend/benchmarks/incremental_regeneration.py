@@ -0,0 +1,91 @@
+# backend/benchmarks/incremental_regeneration.py
+#
+# LLM calls and latency of regenerating a document after typical outline
+# edits, full versus incremental, against the stub model. Each scenario
+# starts from a freshly generated document. Run from `backend`:
+#
+#   python -m benchmarks.incremental_regeneration --sections 10
+
+import argparse
+import asyncio
+import os
+import sys
+import tempfile
+import time
+
+os.environ.setdefault("GEMINI_API_KEY", "benchmark")
+os.environ.setdefault("SECRET_KEY", "benchmark")
+os.environ["LLM_CACHE_ENABLED"] = "false"
+os.environ["LLM_REQUESTS_PER_MINUTE"] = "0"
+os.environ["LLM_TOKENS_PER_MINUTE"] = "0"
+os.environ["JOB_WORKERS"] = "0"
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.fake_gemini import install
+
+TOPIC = "Market entry plan for a regional coffee chain"
+
+
+def scenarios(titles):
+    middle = len(titles) // 2
+    return {
+        "add one section": titles + ["Appendix: assumptions"],
+        "fix a typo in one title": titles[:middle] + [titles[middle] + "s"] + titles[middle + 1:],
+        "reorder sections": titles[1:] + titles[:1],
+        "remove one section": titles[:middle] + titles[middle + 1:],
+        "add one, fix one typo": titles[:middle] + [titles[middle].lower() + "s"] + titles[middle + 1:] + ["Next steps"],
+        "change the main topic": None,
+    }
+
+
+async def main(args):
+    os.chdir(tempfile.mkdtemp())
+    import httpx
+    from app.main import app
+    from app.db import init_db
+
+    model = install(latency=args.latency, jitter=0.0)
+    await init_db()
+
+    titles = [f"Section {i + 1}: {word}" for i, word in enumerate(
+        "Overview Market Customers Competition Pricing Channels Operations Team Finance Risks "
+        "Timeline Metrics Partners Marketing Legal Summary".split()
+    )][:args.sections]
+
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=None) as client:
+        await client.post("/api/v1/auth/register", json={"email": "bench@example.com", "password": "secret"})
+        response = await client.post("/api/v1/auth/login", data={"username": "bench@example.com", "password": "secret"})
+        headers = {"Authorization": f"Bearer {response.json()['access_token']}"}
+        response = await client.post("/api/v1/projects/", json={"title": "Bench", "document_type": "docx"}, headers=headers)
+        url = f"/api/v1/projects/{response.json()['id']}/generate"
+
+        print(f"{args.sections} sections, stub latency {args.latency}s")
+        print(f"{'scenario':<26} {'full calls':>10} {'incr calls':>10} {'saved':>7} {'full s':>8} {'incr s':>8}")
+        total_full = total_incremental = 0
+        for name, edited in scenarios(titles).items():
+            topic = TOPIC if edited is not None else TOPIC + " in two countries"
+            edited = edited or titles
+            results = {}
+            for incremental in (False, True):
+                await client.post(url, json={"main_topic": TOPIC, "section_titles": titles}, headers=headers)
+                calls = model.calls
+                started = time.perf_counter()
+                response = await client.post(
+                    url, params={"incremental": incremental},
+                    json={"main_topic": topic, "section_titles": edited}, headers=headers
+                )
+                assert [s["title"] for s in response.json()] == edited
+                results[incremental] = (model.calls - calls, time.perf_counter() - started)
+            (full, full_s), (incr, incr_s) = results[False], results[True]
+            total_full += full
+            total_incremental += incr
+            print(f"{name:<26} {full:>10} {incr:>10} {1 - incr / full:>7.0%} {full_s:>8.2f} {incr_s:>8.2f}")
+        print(f"{'total':<26} {total_full:>10} {total_incremental:>10} {1 - total_incremental / total_full:>7.0%}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Incremental regeneration benchmark.")
+    parser.add_argument("--sections", type=int, default=10)
+    parser.add_argument("--latency", type=float, default=0.5, help="stub LLM latency in seconds")
+    asyncio.run(main(parser.parse_args()))
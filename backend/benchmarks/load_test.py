@@ -0,0 +1,234 @@
+# backend/benchmarks/load_test.py
+#
+# Offline load test of the API against the stub model in fake_gemini.py.
+# Every virtual user registers, logs in, creates a project (alternating docx
+# and pptx), asks for an outline, generates it, refines a section and exports
+# the document. Per-endpoint throughput and latency percentiles are printed
+# and written as JSON. Run from `backend`:
+#
+#   python -m benchmarks.load_test --users 50 --concurrency 10 --output before.json
+#   python -m benchmarks.load_test --users 50 --concurrency 10 --baseline before.json
+#
+# With --baseline, the run exits 1 when any endpoint's p95 is more than
+# --max-regression percent slower than in the baseline file.
+
+import argparse
+import asyncio
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from collections import defaultdict
+from datetime import datetime, timezone
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+
+
+def percentile(values, pct):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct / 100))]
+
+
+def git_commit() -> str:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=BACKEND_DIR,
+            capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+def configure_environment(args):
+    """Settings are read at import time, so this must run before importing the app."""
+    os.environ.setdefault("GEMINI_API_KEY", "benchmark")
+    os.environ.setdefault("SECRET_KEY", "benchmark")
+    os.environ["LLM_MAX_CONCURRENCY"] = str(args.llm_concurrency)
+    os.environ["LLM_REQUESTS_PER_MINUTE"] = "1000000"
+    os.environ["LLM_TOKENS_PER_MINUTE"] = "1000000000"
+    os.environ["LLM_CACHE_ENABLED"] = "true" if args.llm_cache else "false"
+    os.environ["LLM_HEDGE_ENABLED"] = "true" if args.hedge else "false"
+    os.environ["JOB_WORKERS"] = "0"
+    os.chdir(tempfile.mkdtemp(prefix="load_test_"))
+
+
+class Recorder:
+    def __init__(self):
+        self.latencies = defaultdict(list)
+        self.failures = defaultdict(int)
+
+    async def call(self, client, name: str, method: str, url: str, **kwargs):
+        started = time.perf_counter()
+        response = await client.request(method, url, **kwargs)
+        self.latencies[name].append(time.perf_counter() - started)
+        if response.status_code >= 400:
+            self.failures[name] += 1
+        return response
+
+    def summary(self, elapsed: float) -> dict:
+        endpoints = {}
+        for name, values in self.latencies.items():
+            endpoints[name] = {
+                "count": len(values),
+                "failures": self.failures[name],
+                "throughput_rps": round(len(values) / elapsed, 2),
+                "mean_ms": round(sum(values) / len(values) * 1000, 2),
+                "p50_ms": round(percentile(values, 50) * 1000, 2),
+                "p95_ms": round(percentile(values, 95) * 1000, 2),
+                "p99_ms": round(percentile(values, 99) * 1000, 2),
+            }
+        return endpoints
+
+
+async def virtual_user(client, recorder: Recorder, index: int, sections: int):
+    email = f"user{index}@bench.example"
+    await recorder.call(client, "POST /auth/register", "POST", "/api/v1/auth/register",
+                        json={"email": email, "password": "secret"})
+    response = await recorder.call(client, "POST /auth/login", "POST", "/api/v1/auth/login",
+                                   data={"username": email, "password": "secret"})
+    headers = {"Authorization": f"Bearer {response.json()['access_token']}"}
+
+    document_type = "docx" if index % 2 == 0 else "pptx"
+    response = await recorder.call(client, "POST /projects", "POST", "/api/v1/projects/",
+                                   json={"title": f"Load test {index}", "document_type": document_type},
+                                   headers=headers)
+    project_id = response.json()["id"]
+    topic = f"Market entry plan {index}"
+
+    response = await recorder.call(client, "POST /projects/{id}/suggest-outline", "POST",
+                                   f"/api/v1/projects/{project_id}/suggest-outline",
+                                   json={"main_topic": topic}, headers=headers)
+    titles = response.json() if response.status_code == 200 else []
+    titles = titles[:sections] or [f"Section {i + 1}" for i in range(sections)]
+
+    response = await recorder.call(client, "POST /projects/{id}/generate", "POST",
+                                   f"/api/v1/projects/{project_id}/generate",
+                                   json={"main_topic": topic, "section_titles": titles}, headers=headers)
+    if response.status_code == 200 and response.json():
+        section_id = response.json()[0]["id"]
+        await recorder.call(client, "POST /sections/{id}/refine", "POST",
+                            f"/api/v1/sections/{section_id}/refine",
+                            json={"prompt": "Make it more concise."}, headers=headers)
+
+    await recorder.call(client, f"GET /projects/{{id}}/export ({document_type})", "GET",
+                        f"/api/v1/projects/{project_id}/export", headers=headers)
+
+
+async def run(args) -> dict:
+    import httpx
+    from app.main import app
+    from app.db import init_db
+    from app.services import llm_service
+    from benchmarks import fake_gemini
+
+    fake = fake_gemini.install(
+        latency=args.latency, jitter=args.jitter, error_rate=args.error_rate,
+        output_words=args.output_words, slow_rate=args.slow_rate,
+        slow_factor=args.slow_factor, seed=args.seed
+    )
+    await init_db()
+
+    recorder = Recorder()
+    semaphore = asyncio.Semaphore(args.concurrency)
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=None) as client:
+        async def guarded(index):
+            async with semaphore:
+                await virtual_user(client, recorder, index, args.sections)
+
+        started = time.perf_counter()
+        results = await asyncio.gather(*(guarded(i) for i in range(args.users)), return_exceptions=True)
+        elapsed = time.perf_counter() - started
+
+    crashed = [r for r in results if isinstance(r, Exception)]
+    for error in crashed[:3]:
+        print(f"virtual user failed: {error!r}")
+
+    total = sum(len(v) for v in recorder.latencies.values())
+    return {
+        "meta": {
+            "commit": git_commit(),
+            "timestamp": datetime.now(timezone.utc).isoformat(),
+            "options": vars(args),
+        },
+        "overall": {
+            "elapsed_s": round(elapsed, 3),
+            "requests": total,
+            "throughput_rps": round(total / elapsed, 2),
+            "users_failed": len(crashed),
+            "llm_calls": fake.calls,
+            "llm_errors": fake.errors,
+            "llm_client": llm_service.stats()["primary"],
+        },
+        "endpoints": recorder.summary(elapsed),
+    }
+
+
+def print_report(results: dict):
+    overall = results["overall"]
+    print(f"commit {results['meta']['commit']}: {overall['requests']} requests in {overall['elapsed_s']} s "
+          f"({overall['throughput_rps']} req/s), {overall['llm_calls']} LLM calls "
+          f"({overall['llm_errors']} injected errors), {overall['users_failed']} users failed")
+    print(f"LLM client: {overall['llm_client']}")
+    print(f"{'endpoint':<42} {'count':>6} {'fail':>5} {'rps':>7} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9}")
+    for name, stats in sorted(results["endpoints"].items()):
+        print(f"{name:<42} {stats['count']:>6} {stats['failures']:>5} {stats['throughput_rps']:>7} "
+              f"{stats['p50_ms']:>9} {stats['p95_ms']:>9} {stats['p99_ms']:>9}")
+
+
+def compare(results: dict, baseline: dict, max_regression: float) -> bool:
+    """Prints p95 changes against a baseline run; False if any exceeds the limit."""
+    ok = True
+    print(f"\np95 vs baseline {baseline['meta']['commit']}:")
+    for name, stats in sorted(results["endpoints"].items()):
+        before = baseline["endpoints"].get(name)
+        if not before or not before["p95_ms"]:
+            continue
+        change = (stats["p95_ms"] - before["p95_ms"]) / before["p95_ms"] * 100
+        flag = ""
+        if change > max_regression:
+            flag = "  REGRESSION"
+            ok = False
+        print(f"  {name:<42} {before['p95_ms']:>9} -> {stats['p95_ms']:>9} ms ({change:+.1f}%){flag}")
+    return ok
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Offline API load test with a stub LLM.")
+    parser.add_argument("--users", type=int, default=20, help="virtual users, each running the full scenario")
+    parser.add_argument("--concurrency", type=int, default=5, help="virtual users in flight at once")
+    parser.add_argument("--sections", type=int, default=5, help="sections generated per project")
+    parser.add_argument("--latency", type=float, default=0.3, help="stub LLM latency in seconds")
+    parser.add_argument("--jitter", type=float, default=0.1, help="+/- seconds added to each call")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="fraction of LLM calls that fail")
+    parser.add_argument("--slow-rate", type=float, default=0.0, help="fraction of LLM calls that are slow")
+    parser.add_argument("--slow-factor", type=float, default=10.0, help="latency multiplier for slow calls")
+    parser.add_argument("--hedge", action="store_true", help="enable hedged LLM requests")
+    parser.add_argument("--output-words", type=int, default=300, help="words per generated section")
+    parser.add_argument("--llm-concurrency", type=int, default=8, help="LLM_MAX_CONCURRENCY for the run")
+    parser.add_argument("--llm-cache", action="store_true", help="leave the LLM response cache on")
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--output", help="write results as JSON to this file")
+    parser.add_argument("--baseline", help="JSON results of an earlier run to compare against")
+    parser.add_argument("--max-regression", type=float, default=20.0, help="allowed p95 increase in percent")
+    args = parser.parse_args()
+
+    output = os.path.abspath(args.output) if args.output else None
+    baseline = None
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+
+    configure_environment(args)
+    results = asyncio.run(run(args))
+    print_report(results)
+
+    if output:
+        with open(output, "w") as f:
+            json.dump(results, f, indent=2)
+        print(f"\nresults written to {output}")
+    if baseline and not compare(results, baseline, args.max_regression):
+        sys.exit(1)
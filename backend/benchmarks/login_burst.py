@@ -0,0 +1,93 @@
+# backend/benchmarks/login_burst.py
+#
+# Measures login throughput and the latency of an unrelated endpoint (GET /)
+# while a burst of logins is in flight. Run from the `backend` folder:
+#
+#   python -m benchmarks.login_burst                # hashing on the executor
+#   python -m benchmarks.login_burst --inline       # old behaviour, hashing on the event loop
+
+import argparse
+import asyncio
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+os.environ.setdefault("GEMINI_API_KEY", "benchmark")
+os.environ.setdefault("SECRET_KEY", "benchmark")
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+def percentile(values, pct):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct / 100))]
+
+
+async def run(logins: int, concurrency: int, inline: bool):
+    import httpx
+    from app.main import app
+    from app.db import init_db
+    from app.core import security
+
+    if inline:
+        async def run_inline(func, *args):
+            return func(*args)
+        security._run_hashing = run_inline
+
+    await init_db()
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        await client.post("/api/v1/auth/register", json={"email": "bench@example.com", "password": "secret"})
+
+        burst_done = asyncio.Event()
+        probe_latencies = []
+
+        async def probe():
+            while not burst_done.is_set():
+                started = time.perf_counter()
+                await client.get("/")
+                probe_latencies.append(time.perf_counter() - started)
+                await asyncio.sleep(0.005)
+
+        semaphore = asyncio.Semaphore(concurrency)
+
+        async def login():
+            async with semaphore:
+                response = await client.post(
+                    "/api/v1/auth/login",
+                    data={"username": "bench@example.com", "password": "secret"},
+                )
+                return response.status_code
+
+        probe_task = asyncio.create_task(probe())
+        started = time.perf_counter()
+        statuses = await asyncio.gather(*(login() for _ in range(logins)))
+        elapsed = time.perf_counter() - started
+        burst_done.set()
+        await probe_task
+
+    security.shutdown_hash_executor()
+    print(f"mode:               {'inline (event loop)' if inline else settings_label()}")
+    print(f"logins:             {logins} ({statuses.count(200)} ok, {statuses.count(503)} shed)")
+    print(f"login throughput:   {logins / elapsed:.1f} req/s")
+    print(f"GET / samples:      {len(probe_latencies)}")
+    print(f"GET / p50:          {statistics.median(probe_latencies) * 1000:.1f} ms")
+    print(f"GET / p99:          {percentile(probe_latencies, 99) * 1000:.1f} ms")
+    print(f"GET / max:          {max(probe_latencies) * 1000:.1f} ms")
+
+
+def settings_label():
+    from app.core.config import settings
+    return f"{settings.PASSWORD_HASH_EXECUTOR} pool x{settings.PASSWORD_HASH_WORKERS}"
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Login burst benchmark.")
+    parser.add_argument("--logins", type=int, default=40)
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--inline", action="store_true", help="hash on the event loop (pre-executor behaviour)")
+    args = parser.parse_args()
+
+    os.chdir(tempfile.mkdtemp())
+    asyncio.run(run(args.logins, args.concurrency, args.inline))
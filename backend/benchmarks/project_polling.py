@@ -0,0 +1,98 @@
+# backend/benchmarks/project_polling.py
+#
+# Latency of the editor's `GET /projects/{id}` poll on an unchanged project:
+# uncached (query, validation and serialization on every request), cached
+# response, and If-None-Match revalidation, plus the number of SQL
+# statements each poll runs. Goes through the full ASGI stack with auth.
+# Run from `backend`:
+#
+#   python -m benchmarks.project_polling --sections 20 --paragraphs 6
+
+import argparse
+import asyncio
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+
+os.environ.setdefault("GEMINI_API_KEY", "benchmark")
+os.environ.setdefault("SECRET_KEY", "benchmark")
+os.environ["JOB_WORKERS"] = "0"
+# Versions are trusted for the whole run, as between writes in production.
+os.environ["PROJECT_VERSION_TTL_SECONDS"] = "3600"
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+def summarize(latencies) -> str:
+    latencies = sorted(latencies)
+    return (f"p50={statistics.median(latencies) * 1000:6.2f} ms  "
+            f"p95={latencies[int(len(latencies) * 0.95)] * 1000:6.2f} ms")
+
+
+async def main(args):
+    os.chdir(tempfile.mkdtemp())
+    import httpx
+    from sqlalchemy import event
+    from app.main import app
+    from app.db import AsyncSessionLocal, engine, init_db
+    from app.models.document_section import DocumentSection
+    from app.services.project_cache import project_cache
+    from benchmarks.history_storage import paragraph
+
+    await init_db()
+    rng = random.Random(args.seed)
+    statements = []
+    event.listen(engine.sync_engine, "before_cursor_execute", lambda *a, **k: statements.append(1))
+
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=None) as client:
+        await client.post("/api/v1/auth/register", json={"email": "bench@example.com", "password": "secret"})
+        response = await client.post("/api/v1/auth/login", data={"username": "bench@example.com", "password": "secret"})
+        headers = {"Authorization": f"Bearer {response.json()['access_token']}"}
+        response = await client.post("/api/v1/projects/", json={"title": "Bench", "document_type": "docx"}, headers=headers)
+        project_id = response.json()["id"]
+
+        async with AsyncSessionLocal() as db:
+            db.add_all([
+                DocumentSection(
+                    title=f"Section {i + 1}", section_order=i, project_id=project_id,
+                    content="\n\n".join(paragraph(rng) for _ in range(args.paragraphs))
+                )
+                for i in range(args.sections)
+            ])
+            await db.commit()
+
+        url = f"/api/v1/projects/{project_id}"
+        response = await client.get(url, headers=headers)
+        size, etag = len(response.content), response.headers["etag"]
+        print(f"{args.sections} sections, {size / 1024:.0f} KiB response, {args.polls} polls each")
+
+        max_entries = project_cache.max_entries
+        modes = {
+            "uncached": ({}, 0),
+            "cached response": ({}, max_entries),
+            "If-None-Match (304)": ({"If-None-Match": etag}, max_entries),
+        }
+        for name, (extra, entries) in modes.items():
+            project_cache.max_entries = entries
+            project_cache.clear()
+            await client.get(url, headers={**headers, **extra})
+            statements.clear()
+            latencies = []
+            for _ in range(args.polls):
+                started = time.perf_counter()
+                response = await client.get(url, headers={**headers, **extra})
+                latencies.append(time.perf_counter() - started)
+            print(f"{name:<20} {summarize(latencies)}  status {response.status_code}  "
+                  f"{len(statements) / args.polls:.1f} statements/poll")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Project detail polling benchmark.")
+    parser.add_argument("--sections", type=int, default=20)
+    parser.add_argument("--paragraphs", type=int, default=6, help="paragraphs per section")
+    parser.add_argument("--polls", type=int, default=500)
+    parser.add_argument("--seed", type=int, default=7)
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,98 @@
+# backend/benchmarks/query_plans.py
+#
+# Query-plan regression check for the hot read paths. Builds a fresh SQLite
+# database through the migrations, runs EXPLAIN QUERY PLAN on each query and
+# exits non-zero if any of them scans a table or sorts in a temp b-tree
+# instead of walking an index. Also run by tests/test_query_plans.py; from
+# `backend`:
+#
+#   python -m benchmarks.query_plans
+
+import asyncio
+import os
+import sys
+import tempfile
+from typing import List
+
+os.environ.setdefault("GEMINI_API_KEY", "benchmark")
+os.environ.setdefault("SECRET_KEY", "benchmark")
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import text
+from sqlalchemy.future import select
+from sqlalchemy.orm import joinedload, load_only
+
+from app.db import create_engine_from_settings
+from app.migrations import run_migrations
+from app.models.project import Project
+from app.models.document_section import DocumentSection
+from app.models.refinement_history import RefinementHistory
+
+HOT_QUERIES = {
+    "sections by project ordered by section_order": (
+        select(DocumentSection)
+        .where(DocumentSection.project_id == 1)
+        .order_by(DocumentSection.section_order)
+    ),
+    "history by section ordered by created_at": (
+        select(RefinementHistory)
+        .options(load_only(RefinementHistory.id, RefinementHistory.prompt, RefinementHistory.created_at))
+        .where(RefinementHistory.section_id == 1)
+        .order_by(RefinementHistory.created_at.desc(), RefinementHistory.id.desc())
+        .limit(51)
+    ),
+    "projects by owner ordered by id desc": (
+        select(Project)
+        .where(Project.owner_id == 1)
+        .order_by(Project.id.desc())
+        .limit(101)
+    ),
+    "project details with sections": (
+        select(Project)
+        .options(joinedload(Project.document_sections))
+        .where(Project.id == 1, Project.owner_id == 1)
+    ),
+}
+
+BAD_PLAN_STEPS = ("USE TEMP B-TREE",)
+
+
+def is_full_scan(detail: str) -> bool:
+    # "SCAN t" is a full table scan; "SCAN t USING INDEX ..." walks an index.
+    return detail.startswith("SCAN ") and "USING" not in detail
+
+
+async def explain(conn, statement) -> List[str]:
+    """The EXPLAIN QUERY PLAN steps of `statement`."""
+    sql = str(statement.compile(conn.sync_connection, compile_kwargs={"literal_binds": True}))
+    rows = (await conn.execute(text(f"EXPLAIN QUERY PLAN {sql}"))).all()
+    return [row[-1] for row in rows]
+
+
+def bad_steps(details: List[str]) -> List[str]:
+    return [d for d in details if is_full_scan(d) or any(step in d for step in BAD_PLAN_STEPS)]
+
+
+async def main() -> int:
+    path = os.path.join(tempfile.mkdtemp(), "plans.db")
+    engine = create_engine_from_settings(f"sqlite+aiosqlite:///{path}", echo=False)
+    await run_migrations(engine)
+
+    failures = 0
+    async with engine.connect() as conn:
+        for name, statement in HOT_QUERIES.items():
+            details = await explain(conn, statement)
+            bad = bad_steps(details)
+            print(f"{'FAIL' if bad else 'ok  '}  {name}")
+            for detail in details:
+                print(f"        {detail}")
+            failures += bool(bad)
+    await engine.dispose()
+
+    if failures:
+        print(f"{failures} hot quer{'y' if failures == 1 else 'ies'} fell back to a scan or sort.")
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(asyncio.run(main()))
@@ -0,0 +1,170 @@
+# backend/benchmarks/search_index.py
+#
+# Full-text search on a synthetic corpus (100k sections by default): how long
+# incremental indexing takes, search latency for common, rare and multi-word
+# queries and deep pages, the cost of re-indexing one refined section, and
+# the client-side alternative of loading a user's sections and filtering
+# them. SQLite/FTS5 only. Run from `backend`:
+#
+#   python -m benchmarks.search_index --sections 100000
+
+import argparse
+import asyncio
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+
+os.environ.setdefault("GEMINI_API_KEY", "benchmark")
+os.environ.setdefault("SECRET_KEY", "benchmark")
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import insert
+from sqlalchemy.future import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.db import create_engine_from_settings
+from app.migrations import run_migrations
+from app.models.document_section import DocumentSection
+from app.models.project import Project
+from app.models.user import User
+from app.services import search_index
+from benchmarks.history_storage import paragraph
+
+SECTIONS_PER_PROJECT = 10
+BATCH = 2000
+
+
+def keyword(rng: random.Random) -> str:
+    # Zipf-ish: a few keywords are frequent, most are rare.
+    return f"kw{int(rng.paretovariate(1.0) * 10)}"
+
+
+def section_text(rng: random.Random, paragraphs: int) -> str:
+    text = "\n\n".join(paragraph(rng) for _ in range(paragraphs))
+    return f"{text} {keyword(rng)} {keyword(rng)}"
+
+
+def summarize(latencies) -> str:
+    latencies = sorted(latencies)
+    return (f"p50={statistics.median(latencies) * 1000:7.2f} ms  "
+            f"p95={latencies[int(len(latencies) * 0.95)] * 1000:7.2f} ms")
+
+
+async def build(db: AsyncSession, args, rng: random.Random):
+    users = max(1, args.sections // (args.sections_per_user))
+    projects = args.sections // SECTIONS_PER_PROJECT
+    await db.execute(insert(User), [
+        {"id": i + 1, "email": f"user{i + 1}@bench.example", "hashed_password": "x"} for i in range(users)
+    ])
+    project_rows = [
+        {"id": i + 1, "title": f"Plan {i + 1} {keyword(rng)}", "document_type": "docx",
+         "owner_id": i % users + 1, "main_topic": f"Market plan {keyword(rng)}"}
+        for i in range(projects)
+    ]
+    await db.execute(insert(Project), project_rows)
+    await db.flush()
+
+    started = time.perf_counter()
+    for row in project_rows:
+        await search_index.index_project(db, Project(**row))
+    project_seconds = time.perf_counter() - started
+
+    insert_seconds = index_seconds = 0.0
+    section_id = 0
+    for start in range(0, args.sections, BATCH):
+        rows = []
+        for _ in range(min(BATCH, args.sections - start)):
+            section_id += 1
+            rows.append(DocumentSection(
+                id=section_id, title=f"Section {section_id % SECTIONS_PER_PROJECT + 1}",
+                content=section_text(rng, args.paragraphs), section_order=section_id % SECTIONS_PER_PROJECT,
+                project_id=(section_id - 1) // SECTIONS_PER_PROJECT + 1,
+            ))
+        started = time.perf_counter()
+        db.add_all(rows)
+        await db.flush()
+        insert_seconds += time.perf_counter() - started
+        started = time.perf_counter()
+        await search_index.index_sections(db, rows)
+        index_seconds += time.perf_counter() - started
+        db.expunge_all()
+    await db.commit()
+    print(f"corpus: {users} users, {projects} projects, {args.sections} sections")
+    print(f"insert sections {insert_seconds:6.2f} s, index sections {index_seconds:6.2f} s "
+          f"({args.sections / index_seconds:,.0f}/s), index projects {project_seconds:5.2f} s")
+    return users
+
+
+async def client_side(db: AsyncSession, owner_id: int, word: str) -> int:
+    """What the frontend did: fetch every section of the user's projects and filter."""
+    result = await db.execute(
+        select(DocumentSection.title, DocumentSection.content)
+        .join(Project, Project.id == DocumentSection.project_id)
+        .where(Project.owner_id == owner_id)
+    )
+    return sum(1 for title, content in result if word in title.lower() or word in (content or "").lower())
+
+
+async def main(args):
+    path = os.path.join(tempfile.mkdtemp(), "search.db")
+    engine = create_engine_from_settings(f"sqlite+aiosqlite:///{path}", echo=False)
+    await run_migrations(engine)
+    rng = random.Random(args.seed)
+
+    async with AsyncSession(engine) as db:
+        users = await build(db, args, rng)
+    print(f"database size {os.path.getsize(path) / 1024 / 1024:.1f} MiB")
+
+    queries = {
+        "common word": "pricing",
+        "frequent keyword": "kw10",
+        "rare keyword": "kw100",
+        "three words": "market pricing roadmap",
+    }
+    async with AsyncSession(engine) as db:
+        for name, query in queries.items():
+            latencies, hits = [], 0
+            for _ in range(args.queries):
+                owner_id = rng.randint(1, users)
+                started = time.perf_counter()
+                hits += len(await search_index.search(db, owner_id, query, limit=21))
+                latencies.append(time.perf_counter() - started)
+            print(f"search {name:<18} {summarize(latencies)}  ({hits / args.queries:.1f} hits/page)")
+
+        latencies = []
+        for _ in range(args.queries):
+            started = time.perf_counter()
+            await search_index.search(db, rng.randint(1, users), "pricing", limit=21, offset=200)
+            latencies.append(time.perf_counter() - started)
+        print(f"search offset 200          {summarize(latencies)}")
+
+        latencies = []
+        for _ in range(min(args.queries, 20)):
+            started = time.perf_counter()
+            await client_side(db, rng.randint(1, users), "pricing")
+            latencies.append(time.perf_counter() - started)
+        print(f"client-side filter        {summarize(latencies)}  ({args.sections_per_user} sections per user)")
+
+        latencies = []
+        for _ in range(args.queries):
+            section = await db.get(DocumentSection, rng.randint(1, args.sections))
+            section.content = section_text(rng, args.paragraphs)
+            started = time.perf_counter()
+            await search_index.index_sections(db, [section])
+            await db.commit()
+            latencies.append(time.perf_counter() - started)
+        print(f"re-index one section      {summarize(latencies)}  (incl. commit)")
+    await engine.dispose()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Full-text search benchmark.")
+    parser.add_argument("--sections", type=int, default=100000)
+    parser.add_argument("--sections-per-user", type=int, default=1000)
+    parser.add_argument("--paragraphs", type=int, default=2, help="paragraphs per section")
+    parser.add_argument("--queries", type=int, default=200, help="queries per measurement")
+    parser.add_argument("--seed", type=int, default=7)
+    asyncio.run(main(parser.parse_args()))
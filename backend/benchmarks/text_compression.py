@@ -0,0 +1,101 @@
+# backend/benchmarks/text_compression.py
+#
+# Database size and read latency for section content stored as plain Text
+# versus CompressedText, on a synthetic corpus of multi-paragraph sections.
+# Run from `backend`:
+#
+#   python -m benchmarks.text_compression --projects 1000
+
+import argparse
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+
+os.environ.setdefault("GEMINI_API_KEY", "benchmark")
+os.environ.setdefault("SECRET_KEY", "benchmark")
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import Column, Index, Integer, MetaData, Table, Text, create_engine, select, text
+
+from app.models.types import CompressedText
+from benchmarks.history_storage import paragraph
+
+
+def make_table(metadata: MetaData, column_type) -> Table:
+    return Table(
+        "document_sections", metadata,
+        Column("id", Integer, primary_key=True),
+        Column("project_id", Integer, nullable=False),
+        Column("section_order", Integer, nullable=False),
+        Column("content", column_type),
+        Index("ix_sections_project", "project_id", "section_order"),
+    )
+
+
+def run_case(label: str, column_type, corpus, args):
+    path = os.path.join(tempfile.mkdtemp(), f"{label}.db")
+    engine = create_engine(f"sqlite:///{path}")
+    metadata = MetaData()
+    table = make_table(metadata, column_type)
+    metadata.create_all(engine)
+
+    started = time.perf_counter()
+    with engine.begin() as conn:
+        conn.execute(table.insert(), corpus)
+    write_seconds = time.perf_counter() - started
+    with engine.connect() as conn:
+        conn.execute(text("VACUUM"))
+    size = os.path.getsize(path)
+
+    rng = random.Random(args.seed)
+    latencies = []
+    with engine.connect() as conn:
+        for _ in range(args.reads):
+            project_id = rng.randint(1, args.projects)
+            started = time.perf_counter()
+            conn.execute(
+                select(table.c.content)
+                .where(table.c.project_id == project_id)
+                .order_by(table.c.section_order)
+            ).scalars().all()
+            latencies.append(time.perf_counter() - started)
+    engine.dispose()
+
+    latencies.sort()
+    print(
+        f"{label:<11} size={size / 1024 / 1024:7.2f} MiB  insert={write_seconds:5.2f} s"
+        f"  read p50={statistics.median(latencies) * 1000:.3f} ms"
+        f"  p95={latencies[int(len(latencies) * 0.95)] * 1000:.3f} ms"
+    )
+    return size
+
+
+def main(args):
+    rng = random.Random(args.seed)
+    corpus = [
+        {
+            "project_id": project_id,
+            "section_order": order,
+            "content": "\n\n".join(paragraph(rng) for _ in range(rng.randint(4, 10))),
+        }
+        for project_id in range(1, args.projects + 1)
+        for order in range(args.sections)
+    ]
+    raw = sum(len(row["content"].encode("utf-8")) for row in corpus)
+    print(f"corpus: {len(corpus)} sections, {raw / 1024 / 1024:.2f} MiB of text")
+
+    plain = run_case("plain", Text, corpus, args)
+    compressed = run_case("compressed", CompressedText, corpus, args)
+    print(f"size reduction: {plain / compressed:.2f}x")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compressed text column benchmark.")
+    parser.add_argument("--projects", type=int, default=1000)
+    parser.add_argument("--sections", type=int, default=7)
+    parser.add_argument("--reads", type=int, default=2000)
+    parser.add_argument("--seed", type=int, default=11)
+    main(parser.parse_args())
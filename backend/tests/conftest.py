@@ -0,0 +1,62 @@
+# Settings are read at import time, so the environment is set up before any
+# `app` module is imported. Every test gets a fresh, migrated SQLite file.
+
+import asyncio
+import os
+import tempfile
+
+_scratch = tempfile.mkdtemp(prefix="backend-tests-")
+os.environ.setdefault("GEMINI_API_KEY", "test")
+os.environ.setdefault("SECRET_KEY", "test")
+os.environ["DATABASE_URL"] = f"sqlite+aiosqlite:///{_scratch}/app.db"
+os.environ["LLM_CACHE_PATH"] = os.path.join(_scratch, "llm_cache.db")
+os.environ["EXPORT_CACHE_DIR"] = os.path.join(_scratch, "export_cache")
+os.environ["JOB_WORKERS"] = "0"
+os.environ["LLM_CACHE_ENABLED"] = "false"
+os.environ["LLM_REQUESTS_PER_MINUTE"] = "0"
+os.environ["LLM_TOKENS_PER_MINUTE"] = "0"
+os.environ["STARTUP_WARMUP"] = "false"
+
+import pytest
+
+
+@pytest.fixture
+def run(tmp_path):
+    """Runs `scenario(engine)` on a fresh, migrated database in its own event loop."""
+    from app.db import create_engine_from_settings
+    from app.migrations import run_migrations
+
+    def runner(scenario):
+        async def main():
+            engine = create_engine_from_settings(f"sqlite+aiosqlite:///{tmp_path}/test.db", echo=False)
+            try:
+                await run_migrations(engine)
+                return await scenario(engine)
+            finally:
+                await engine.dispose()
+        return asyncio.run(main())
+    return runner
+
+
+@pytest.fixture
+def run_app():
+    """Runs `scenario()` against the app's own database, recreated for each test."""
+    from app.core.user_cache import user_cache
+    from app.db import engine, init_db
+    from app.services.project_cache import project_cache
+
+    def runner(scenario):
+        async def main():
+            for suffix in ("", "-wal", "-shm"):
+                path = os.path.join(_scratch, "app.db" + suffix)
+                if os.path.exists(path):
+                    os.remove(path)
+            user_cache.clear()
+            project_cache.clear()
+            await init_db()
+            try:
+                return await scenario()
+            finally:
+                await engine.dispose()
+        return asyncio.run(main())
+    return runner
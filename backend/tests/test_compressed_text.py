@@ -0,0 +1,23 @@
+import pytest
+
+from app.models.types import compress_text, decompress_text
+
+
+@pytest.mark.parametrize("value", [
+    "",
+    "plain prose",
+    "\x1b",
+    "\x1bzlib:not base64",
+    "\x1braw:already tagged",
+    "\x1b[1mbold\x1b[0m " * 200,
+    "long prose " * 500,
+])
+@pytest.mark.parametrize("codec", ["zlib", "zstd"])
+@pytest.mark.parametrize("min_bytes", [0, 1024])
+def test_every_value_round_trips(value, codec, min_bytes):
+    stored = compress_text(value, codec, min_bytes)
+    assert decompress_text(stored) == value
+
+
+def test_short_plain_text_is_stored_as_is():
+    assert compress_text("plain prose", "zlib", 1024) == "plain prose"
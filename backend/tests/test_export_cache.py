@@ -0,0 +1,37 @@
+import asyncio
+import os
+
+from app.services.export_cache import ExportCache
+
+
+def _write(path: str, data: bytes = b"docx") -> None:
+    with open(path, "wb") as f:
+        f.write(data)
+
+
+def test_invalidation_keeps_in_flight_renders(tmp_path):
+    async def scenario():
+        cache = ExportCache(str(tmp_path), max_bytes=1024 * 1024)
+        _write(str(tmp_path / "7-old.docx"))
+        tmp, path = cache.reserve(7, "new", "docx")
+        _write(tmp)
+
+        # The project is edited while the export is rendering.
+        await cache.invalidate_project(7)
+        assert not os.path.exists(tmp_path / "7-old.docx")
+        assert os.path.exists(tmp)
+
+        assert await cache.commit(tmp, path)
+        assert await cache.get(7, "new", "docx") == path
+
+    asyncio.run(scenario())
+
+
+def test_commit_of_a_missing_file_is_not_cached(tmp_path):
+    async def scenario():
+        cache = ExportCache(str(tmp_path), max_bytes=1024 * 1024)
+        tmp, path = cache.reserve(7, "gone", "docx")
+        assert not await cache.commit(tmp, path)
+        assert await cache.get(7, "gone", "docx") is None
+
+    asyncio.run(scenario())
@@ -0,0 +1,96 @@
+import httpx
+from sqlalchemy.future import select
+
+from app import crud
+from app.db import AsyncSessionLocal
+from app.main import app
+from app.models.document_section import DocumentSection
+from app.models.generation_job import GenerationJob
+from app.models.project import Project
+from app.services import job_queue, llm_service
+from app.services.usage_tracker import QuotaExceeded, llm_user
+
+
+def _quota_after(monkeypatch, calls: int):
+    """The LLM answers `calls` prompts, then the user's quota is spent."""
+    answered = []
+
+    async def generate_text(prompt, llm=None, fresh=False):
+        if len(answered) >= calls:
+            raise QuotaExceeded(llm_user.get(), used=1000, quota=1000)
+        answered.append(prompt)
+        return f"text {len(answered)}"
+    monkeypatch.setattr(llm_service, "_generate_text", generate_text)
+
+
+async def _client_with_project(client: httpx.AsyncClient):
+    await client.post("/api/v1/auth/register", json={"email": "quota@example.com", "password": "secret"})
+    response = await client.post("/api/v1/auth/login", data={"username": "quota@example.com", "password": "secret"})
+    headers = {"Authorization": f"Bearer {response.json()['access_token']}"}
+    response = await client.post("/api/v1/projects/", json={"title": "Quota", "document_type": "docx"}, headers=headers)
+    return headers, response.json()["id"]
+
+
+async def _contents(project_id: int):
+    async with AsyncSessionLocal() as db:
+        result = await db.execute(
+            select(DocumentSection.content)
+            .where(DocumentSection.project_id == project_id)
+            .order_by(DocumentSection.section_order)
+        )
+        return result.scalars().all()
+
+
+def test_quota_running_out_keeps_the_current_sections(run_app, monkeypatch):
+    _quota_after(monkeypatch, 2)
+
+    async def scenario():
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            headers, project_id = await _client_with_project(client)
+            url = f"/api/v1/projects/{project_id}/generate"
+            response = await client.post(url, json={"main_topic": "T", "section_titles": ["A"]}, headers=headers)
+            assert response.status_code == 200
+            before = await _contents(project_id)
+
+            response = await client.post(
+                url, json={"main_topic": "T", "section_titles": ["A", "B", "C"]}, headers=headers
+            )
+            assert response.status_code == 429
+            assert "Retry-After" in response.headers
+            assert await _contents(project_id) == before
+
+            response = await client.post(
+                f"{url}/stream", json={"main_topic": "U", "section_titles": ["A", "B"]}, headers=headers
+            )
+            assert "event: error" in response.text
+            assert '"status": 429' in response.text
+            assert "event: done" not in response.text
+            assert not any(content.startswith("Error:") for content in await _contents(project_id))
+
+    run_app(scenario)
+
+
+def test_quota_running_out_fails_the_job(run_app, monkeypatch):
+    _quota_after(monkeypatch, 1)
+
+    async def scenario():
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            _, project_id = await _client_with_project(client)
+        async with AsyncSessionLocal() as db:
+            project = await db.get(Project, project_id)
+            job = await crud.create_generation_job(
+                db, project_id=project_id, owner_id=project.owner_id, main_topic="T", section_titles=["A", "B"]
+            )
+            job_id = job.id
+
+        await job_queue.run_job(*await job_queue.claim_next_job())
+        async with AsyncSessionLocal() as db:
+            job = await db.get(GenerationJob, job_id)
+            assert job.status == "failed"
+            assert job.error.startswith("Token quota exceeded")
+            assert [section["content"] for section in job.get_sections()].count("text 1") == 1
+        assert await _contents(project_id) == []
+
+    run_app(scenario)
@@ -0,0 +1,13 @@
+import os
+import statistics
+
+from benchmarks.import_time import eager_imports, measure
+
+BUDGET_MS = float(os.getenv("IMPORT_TIME_BUDGET_MS", 1500))
+
+
+def test_app_import_is_lazy_and_within_budget():
+    runs = [measure("app.main") for _ in range(3)]
+    assert eager_imports(runs) == []
+    median = statistics.median(run["app.main"][1] / 1000 for run in runs)
+    assert median <= BUDGET_MS, f"import app.main took {median:.0f} ms"
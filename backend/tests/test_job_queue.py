@@ -0,0 +1,113 @@
+import asyncio
+from datetime import datetime, timedelta
+
+from sqlalchemy import func, update
+from sqlalchemy.future import select
+
+from app import crud
+from app.core.config import settings
+from app.db import AsyncSessionLocal
+from app.models.document_section import DocumentSection
+from app.models.generation_job import GenerationJob
+from app.models.project import Project
+from app.models.user import User
+from app.services import job_queue, llm_service
+
+
+async def _job(titles=("Intro", "Body", "End")) -> int:
+    async with AsyncSessionLocal() as db:
+        user = User(email="jobs@example.com", hashed_password="x")
+        db.add(user)
+        await db.flush()
+        project = Project(title="Jobs", document_type="docx", owner_id=user.id)
+        db.add(project)
+        await db.flush()
+        job = await crud.create_generation_job(
+            db, project_id=project.id, owner_id=user.id, main_topic="Topic", section_titles=list(titles)
+        )
+        return job.id
+
+
+async def _load(job_id: int):
+    async with AsyncSessionLocal() as db:
+        job = await db.get(GenerationJob, job_id)
+        sections = await db.scalar(
+            select(func.count()).select_from(DocumentSection).where(DocumentSection.project_id == job.project_id)
+        )
+        return job, sections
+
+
+def _fake_llm(monkeypatch, seconds: float):
+    async def generate(main_topic: str, section_title: str, fresh: bool = False) -> str:
+        await asyncio.sleep(seconds)
+        return f"{section_title} text"
+    monkeypatch.setattr(llm_service, "generate_content_for_section", generate)
+
+
+def test_heartbeat_keeps_a_slow_job_leased(run_app, monkeypatch):
+    # One section takes several lease periods.
+    monkeypatch.setattr(settings, "JOB_LEASE_SECONDS", 0.3)
+    _fake_llm(monkeypatch, 1.0)
+
+    async def scenario():
+        job_id = await _job()
+        job_id, token = await job_queue.claim_next_job()
+        running = asyncio.create_task(job_queue.run_job(job_id, token))
+        while not running.done():
+            assert await job_queue.claim_next_job() is None
+            await asyncio.sleep(0.05)
+        await running
+
+        job, sections = await _load(job_id)
+        assert (job.status, job.attempts, sections) == ("completed", 1, 3)
+
+    run_app(scenario)
+
+
+def test_reclaimed_job_ignores_the_stale_worker(run_app, monkeypatch):
+    _fake_llm(monkeypatch, 0.0)
+
+    async def scenario():
+        job_id = await _job()
+        _, stale = await job_queue.claim_next_job()
+        async with AsyncSessionLocal() as db:
+            await db.execute(
+                update(GenerationJob)
+                .where(GenerationJob.id == job_id)
+                .values(lease_expires_at=datetime.utcnow() - timedelta(seconds=1))
+            )
+            await db.commit()
+        _, current = await job_queue.claim_next_job()
+
+        await job_queue.run_job(job_id, stale)
+        job, sections = await _load(job_id)
+        assert (job.status, job.lease_token, sections) == ("running", current, 0)
+        assert all(section["content"] is None for section in job.get_sections())
+
+        await job_queue.run_job(job_id, current)
+        job, sections = await _load(job_id)
+        assert (job.status, sections) == ("completed", 3)
+
+    run_app(scenario)
+
+
+def test_job_is_failed_after_max_attempts(run_app, monkeypatch):
+    monkeypatch.setattr(settings, "JOB_MAX_ATTEMPTS", 2)
+
+    async def scenario():
+        job_id = await _job()
+        async with AsyncSessionLocal() as db:
+            # Claimed twice by workers that died mid-job.
+            await db.execute(
+                update(GenerationJob)
+                .where(GenerationJob.id == job_id)
+                .values(status="running", attempts=2, lease_expires_at=datetime.utcnow() - timedelta(seconds=1))
+            )
+            await db.commit()
+
+        assert await job_queue.claim_next_job() is None
+        job, _ = await _load(job_id)
+        assert job.status == "failed"
+        assert "2 attempts" in job.error
+
+    run_app(scenario)
@@ -0,0 +1,49 @@
+import asyncio
+from types import SimpleNamespace
+
+from app.core.config import settings
+from app.services import llm_service
+from app.services.llm_cache import LLMCache, SQLiteTier
+
+
+def _keys(tier: SQLiteTier):
+    return {row[0] for row in tier._conn.execute("SELECT key FROM llm_cache")}
+
+
+def test_disk_tier_evicts_in_batches(tmp_path):
+    tier = SQLiteTier(str(tmp_path / "cache.db"), max_entries=10, ttl_seconds=3600)
+    for i in range(11):
+        tier.set(f"k{i}", "v")
+    # One write past capacity is within the batch; nothing is deleted yet.
+    assert len(_keys(tier)) == 11
+
+    tier.set("k11", "v")
+    assert _keys(tier) == {f"k{i}" for i in range(2, 12)}
+
+    # Replacing an existing key never evicts anything.
+    tier = SQLiteTier(str(tmp_path / "cache.db"), max_entries=10, ttl_seconds=3600)
+    tier.set("k11", "w")
+    assert len(_keys(tier)) == 10
+
+
+def test_fresh_generation_skips_the_cache(tmp_path, monkeypatch):
+    calls = []
+
+    async def complete(prompt):
+        calls.append(prompt)
+        return SimpleNamespace(text=f"version {len(calls)}")
+
+    monkeypatch.setattr(settings, "LLM_CACHE_ENABLED", True)
+    monkeypatch.setattr(llm_service, "llm_cache", LLMCache(str(tmp_path / "cache.db"), 16, 16, 3600))
+    monkeypatch.setattr(llm_service, "client", SimpleNamespace(model_name="fake", complete=complete))
+
+    async def scenario():
+        generate = llm_service.generate_content_for_section
+        assert await generate("Topic", "Intro") == "version 1"
+        assert await generate("Topic", "Intro") == "version 1"
+        assert await generate("Topic", "Intro", fresh=True) == "version 2"
+        # The regenerated text replaces the cached one.
+        assert await generate("Topic", "Intro") == "version 2"
+
+    asyncio.run(scenario())
+    assert len(calls) == 2
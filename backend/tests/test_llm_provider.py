@@ -0,0 +1,200 @@
+import asyncio
+import time
+from types import SimpleNamespace
+
+import pytest
+
+from app.services import llm_service
+from app.services.llm_provider import (
+    CircuitBreaker, LatencyWindow, LLMUnavailable, ResilientClient,
+)
+from app.services.rate_limiter import RateLimiter
+
+
+class StubProvider:
+    """
+    Answers prompts according to a script, one step per call: "ok", "fail"
+    (a retryable error), "bad" (a non-retryable one), "stall" (never
+    answers) or a number of seconds to wait before answering.
+    """
+
+    def __init__(self, *script, text: str = None, model_name: str = "stub"):
+        self.script = list(script)
+        self.text = text
+        self.model_name = model_name
+        self.calls = 0
+
+    async def complete(self, prompt: str):
+        self.calls += 1
+        call = self.calls
+        step = self.script.pop(0) if self.script else "ok"
+        if step == "fail":
+            raise ConnectionError("upstream down")
+        if step == "bad":
+            raise ValueError("prompt rejected")
+        if step == "stall":
+            await asyncio.Event().wait()
+        if isinstance(step, (int, float)):
+            await asyncio.sleep(step)
+        return SimpleNamespace(text=self.text or f"answer {call}")
+
+
+def _client(provider, breaker=None, **options) -> ResilientClient:
+    settings = dict(
+        timeout=5.0, max_attempts=3, retry_base=0.0, retry_max=0.0,
+        hedge=False, hedge_min_delay=0.05,
+    )
+    settings.update(options)
+    return ResilientClient(
+        provider,
+        rate_limiter=RateLimiter(0, 0),
+        concurrency=asyncio.Semaphore(10),
+        breaker=breaker or CircuitBreaker(failure_threshold=0, reset_seconds=1.0),
+        **settings,
+    )
+
+
+def test_retries_retryable_errors():
+    provider = StubProvider("fail", "fail")
+    client = _client(provider)
+    response = asyncio.run(client.complete("p"))
+    assert response.text == "answer 3"
+    assert provider.calls == 3
+    assert client.counters["retries"] == 2
+    assert client.counters["failures"] == 2
+
+
+def test_gives_up_after_max_attempts():
+    provider = StubProvider("fail", "fail", "fail", "ok")
+    client = _client(provider)
+    with pytest.raises(LLMUnavailable):
+        asyncio.run(client.complete("p"))
+    assert provider.calls == 3
+
+
+def test_does_not_retry_other_errors():
+    provider = StubProvider("bad")
+    client = _client(provider)
+    with pytest.raises(ValueError):
+        asyncio.run(client.complete("p"))
+    assert provider.calls == 1
+    assert client.counters["failures"] == 0
+
+
+def test_deadline_turns_a_stalled_call_into_a_retry():
+    provider = StubProvider("stall")
+    client = _client(provider, timeout=0.05)
+    response = asyncio.run(client.complete("p"))
+    assert response.text == "answer 2"
+    assert client.counters["timeouts"] == 1
+    assert client.counters["retries"] == 1
+
+
+def test_backoff_is_capped():
+    client = _client(StubProvider(), retry_base=0.5, retry_max=2.0)
+    assert all(0 <= client._backoff(attempt) <= 2.0 for attempt in range(1, 10))
+    assert all(client._backoff(1) <= 0.5 for _ in range(50))
+
+
+def test_circuit_opens_fails_fast_and_recovers():
+    breaker = CircuitBreaker(failure_threshold=2, reset_seconds=0.2)
+    provider = StubProvider("fail", "fail")
+    client = _client(provider, breaker=breaker, max_attempts=1)
+
+    async def scenario():
+        for _ in range(2):
+            with pytest.raises(LLMUnavailable):
+                await client.complete("p")
+        assert breaker.state == "open"
+
+        # Rejected without reaching the provider.
+        with pytest.raises(LLMUnavailable):
+            await client.complete("p")
+        assert provider.calls == 2
+        assert client.counters["rejected"] == 1
+
+        await asyncio.sleep(0.25)
+        assert breaker.state == "half_open"
+        # Only one trial call goes through while the circuit is half open.
+        provider.script = [0.1]
+        trial = asyncio.ensure_future(client.complete("p"))
+        await asyncio.sleep(0.02)
+        with pytest.raises(LLMUnavailable):
+            await client.complete("p")
+        assert (await trial).text == "answer 3"
+        assert breaker.state == "closed"
+        assert (await client.complete("p")).text == "answer 4"
+
+    asyncio.run(scenario())
+
+
+def test_failed_trial_reopens_the_circuit():
+    breaker = CircuitBreaker(failure_threshold=1, reset_seconds=0.1)
+    provider = StubProvider("fail", "fail")
+    client = _client(provider, breaker=breaker, max_attempts=1)
+
+    async def scenario():
+        with pytest.raises(LLMUnavailable):
+            await client.complete("p")
+        await asyncio.sleep(0.15)
+        assert breaker.state == "half_open"
+        with pytest.raises(LLMUnavailable):
+            await client.complete("p")
+        assert breaker.state == "open"
+        assert provider.calls == 2
+
+    asyncio.run(scenario())
+
+
+def test_hedge_wins_over_a_slow_first_attempt():
+    provider = StubProvider(1.0, "ok")
+    client = _client(provider, hedge=True, hedge_min_delay=0.05)
+
+    async def scenario():
+        started = time.monotonic()
+        response = await client.complete("p")
+        return response, time.monotonic() - started
+
+    response, elapsed = asyncio.run(scenario())
+    assert response.text == "answer 2"
+    assert elapsed < 0.5
+    assert client.counters["hedges"] == 1
+    assert client.counters["hedge_wins"] == 1
+
+
+def test_no_hedge_for_a_fast_first_attempt():
+    provider = StubProvider("ok")
+    client = _client(provider, hedge=True, hedge_min_delay=0.2)
+    assert asyncio.run(client.complete("p")).text == "answer 1"
+    assert provider.calls == 1
+    assert client.counters["hedges"] == 0
+
+
+def test_hedge_delay_follows_recent_p95():
+    window = LatencyWindow(size=100, min_samples=20)
+    for i in range(19):
+        window.add(i / 100)
+    assert window.p95() is None
+    for i in range(19, 100):
+        window.add(i / 100)
+    assert window.p95() == pytest.approx(0.94)
+
+    client = _client(StubProvider(), hedge=True, hedge_min_delay=0.5)
+    client.latencies = window
+    assert client._hedge_delay() == pytest.approx(0.94)
+    client.hedge_min_delay = 2.0
+    assert client._hedge_delay() == 2.0
+
+
+def test_outline_falls_back_to_the_fallback_model(monkeypatch):
+    primary = _client(StubProvider("fail", "fail", "fail", model_name="primary"))
+    fallback = _client(StubProvider(text="Intro, Market, Outlook", model_name="fallback"))
+    monkeypatch.setattr(llm_service, "client", primary)
+    monkeypatch.setattr(llm_service, "fallback_client", fallback)
+    assert asyncio.run(llm_service.generate_outline("Topic", "docx")) == ["Intro", "Market", "Outlook"]
+    assert primary.provider.calls == 3
+    assert fallback.provider.calls == 1
+
+    monkeypatch.setattr(llm_service, "fallback_client", None)
+    primary.provider.script = ["fail"] * 3
+    assert asyncio.run(llm_service.generate_outline("Topic", "docx")) == []
@@ -0,0 +1,37 @@
+import httpx
+from sqlalchemy.future import select
+
+from app.db import AsyncSessionLocal
+from app.main import app
+from app.models.project import Project
+from app.models.user import User
+
+
+def test_project_list_is_only_paged_on_request(run_app):
+    async def scenario():
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            await client.post("/api/v1/auth/register", json={"email": "pages@example.com", "password": "secret"})
+            response = await client.post(
+                "/api/v1/auth/login", data={"username": "pages@example.com", "password": "secret"}
+            )
+            headers = {"Authorization": f"Bearer {response.json()['access_token']}"}
+            async with AsyncSessionLocal() as db:
+                owner_id = await db.scalar(select(User.id).where(User.email == "pages@example.com"))
+                db.add_all([
+                    Project(title=f"P{i}", document_type="docx", owner_id=owner_id) for i in range(120)
+                ])
+                await db.commit()
+
+            response = await client.get("/api/v1/projects/", headers=headers)
+            assert len(response.json()) == 120
+            assert "X-Next-Cursor" not in response.headers
+
+            response = await client.get("/api/v1/projects/?limit=50", headers=headers)
+            assert len(response.json()) == 50
+            cursor = response.headers["X-Next-Cursor"]
+            response = await client.get(f"/api/v1/projects/?cursor={cursor}", headers=headers)
+            assert len(response.json()) == 70
+            assert "X-Next-Cursor" not in response.headers
+
+    run_app(scenario)
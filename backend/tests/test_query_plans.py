@@ -0,0 +1,14 @@
+import pytest
+
+from benchmarks.query_plans import HOT_QUERIES, bad_steps, explain
+
+
+@pytest.mark.parametrize("name", list(HOT_QUERIES))
+def test_hot_query_walks_an_index(run, name):
+    async def scenario(engine):
+        async with engine.connect() as conn:
+            return await explain(conn, HOT_QUERIES[name])
+
+    details = run(scenario)
+    assert details
+    assert bad_steps(details) == [], "\n".join(details)
@@ -0,0 +1,81 @@
+import asyncio
+
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.future import select
+
+from app import crud
+from app.models.document_section import DocumentSection
+from app.models.project import Project
+from app.models.refinement_history import RefinementHistory
+from app.models.user import User
+
+
+async def _section(engine) -> int:
+    async with AsyncSession(engine, expire_on_commit=False) as db:
+        user = User(email="history@example.com", hashed_password="x")
+        db.add(user)
+        await db.flush()
+        project = Project(title="History", document_type="docx", owner_id=user.id)
+        db.add(project)
+        await db.flush()
+        section = DocumentSection(title="Intro", content="v0", section_order=0, project_id=project.id)
+        db.add(section)
+        await db.commit()
+        return section.id
+
+
+def _version(i: int) -> str:
+    # Small edits at the start shift every later word, so a delta applied to
+    # the wrong base produces visibly wrong text.
+    return "new " * i + " ".join(f"word{j}" for j in range(60)) + f" edit {i}"
+
+
+def test_concurrent_refines_keep_every_version(run):
+    async def scenario(engine):
+        section_id = await _section(engine)
+        expected = {}
+
+        async with AsyncSession(engine, expire_on_commit=False) as db:
+            for i in range(3):
+                entry = await crud.add_history_entry(db, section_id, f"prompt {i}", _version(i))
+                await db.commit()
+                expected[entry.id] = _version(i)
+
+        # Two refines (double click, two tabs) both read the latest version
+        # before either commits, so both encode a delta against it.
+        both_read = asyncio.Barrier(2)
+
+        async def refine(i: int):
+            async with AsyncSession(engine, expire_on_commit=False) as db:
+                entry = await crud.add_history_entry(db, section_id, f"prompt {i}", _version(i))
+                await both_read.wait()
+                await db.commit()
+                return entry.id
+
+        ids = await asyncio.gather(refine(10), refine(11))
+        expected.update({ids[0]: _version(10), ids[1]: _version(11)})
+
+        async with AsyncSession(engine, expire_on_commit=False) as db:
+            # Later versions build on the concurrent ones.
+            for i in range(12, 15):
+                entry = await crud.add_history_entry(db, section_id, f"prompt {i}", _version(i))
+                await db.commit()
+                expected[entry.id] = _version(i)
+
+            encodings = (await db.execute(
+                select(RefinementHistory.encoding).where(RefinementHistory.id.in_(ids))
+            )).scalars().all()
+            assert encodings == ["delta", "delta"]
+            for history_id, content in expected.items():
+                assert await crud.get_history_content(db, section_id, history_id) == content
+
+    run(scenario)
+
+
+def test_unknown_history_entry(run):
+    async def scenario(engine):
+        section_id = await _section(engine)
+        async with AsyncSession(engine, expire_on_commit=False) as db:
+            assert await crud.get_history_content(db, section_id, 12345) is None
+
+    run(scenario)
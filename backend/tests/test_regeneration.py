@@ -0,0 +1,86 @@
+import httpx
+from sqlalchemy.future import select
+
+from app.db import AsyncSessionLocal
+from app.main import app
+from app.models.document_section import DocumentSection
+from app.services import llm_service
+from app.services.usage_tracker import QuotaExceeded, llm_user
+
+
+class _FakeLLM:
+    """Answers with "<title> text" until `quota_left` prompts have been answered."""
+
+    def __init__(self, monkeypatch):
+        self.quota_left = None
+
+        async def generate_text(prompt, llm=None, fresh=False):
+            if self.quota_left is not None:
+                if self.quota_left <= 0:
+                    raise QuotaExceeded(llm_user.get(), used=1000, quota=1000)
+                self.quota_left -= 1
+            return prompt.split("section you need to write is: '")[1].split("'")[0] + " text"
+        monkeypatch.setattr(llm_service, "_generate_text", generate_text)
+
+
+async def _sections(project_id: int):
+    async with AsyncSessionLocal() as db:
+        result = await db.execute(
+            select(DocumentSection.section_order, DocumentSection.title, DocumentSection.content)
+            .where(DocumentSection.project_id == project_id)
+            .order_by(DocumentSection.section_order, DocumentSection.id)
+        )
+        return [tuple(row) for row in result.all()]
+
+
+async def _generated_project(client: httpx.AsyncClient, titles):
+    await client.post("/api/v1/auth/register", json={"email": "regen@example.com", "password": "secret"})
+    response = await client.post("/api/v1/auth/login", data={"username": "regen@example.com", "password": "secret"})
+    headers = {"Authorization": f"Bearer {response.json()['access_token']}"}
+    response = await client.post("/api/v1/projects/", json={"title": "Regen", "document_type": "docx"}, headers=headers)
+    project_id = response.json()["id"]
+    response = await client.post(
+        f"/api/v1/projects/{project_id}/generate",
+        json={"main_topic": "T", "section_titles": list(titles)}, headers=headers
+    )
+    assert response.status_code == 200
+    return headers, project_id
+
+
+def test_failed_incremental_regeneration_changes_nothing(run_app, monkeypatch):
+    llm = _FakeLLM(monkeypatch)
+
+    async def scenario():
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            headers, project_id = await _generated_project(client, ["A", "B", "C", "D"])
+            before = await _sections(project_id)
+            request = {"main_topic": "T", "section_titles": ["C", "X", "A", "Y"]}
+            url = f"/api/v1/projects/{project_id}/generate"
+
+            llm.quota_left = 1
+            response = await client.post(f"{url}?incremental=true", json=request, headers=headers)
+            assert response.status_code == 429
+            assert await _sections(project_id) == before
+
+            # The stream stores X in place of B, then runs out before Y.
+            llm.quota_left = 1
+            response = await client.post(f"{url}/stream?incremental=true", json=request, headers=headers)
+            assert "event: error" in response.text
+            titles = [title for _, title, _ in await _sections(project_id)]
+            assert sorted(titles) == ["A", "C", "D", "X"]
+
+            llm.quota_left = None
+            response = await client.post(f"{url}/stream?incremental=true", json=request, headers=headers)
+            assert "event: done" in response.text
+            assert await _sections(project_id) == [
+                (0, "C", "C text"), (1, "X", "X text"), (2, "A", "A text"), (3, "Y", "Y text")
+            ]
+
+            response = await client.post(
+                f"{url}?incremental=true", json={"main_topic": "T", "section_titles": ["Y", "Z"]}, headers=headers
+            )
+            assert response.status_code == 200
+            assert await _sections(project_id) == [(0, "Y", "Y text"), (1, "Z", "Z text")]
+
+    run_app(scenario)
@@ -0,0 +1,57 @@
+import asyncio
+import gc
+import os
+
+from app.services.document_service import SectionData
+from app.services.render_service import RenderPool
+
+SECTIONS = [SectionData(title=f"Section {i}", content="Lorem ipsum dolor sit amet. " * 200) for i in range(5)]
+
+
+async def _wait_until_idle(pool: RenderPool, timeout: float = 5.0) -> None:
+    deadline = asyncio.get_running_loop().time() + timeout
+    while pool.pending:
+        assert asyncio.get_running_loop().time() < deadline, "render worker was never released"
+        await asyncio.sleep(0.05)
+
+
+def test_abandoned_export_releases_its_worker(tmp_path):
+    async def scenario():
+        # Small chunks, so the render fills the queue and blocks long before it's done.
+        pool = RenderPool("thread", workers=1, max_queue=0, chunk_size=512)
+        try:
+            tee_path = str(tmp_path / "abandoned.tmp")
+            chunks = pool.stream("docx", SECTIONS, tee_path=tee_path)
+            await asyncio.sleep(0.2)
+            assert pool.pending == 1
+            # The response is dropped before reading a single chunk.
+            del chunks
+            gc.collect()
+            await _wait_until_idle(pool)
+            assert not os.path.exists(tee_path)
+
+            # The worker is free for the next export, which streams in full.
+            path = str(tmp_path / "complete.tmp")
+            data = b"".join([chunk async for chunk in pool.stream("docx", SECTIONS, tee_path=path)])
+            assert data[:2] == b"PK"
+            with open(path, "rb") as f:
+                assert f.read() == data
+            assert pool.pending == 0
+        finally:
+            pool.shutdown()
+
+    asyncio.run(scenario())
+
+
+def test_stalled_export_is_abandoned(tmp_path):
+    async def scenario():
+        pool = RenderPool("thread", workers=1, max_queue=0, chunk_size=512, stall_seconds=0.5)
+        try:
+            chunks = pool.stream("docx", SECTIONS, tee_path=str(tmp_path / "stalled.tmp"))
+            # Still referenced, but nobody reads it.
+            await _wait_until_idle(pool)
+            assert chunks is not None
+        finally:
+            pool.shutdown()
+
+    asyncio.run(scenario())
@@ -0,0 +1,93 @@
+import httpx
+from sqlalchemy.future import select
+
+from app.db import AsyncSessionLocal
+from app.main import app
+from app.models.document_section import DocumentSection
+from app.models.project import Project
+from app.models.user import User
+from app.services import search_index
+
+
+async def _login(client: httpx.AsyncClient, email: str) -> dict:
+    await client.post("/api/v1/auth/register", json={"email": email, "password": "secret"})
+    response = await client.post("/api/v1/auth/login", data={"username": email, "password": "secret"})
+    return {"Authorization": f"Bearer {response.json()['access_token']}"}
+
+
+async def _project(email: str, contents) -> list:
+    async with AsyncSessionLocal() as db:
+        owner_id = await db.scalar(select(User.id).where(User.email == email))
+        project = Project(title="Batch", document_type="docx", owner_id=owner_id)
+        db.add(project)
+        await db.flush()
+        sections = [
+            DocumentSection(title=f"S{i}", content=content, section_order=i, project_id=project.id)
+            for i, content in enumerate(contents)
+        ]
+        db.add_all(sections)
+        await db.flush()
+        await search_index.index_sections(db, sections)
+        ids = [section.id for section in sections]
+        await db.commit()
+        return ids
+
+
+async def _section(section_id: int):
+    async with AsyncSessionLocal() as db:
+        return await db.get(DocumentSection, section_id)
+
+
+async def _version(section_id: int) -> int:
+    async with AsyncSessionLocal() as db:
+        return await db.scalar(
+            select(Project.version)
+            .join(DocumentSection, DocumentSection.project_id == Project.id)
+            .where(DocumentSection.id == section_id)
+        )
+
+
+def test_batch_update_applies_valid_items_and_reports_the_rest(run_app):
+    async def scenario():
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            headers = await _login(client, "owner@example.com")
+            await _login(client, "other@example.com")
+            first, second, third = await _project("owner@example.com", ["alpha", "walrus notes", "gamma"])
+            (foreign,) = await _project("other@example.com", ["not yours"])
+            version = await _version(first)
+
+            response = await client.patch("/api/v1/sections/batch", headers=headers, json={"updates": [
+                {"id": first, "section_order": 2},
+                {"id": third, "section_order": 0},
+                {"id": second, "content": "zebrafish notes", "comment": "rewritten"},
+                {"id": second, "feedback": "again"},
+                {"id": first + 1000},
+                {"id": foreign, "comment": "mine now"},
+                {"id": foreign + 1000, "comment": "missing"},
+            ]})
+            assert response.status_code == 200
+            body = response.json()
+            assert [(s["id"], s["section_order"]) for s in body["updated"]] == [(third, 0), (second, 1), (first, 2)]
+            assert sorted((e["id"], e["detail"]) for e in body["errors"]) == sorted([
+                (second, "Duplicate section id in batch"),
+                (first + 1000, "No fields to update"),
+                (foreign, "Section not found"),
+                (foreign + 1000, "Section not found"),
+            ])
+
+            edited = await _section(second)
+            assert (edited.content, edited.comment, edited.feedback) == ("zebrafish notes", "rewritten", None)
+            assert (await _section(foreign)).comment is None
+            # One bump for the one project touched.
+            assert await _version(first) == version + 1
+
+            response = await client.get("/api/v1/search/", params={"q": "zebrafish"}, headers=headers)
+            assert [hit["section_id"] for hit in response.json()] == [second]
+            response = await client.get("/api/v1/search/", params={"q": "walrus"}, headers=headers)
+            assert response.json() == []
+
+            response = await client.patch("/api/v1/sections/batch", headers=headers, json={"updates": []})
+            assert response.status_code == 422
+
+    run_app(scenario)
@@ -0,0 +1,24 @@
+import httpx
+
+from app.main import app
+
+STATS = ("/api/v1/stats/llm-cache", "/api/v1/stats/llm", "/api/v1/stats/render")
+
+
+def test_stats_need_a_signed_in_user_but_metrics_do_not(run_app):
+    async def scenario():
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            for url in STATS:
+                assert (await client.get(url)).status_code == 401
+            assert (await client.get("/metrics")).status_code == 200
+
+            await client.post("/api/v1/auth/register", json={"email": "stats@example.com", "password": "secret"})
+            response = await client.post(
+                "/api/v1/auth/login", data={"username": "stats@example.com", "password": "secret"}
+            )
+            headers = {"Authorization": f"Bearer {response.json()['access_token']}"}
+            for url in STATS:
+                assert (await client.get(url, headers=headers)).status_code == 200
+
+    run_app(scenario)